@@ -0,0 +1,89 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Atomic file writes.
+
+Files are written to a temporary file in the target directory and
+renamed into place once complete, so readers never see partially
+written files.
+"""
+
+import os
+import hashlib
+import tempfile
+
+
+def _file_mode():
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# tempfile.mkstemp creates files readable by their owner only; the
+# files renamed into place get the mode `open` would have given them.
+FILE_MODE = _file_mode()
+
+
+def write_atomically(file_path, chunks):
+    """Writes chunks to a file, hashing them on the fly.
+
+    The chunks are written to a temporary file next to
+    `file_path`, which is renamed into place once complete.
+
+    Args:
+        file_path (str): The destination file.
+        chunks (iterable): The bytes to write.
+
+    Returns:
+        dict: The `sha256` hex digest and `size` in bytes
+            of the file.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    directory, file_name = os.path.split(file_path)
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory or '.', prefix=f'.{file_name}.', suffix='.part')
+    try:
+        os.chmod(temp_path, FILE_MODE)
+        with os.fdopen(fd, 'wb') as fl:
+            for chunk in chunks:
+                fl.write(chunk)
+                sha256.update(chunk)
+                size += len(chunk)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return {'sha256': sha256.hexdigest(), 'size': size}
+
+
+def read_chunks(file_path, chunk_size):
+    """Yields the content of a file in chunks.
+
+    Args:
+        file_path (str): The file.
+        chunk_size (int): The chunk size in bytes.
+
+    Yields:
+        bytes: The chunks.
+    """
+    with open(file_path, 'rb') as fl:
+        while True:
+            chunk = fl.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
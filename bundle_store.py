@@ -0,0 +1,148 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Content addressed store of API proxy and sharedflow bundles.
+
+Revisions are immutable, so once the bundle of a revision has been
+downloaded it is served from the store on every later run. Bundles
+are stored once per content under `objects/<sha256>.zip`, and every
+(host/org, api type, name, revision) has a ref file under `refs/`
+holding the SHA-256 of its bundle. The digest is verified whenever a bundle
+is read back; corrupted objects are dropped and downloaded again.
+"""
+
+import os
+import tempfile
+from urllib.parse import quote
+from atomic_file import read_chunks, write_atomically
+from base_logger import logger
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BundleStore():
+    """A content addressed bundle store.
+
+    Attributes:
+        directory (str): The store directory.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'refs'), exist_ok=True)
+
+    def _ref_path(self, org, api_type, name, revision):
+        return os.path.join(self.directory, 'refs', quote(org, safe='/'),
+                            api_type, quote(name, safe=''),
+                            quote(str(revision), safe=''))
+
+    def _object_path(self, sha256):
+        return os.path.join(self.directory, 'objects', sha256[:2],
+                            f'{sha256}.zip')
+
+    def lookup(self, org, api_type, name, revision):
+        """Returns the digest of a stored revision bundle.
+
+        Args:
+            org (str): The organization, qualified by the
+                Management API host, e.g. `api.enterprise.apigee.com/org`.
+            api_type (str): 'apis' or 'sharedflows'.
+            name (str): The API or sharedflow name.
+            revision (str): The revision.
+
+        Returns:
+            str: The SHA-256 of the bundle, or None if not stored.
+        """
+        try:
+            with open(self._ref_path(org, api_type, name, revision),
+                      encoding='utf-8') as fl:
+                sha256 = fl.read().strip()
+        except OSError:
+            return None
+        if not os.path.exists(self._object_path(sha256)):
+            return None
+        return sha256
+
+    def get(self, org, api_type, name, revision, file_path):  # noqa pylint: disable=R0913,R0917
+        """Copies a stored revision bundle to a file.
+
+        Args:
+            org (str): The organization, qualified by the
+                Management API host, e.g. `api.enterprise.apigee.com/org`.
+            api_type (str): 'apis' or 'sharedflows'.
+            name (str): The API or sharedflow name.
+            revision (str): The revision.
+            file_path (str): The destination file.
+
+        Returns:
+            dict: The `sha256` and `size` of the bundle, or None
+                if it is not stored or failed the integrity check.
+        """
+        sha256 = self.lookup(org, api_type, name, revision)
+        if sha256 is None:
+            return None
+        result = write_atomically(
+            file_path, read_chunks(self._object_path(sha256), CHUNK_SIZE))
+        if result['sha256'] != sha256:
+            logger.warning(f"Bundle of {api_type} {name} revision {revision} is corrupted in the bundle store, downloading it again")  # noqa pylint: disable=C0301,W1203
+            os.remove(self._object_path(sha256))
+            os.remove(file_path)
+            return None
+        logger.debug(f"Using stored bundle of {api_type} {name} revision {revision}")  # noqa pylint: disable=W1203
+        return result
+
+    def put(self, org, api_type, name, revision, file_path, sha256=None):  # noqa pylint: disable=R0913,R0917
+        """Stores the bundle of a revision.
+
+        Args:
+            org (str): The organization, qualified by the
+                Management API host, e.g. `api.enterprise.apigee.com/org`.
+            api_type (str): 'apis' or 'sharedflows'.
+            name (str): The API or sharedflow name.
+            revision (str): The revision.
+            file_path (str): The downloaded bundle.
+            sha256 (str, optional): The digest of the bundle, if
+                already known.
+
+        Returns:
+            str: The SHA-256 of the bundle.
+        """
+        object_path = self._object_path(sha256) if sha256 else None
+        if object_path is None or not os.path.exists(object_path):
+            os.makedirs(os.path.join(self.directory, 'objects'),
+                        exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(
+                dir=os.path.join(self.directory, 'objects'), suffix='.part')
+            os.close(fd)
+            try:
+                sha256 = write_atomically(
+                    temp_path, read_chunks(file_path, CHUNK_SIZE))['sha256']
+                object_path = self._object_path(sha256)
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                os.replace(temp_path, object_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+        ref_path = self._ref_path(org, api_type, name, revision)
+        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+        fd, temp_ref = tempfile.mkstemp(dir=os.path.dirname(ref_path),
+                                        suffix='.part')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fl:
+            fl.write(sha256)
+        os.replace(temp_ref, ref_path)
+        return sha256
@@ -0,0 +1,443 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Record and replay of Management API traffic.
+
+In `record` mode every request/response pair sent by `RestClient`
+is appended to a gzip compressed JSON lines cassette, together with
+the time the server took to answer. In `replay` mode the responses
+are served from the cassette without any network access, optionally
+sleeping for the recorded (scaled) latency so that a run keeps the
+traffic shape of the recorded org.
+
+Both modes are transport adapters mounted on the client sessions.
+Request headers (credentials) are never recorded. Pool worker
+processes write to a sibling `<cassette>.<pid>` file, which replay
+picks up as well. A recording run starts from an empty cassette, and
+response bodies are recorded as they are read, spooled to a
+temporary file rather than buffered in memory.
+
+Settings ([http] section of backend.properties):
+
+- `CASSETTE_MODE`: `off`, `record` or `replay`.
+- `CASSETTE_FILE`: The cassette path.
+- `CASSETTE_LATENCY_SCALE`: Factor applied to the recorded latency
+  on replay, 0 replays without delay.
+"""
+
+import io
+import os
+import glob
+import gzip
+import json
+import time
+import atexit
+import base64
+import hashlib
+import datetime
+import tempfile
+import threading
+import collections
+import multiprocessing
+import requests  # pylint: disable=E0401
+from requests.adapters import BaseAdapter  # pylint: disable=E0401
+from requests.structures import CaseInsensitiveDict  # pylint: disable=E0401
+from requests.utils import get_encoding_from_headers  # pylint: disable=E0401
+from requests.utils import stream_decode_response_unicode  # noqa pylint: disable=E0401
+from base_logger import logger
+
+CASSETTE_MODES = ('off', 'record', 'replay')
+
+# Response headers not worth recording, bodies are recorded decoded
+_SKIPPED_HEADERS = ('set-cookie', 'date', 'connection', 'keep-alive',
+                    'transfer-encoding', 'content-encoding',
+                    'content-length')
+
+# Bodies larger than this are spooled to disk while they are recorded
+SPOOL_SIZE = 1024 * 1024
+# A multiple of 3, so the base64 of the chunks can be concatenated
+_BODY_CHUNK_SIZE = 3 * 64 * 1024
+
+_recorders = {}
+_recorders_lock = threading.Lock()
+_recording_started = set()
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+class CassetteMissError(requests.exceptions.ConnectionError):
+    """Raised when a replayed request is not in the cassette."""
+
+
+def request_key(request):
+    """Returns the key matching a request to its recording.
+
+    Args:
+        request (requests.PreparedRequest): The request.
+
+    Returns:
+        str: The method, URL and digest of the request body.
+            Multipart bodies use random boundaries and are
+            left out.
+    """
+    body = request.body
+    content_type = request.headers.get('Content-Type') or ''
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if not isinstance(body, bytes) or content_type.startswith('multipart/'):
+        body = b''
+    digest = hashlib.sha1(body).hexdigest() if body else ''
+    return f'{request.method} {request.url} {digest}'
+
+
+class CassetteWriter():
+    """Appends recordings to a cassette file of this process."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def write(self, entry, body):
+        """Appends a recording.
+
+        Args:
+            entry (dict): The recorded request and response.
+            body (file): The response body, written base64
+                encoded in chunks.
+        """
+        head = json.dumps(entry, separators=(',', ':'))[:-1]
+        with self._lock:
+            if self._file is None:
+                self._file = gzip.open(self.path, 'ab')
+            self._file.write(f'{head},"body":"'.encode())
+            for chunk in iter(lambda: body.read(_BODY_CHUNK_SIZE), b''):
+                self._file.write(base64.b64encode(chunk))
+            self._file.write(b'"}\n')
+            # A sync flush keeps the cassette readable if the
+            # process does not exit cleanly.
+            self._file.flush()
+
+    def close(self):
+        """Closes the cassette file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def get_writer(path):
+    """Returns the cassette writer of this process.
+
+    Args:
+        path (str): The cassette path.
+
+    Returns:
+        CassetteWriter: The writer.
+    """
+    pid = os.getpid()
+    with _recorders_lock:
+        if (path, pid) not in _recorders:
+            if multiprocessing.parent_process() is not None:
+                path_of_process = f'{path}.{pid}'
+            else:
+                path_of_process = path
+            _recorders[(path, pid)] = CassetteWriter(path_of_process)
+        return _recorders[(path, pid)]
+
+
+def start_recording(path):
+    """Drops the recordings of an earlier run of a cassette.
+
+    Only done once by the main process, before pool worker
+    processes record to their sibling files.
+
+    Args:
+        path (str): The cassette path.
+    """
+    if multiprocessing.parent_process() is not None:
+        return
+    with _recorders_lock:
+        if path in _recording_started:
+            return
+        _recording_started.add(path)
+    for each_path in [path] + glob.glob(f'{glob.escape(path)}.*'):
+        try:
+            os.remove(each_path)
+        except FileNotFoundError:
+            pass
+
+
+def _spooled(chunks, writer, entry):
+    """Yields body chunks and records the body once fully read."""
+    with tempfile.SpooledTemporaryFile(SPOOL_SIZE) as spool:
+        for chunk in chunks:
+            spool.write(chunk)
+            yield chunk
+        spool.seek(0)
+        writer.write(entry, spool)
+
+
+def record_response(response, writer, entry):
+    """Records a response once its body has been read.
+
+    Args:
+        response (requests.Response): The response.
+        writer (CassetteWriter): The cassette writer.
+        entry (dict): The recorded request and response, without
+            the body.
+    """
+    if response._content is not False:  # noqa pylint: disable=W0212
+        # Already read by the sending adapter
+        writer.write(entry, io.BytesIO(response._content or b''))  # noqa pylint: disable=W0212
+        return
+    iter_content = response.iter_content
+
+    def iter_recorded(chunk_size=1, decode_unicode=False):
+        chunks = _spooled(iter_content(chunk_size), writer, entry)
+        if decode_unicode:
+            chunks = stream_decode_response_unicode(chunks, response)
+        return chunks
+    # Response.content reads the body through iter_content as well
+    response.iter_content = iter_recorded
+
+
+@atexit.register
+def close_writers():
+    """Closes the cassette files written by this process."""
+    pid = os.getpid()
+    with _recorders_lock:
+        writers = [writer for (_, writer_pid), writer in _recorders.items()
+                   if writer_pid == pid]
+    for writer in writers:
+        writer.close()
+
+
+def load_cassette(path):
+    """Loads the recordings of a cassette and its process siblings.
+
+    Args:
+        path (str): The cassette path.
+
+    Returns:
+        dict: Lists of recordings keyed by `request_key`,
+            in recording order.
+    """
+    recordings = collections.defaultdict(list)
+    paths = [path] + sorted(glob.glob(f'{glob.escape(path)}.*'))
+    for each_path in paths:
+        if not os.path.exists(each_path):
+            continue
+        try:
+            with gzip.open(each_path, 'rt', encoding='utf-8') as fl:
+                for line in fl:
+                    entry = json.loads(line)
+                    recordings[entry['key']].append(entry)
+        except EOFError:
+            logger.warning(f"Cassette {each_path} is truncated, using the complete recordings")  # noqa pylint: disable=C0301,W1203
+    return recordings
+
+
+class RecordingAdapter(BaseAdapter):
+    """Sends requests with an adapter and records them.
+
+    Attributes:
+        adapter (requests.adapters.BaseAdapter): The adapter
+            sending the requests.
+        path (str): The cassette path.
+    """
+
+    def __init__(self, adapter, path):
+        super().__init__()
+        self.adapter = adapter
+        self.path = path
+        start_recording(path)
+
+    def send(self, request, **kwargs):  # noqa pylint: disable=W0221
+        """Sends a request and records the response.
+
+        Args:
+            request (requests.PreparedRequest): The request.
+            **kwargs: Arguments of `HTTPAdapter.send`.
+
+        Returns:
+            requests.Response: The response.
+        """
+        start = time.monotonic()
+        response = self.adapter.send(request, **kwargs)
+        record_response(response, get_writer(self.path), {
+            'key': request_key(request),
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'headers': {name: value for name, value
+                        in response.headers.items()
+                        if name.lower() not in _SKIPPED_HEADERS},
+            'elapsed': time.monotonic() - start,
+        })
+        return response
+
+    def close(self):
+        """Closes the wrapped adapter."""
+        self.adapter.close()
+
+
+class Cassette():  # pylint: disable=R0903
+    """The recordings of a cassette being replayed.
+
+    Loaded once per process and shared by the replay adapters of
+    all sessions, so identical requests sent from different worker
+    sessions advance the same replay position.
+
+    Attributes:
+        path (str): The cassette path.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._recordings = load_cassette(path)
+        self._replayed = collections.Counter()
+
+    def next_recording(self, request):
+        """Returns the next recording of a request.
+
+        Args:
+            request (requests.PreparedRequest): The request.
+
+        Returns:
+            dict: The recording.
+
+        Raises:
+            CassetteMissError: If the request was not recorded.
+        """
+        key = request_key(request)
+        with self._lock:
+            recordings = self._recordings.get(key)
+            if not recordings:
+                raise CassetteMissError(
+                    f"No recording of {request.method} {request.url} "
+                    f"in cassette {self.path}", request=request)
+            index = min(self._replayed[key], len(recordings) - 1)
+            self._replayed[key] += 1
+        return recordings[index]
+
+
+def get_cassette(path):
+    """Returns the cassette of a path, loading it once per process.
+
+    Args:
+        path (str): The cassette path.
+
+    Returns:
+        Cassette: The cassette.
+    """
+    with _cassettes_lock:
+        if path not in _cassettes:
+            _cassettes[path] = Cassette(path)
+        return _cassettes[path]
+
+
+class ReplayAdapter(BaseAdapter):
+    """Serves responses from a cassette without network access.
+
+    Identical requests are answered with their recordings in
+    order, the last recording is reused once they run out.
+
+    Attributes:
+        path (str): The cassette path.
+        latency_scale (float): Factor applied to the recorded
+            latency, 0 disables the delay.
+    """
+
+    def __init__(self, path, latency_scale=0.0):
+        super().__init__()
+        self.path = path
+        self.latency_scale = latency_scale
+        self.cassette = get_cassette(path)
+
+    def send(self, request, **kwargs):  # noqa pylint: disable=W0221,W0613
+        """Replays the recorded response of a request.
+
+        Args:
+            request (requests.PreparedRequest): The request.
+            **kwargs: Arguments of `HTTPAdapter.send`.
+
+        Returns:
+            requests.Response: The recorded response.
+
+        Raises:
+            CassetteMissError: If the request was not recorded.
+        """
+        entry = self.cassette.next_recording(request)
+        if self.latency_scale > 0:
+            time.sleep(entry['elapsed'] * self.latency_scale)
+        return self.build_response(request, entry)
+
+    @staticmethod
+    def build_response(request, entry):
+        """Builds a response from a recording.
+
+        Args:
+            request (requests.PreparedRequest): The request.
+            entry (dict): The recording.
+
+        Returns:
+            requests.Response: The response.
+        """
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = base64.b64decode(entry['body'])  # noqa pylint: disable=W0212
+        response._content_consumed = True  # noqa pylint: disable=W0212
+        response.url = request.url
+        response.request = request
+        response.elapsed = datetime.timedelta(seconds=entry['elapsed'])
+        return response
+
+    def close(self):
+        """Nothing to close."""
+
+
+def mount_cassette(session, adapter, http_config):
+    """Mounts the cassette adapter configured for a session.
+
+    Args:
+        session (requests.Session): The session.
+        adapter (requests.adapters.BaseAdapter): The adapter
+            sending requests over the network.
+        http_config (dict): The [http] settings of
+            backend.properties.
+
+    Returns:
+        requests.adapters.BaseAdapter: The mounted adapter.
+
+    Raises:
+        ValueError: If the cassette mode is unknown.
+    """
+    mode = (http_config['CASSETTE_MODE'] or 'off').lower()
+    if mode not in CASSETTE_MODES:
+        raise ValueError(f"Unknown cassette mode {mode}, "
+                         f"expected one of {CASSETTE_MODES}")
+    path = http_config['CASSETTE_FILE']
+    if mode == 'record':
+        adapter = RecordingAdapter(adapter, path)
+    elif mode == 'replay':
+        adapter = ReplayAdapter(path, http_config['CASSETTE_LATENCY_SCALE'])
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return adapter
@@ -25,9 +25,11 @@ entity types and allows exporting API proxy bundles.
 """
 
 import os
+from urllib.parse import urlsplit
 from requests.utils import quote as urlencode  # pylint: disable=E0401
 from base_logger import logger
 from rest import RestClient
+from utils import paginate
 
 
 class ApigeeClassic():
@@ -40,18 +42,28 @@ class ApigeeClassic():
     and allows exporting API proxy bundles.
     """
 
-    def __init__(self, baseurl, org, token, auth_type, ssl_verify):  # noqa pylint: disable=R0913,R0917
+    def __init__(self, baseurl, org, token, auth_type, ssl_verify,  # noqa pylint: disable=R0913,R0917
+                 cache_dir=None, bundle_store=None):
         self.baseurl = baseurl
         self.org = org
         self.token = token
         self.auth_type = auth_type
-        self.client = RestClient(self.auth_type, token, ssl_verify)
+        self.client = RestClient(self.auth_type, token, ssl_verify,
+                                 cache_dir=cache_dir)
+        self.bundle_store = bundle_store
+        self.bundle_org = f"{urlsplit(baseurl).netloc}/{org}"
         self.requires_pagination = ['apis', 'apps', 'developers',
                                     'apiproducts']
-        self.can_expand = {
-            'apps': {'expand_key': 'app', 'id': 'appId'},
-            'developers': {'expand_key': 'developer', 'id': 'email'},
-            'apiproducts': {'expand_key': 'apiProduct', 'id': 'name'}
+        # Per resource type capabilities of the Management API:
+        # expand_key/id locate objects in expanded listings, bulk
+        # marks listings returning full objects with expand=true.
+        # Other types are fetched one GET per object.
+        self.capabilities = {
+            'apps': {'expand_key': 'app', 'id': 'appId', 'bulk': True},
+            'developers': {'expand_key': 'developer', 'id': 'email',
+                           'bulk': True},
+            'apiproducts': {'expand_key': 'apiProduct', 'id': 'name',
+                            'bulk': True},
         }
 
     def get_org(self):
@@ -92,36 +104,24 @@ class ApigeeClassic():
         if org_object in self.requires_pagination:
             start_url = (f"{self.baseurl}/organizations/{self.org}/"
                          f"{org_object}?count={object_count}")
-            each_org_object = self.client.get(start_url)
-            org_objects.extend(each_org_object)
-            while len(each_org_object) > 0:
-                start_key = each_org_object[-1]
-                params = {'startKey': start_key}
+
+            def fetch(start_key):
+                params = None if start_key is None else {'startKey': start_key}
                 each_org_object = self.client.get(start_url, params=params)
                 # Capture the type of the response for diagnostic purposes.
                 logger.debug(f"For '{org_object}' paginated API call, "
                              f"received {type(each_org_object)}.")
-
-                # Safely handle the API response
                 if isinstance(each_org_object, list):
-                    if start_key in each_org_object:
-                        logger.debug(f"Successfully received next page for "
-                                     f"'{org_object}'; removing start_key.")
-                        each_org_object.remove(start_key)
-                    else:
-                        # This is the final page or an unexpected list,
-                        # which is a valid state.
-                        logger.debug(f"Received final page or non-overlapping "
-                                     f"list for '{org_object}'.")
-                else:
-                    # This handles the customer's error case
-                    logger.error(f"For '{org_object}' paginated API call, "
-                                 f"expected a list but received "
-                                 f"{type(each_org_object)} with value: "
-                                 f"{each_org_object}")
-                    # We must clear the list to break the while loop
-                    each_org_object = []
-                org_objects.extend(each_org_object)
+                    return each_org_object
+                # This handles the customer's error case
+                logger.error(f"For '{org_object}' paginated API call, "
+                             f"expected a list but received "
+                             f"{type(each_org_object)} with value: "
+                             f"{each_org_object}")
+                return []
+
+            for page in paginate(fetch, lambda name: name):
+                org_objects.extend(page)
         else:
             url = f"{self.baseurl}/organizations/{self.org}/{org_object}"
             org_objects = self.client.get(url)
@@ -140,25 +140,31 @@ class ApigeeClassic():
             dict: A dictionary of organization objects,
                     keyed by their ID, with expanded details.
         """
-        org_objects = {}
+        id_key = self.capabilities.get(org_object).get('id')
+        return {each_item[id_key]: each_item
+                for page in self.iter_org_objects_expand(org_object)
+                for each_item in page}
+
+    def iter_org_objects_expand(self, org_object):
+        """Streams organization-level objects with expanded details.
+
+        Args:
+            org_object (str): The type of organization object to list
+                            (e.g., 'apps', 'developers', 'apiproducts').
+
+        Yields:
+            list: The expanded objects of each page.
+        """
         object_count = int(os.getenv('PAGE_SIZE', '100'))
-        expand_key = self.can_expand.get(org_object).get('expand_key')
-        id_key = self.can_expand.get(org_object).get('id')
+        expand_key = self.capabilities.get(org_object).get('expand_key')
+        id_key = self.capabilities.get(org_object).get('id')
         start_url = f"{self.baseurl}/organizations/{self.org}/{org_object}?count={object_count}&expand=true"  # noqa pylint: disable=C0301
-        each_org_object = self.client.get(start_url)
-        each_org_object = each_org_object.get(expand_key, {})
-        for each_item in each_org_object:
-            org_objects[each_item[id_key]] = each_item
-        while len(each_org_object) > 0:
-            start_key = each_org_object[-1].get(id_key)
-            params = {'startKey': start_key}
-            each_org_object = self.client.get(start_url, params=params)
-            each_org_object = each_org_object.get(expand_key, {})
-            if each_org_object:
-                each_org_object.pop(0)
-            for each_item in each_org_object:
-                org_objects[each_item[id_key]] = each_item
-        return org_objects
+
+        def fetch(start_key):
+            params = None if start_key is None else {'startKey': start_key}
+            return self.client.get(start_url, params=params).get(expand_key, [])  # noqa pylint: disable=C0301
+
+        yield from paginate(fetch, lambda item: item.get(id_key))
 
     def get_org_object(self, org_object, org_object_name):
         """Retrieves details of a specific organization-level object.
@@ -266,6 +272,44 @@ class ApigeeClassic():
         apis = self.client.get(url)
         return apis
 
+    def list_apis_metadata(self, api_type):
+        """Lists APIs or Sharedflows with their revisions and metadata.
+
+        Uses one paginated listing with `includeRevisions` and
+        `includeMetaData` instead of one revisions call per API.
+
+        Args:
+            api_type (str): The type of API - 'apis' or 'sharedflows'.
+
+        Returns:
+            dict: The revision numbers (`revision`) and `lastModifiedAt`
+                of each API or Sharedflow keyed by name, or None if
+                the Management API only lists the names.
+        """
+        object_count = int(os.getenv('PAGE_SIZE', '100'))
+        start_url = f"{self.baseurl}/organizations/{self.org}/{api_type}"
+        params = {'includeRevisions': 'true', 'includeMetaData': 'true',
+                  'count': object_count}
+
+        def fetch(start_key):
+            page_params = dict(params)
+            if start_key is not None:
+                page_params['startKey'] = start_key
+            apis = self.client.get(start_url, params=page_params)
+            return apis if isinstance(apis, list) else []
+
+        metadata = {}
+        for page in paginate(fetch, lambda api: api.get('name')
+                             if isinstance(api, dict) else api):
+            for api in page:
+                if not isinstance(api, dict):
+                    return None
+                metadata[api['name']] = {
+                    'revision': api.get('revision', []),
+                    'lastModifiedAt': api.get('metaData', {}).get(
+                        'lastModifiedAt')}
+        return metadata
+
     def list_api_revisions(self, api_type, api_name):
         """Lists revisions of a specific API or Sharedflow.
 
@@ -309,7 +353,33 @@ class ApigeeClassic():
         apis_list = [api["name"] for api in deployments["aPIProxy"]]
         return apis_list
 
-    def fetch_api_revision(self, api_type, api_name, revision, export_dir):
+    def deployment_snapshot(self, api_type, envs):
+        """Retrieves the deployed revisions of all APIs or Sharedflows.
+
+        Uses one deployments call per environment instead of one
+        per API or Sharedflow.
+
+        Args:
+            api_type (str): The type of API - 'apis' or 'sharedflows'.
+            envs (list): The environment names.
+
+        Returns:
+            dict: The deployed revision numbers, keyed by environment
+                and API or Sharedflow name.
+        """
+        params = {'sharedFlows': 'true'} if api_type == 'sharedflows' else None  # noqa pylint: disable=C0301
+        snapshot = {}
+        for env in envs:
+            url = f"{self.baseurl}/organizations/{self.org}/environments/{env}/deployments"  # noqa
+            deployments = self.client.get(url, params=params)
+            snapshot[env] = {
+                api['name']: [revision['name']
+                              for revision in api.get('revision', [])]
+                for api in (deployments or {}).get('aPIProxy', [])}
+        return snapshot
+
+    def fetch_api_revision(self, api_type, api_name, revision, export_dir,  # noqa pylint: disable=R0913,R0917
+                           refresh=False):
         """Downloads the bundle for a specific API or Sharedflow revision.
 
         Args:
@@ -317,22 +387,27 @@ class ApigeeClassic():
             api_name (str): The name of the API or Sharedflow.
             revision (str): The revision number.
             export_dir (str): The directory to save the bundle to.
-        """
-        url = f"{self.baseurl}/organizations/{self.org}/{api_type}/{api_name}/revisions/{revision}?format=bundle"  # noqa pylint: disable=C0301
-        bundle = self.client.file_get(url)
-        self.write_proxy_bundle(export_dir, api_name, bundle)
+            refresh (bool): Download the bundle even if it is in the
+                bundle store, e.g. after the revision was updated.
 
-    def write_proxy_bundle(self, export_dir, file_name, data):
-        """Writes a proxy bundle to a file.
-
-        Args:
-            export_dir (str): The directory to write the file to.
-            file_name (str): The name of the file.
-            data (bytes): The bundle data.
+        Returns:
+            dict: The SHA-256 digest and size of the bundle.
+                Revisions already in the bundle store are copied
+                from it instead of downloaded.
         """
-        file_path = f"./{export_dir}/{file_name}.zip"
-        with open(file_path, 'wb') as fl:
-            fl.write(data)
+        file_path = f"./{export_dir}/{api_name}.zip"
+        bundle_key = (self.bundle_org, api_type, api_name, revision)
+        if self.bundle_store is not None and not refresh:
+            stored = self.bundle_store.get(*bundle_key, file_path)
+            if stored is not None:
+                return stored
+        url = f"{self.baseurl}/organizations/{self.org}/{api_type}/{api_name}/revisions/{revision}?format=bundle"  # noqa pylint: disable=C0301
+        # The bundle store keeps bundles, the HTTP cache need not
+        result = self.client.file_download(
+            url, file_path, use_cache=self.bundle_store is None)
+        if self.bundle_store is not None:
+            self.bundle_store.put(*bundle_key, file_path, result['sha256'])
+        return result
 
     def fetch_proxy(self, arg_tuple):
         """Fetches the latest revision of an API proxy bundle.
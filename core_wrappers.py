@@ -28,6 +28,7 @@ Key Functions:
 
 - `pre_validation_checks`: Performs checks on the input configuration.
 - `export_artifacts`: Exports artifacts from the source Apigee instance.
+- `load_export_data`: Loads the export data of a completed export.
 - `validate_artifacts`: Validates the exported artifacts against the
                         target environment.
 - `visualize_artifacts`: Creates a visual representation of the
@@ -51,6 +52,7 @@ from pyvis.network import Network  # pylint: disable=E0401
 import sharding
 from base_logger import logger
 from classic import ApigeeClassic
+from export_store import ExportData, ExportStore
 from exporter import ApigeeExporter
 from nextgen import ApigeeNewGen
 from qualification_report import QualificationReport
@@ -180,6 +182,52 @@ def pre_validation_checks(cfg, skip_target_validation=False):  # noqa pylint: di
     return True
 
 
+def export_file_options(backend_cfg):
+    """Returns the options export data files are written with.
+
+    Args:
+        backend_cfg (configparser.ConfigParser): The parsed
+                                        backend.properties.
+
+    Returns:
+        dict: The `compact` and `compression` arguments of
+                `write_json`.
+    """
+    return {
+        "compact": backend_cfg.getboolean(
+            "export", "EXPORT_FILE_COMPACT", fallback=False),
+        "compression": backend_cfg.get(
+            "export", "EXPORT_FILE_COMPRESSION", fallback="") or None,
+    }
+
+
+def load_baseline(cfg, backend_cfg):
+    """Loads the export data of a previous run.
+
+    The baseline is the export directory of a previous run, set
+    with `BASELINE_EXPORT_DIR` in input.properties.
+
+    Args:
+        cfg (configparser.ConfigParser): The parsed configuration from
+                                        input.properties.
+        backend_cfg (configparser.ConfigParser): The parsed
+                                        backend.properties.
+
+    Returns:
+        tuple: The baseline export directory and export data, or
+                (None, None) if no complete baseline is set.
+    """
+    baseline_dir = cfg.get("inputs", "BASELINE_EXPORT_DIR", fallback="")
+    if not baseline_dir:
+        return None, None
+    baseline = parse_json(
+        f"{baseline_dir}/{backend_cfg.get('export', 'EXPORT_FILE')}")
+    if not baseline.get("export", False):
+        logger.warning(f"No complete export found in {baseline_dir}, exporting all objects")  # noqa pylint: disable=W1203
+        return None, None
+    return baseline_dir, baseline
+
+
 def export_artifacts(cfg, resources_list): # noqa pylint: disable=R0914
     """Exports artifacts from the source Apigee environment.
 
@@ -195,7 +243,8 @@ def export_artifacts(cfg, resources_list): # noqa pylint: disable=R0914
         resources_list (list): A list of resource types to export.
 
     Returns:
-        dict: A dictionary containing the exported artifact data.
+        ExportData: The exported artifact data, paged in from disk
+                under the `EXPORT_MEMORY_BUDGET_MB` memory budget.
     """
     logger.info("------------------- EXPORT -----------------------")
     backend_cfg = parse_config("backend.properties")
@@ -213,28 +262,106 @@ def export_artifacts(cfg, resources_list): # noqa pylint: disable=R0914
     sf_export_dir = f"{export_dir}/sharedflows"
     create_dir(api_export_dir)
     create_dir(sf_export_dir)
+    cache_dir = f"{target_dir}/{backend_cfg.get('http', 'HTTP_CACHE_DIR', fallback='http_cache')}"  # noqa pylint: disable=C0301
+    bundle_store_dir = f"{target_dir}/{backend_cfg.get('export', 'BUNDLE_STORE_DIR', fallback='bundle_store')}"  # noqa pylint: disable=C0301
+    journal_dir = f"{target_dir}/{backend_cfg.get('export', 'JOURNAL_DIR', fallback='export_journal')}"  # noqa pylint: disable=C0301
+    baseline_dir, baseline = load_baseline(cfg, backend_cfg)
     apigee_export = ApigeeExporter(
         source_url, source_org, source_auth_token,
-        source_auth_type, ssl_verification
+        source_auth_type, ssl_verification, cache_dir=cache_dir,
+        bundle_store_dir=bundle_store_dir,
+        workers=backend_cfg.getint('export', 'EXPORT_WORKERS', fallback=10),
+        deployment_snapshot=backend_cfg.getboolean(
+            'export', 'DEPLOYMENT_SNAPSHOT', fallback=True),
+        journal_dir=journal_dir,
+        resume=os.environ.get("RESUME_EXPORT") == "true",
+        baseline=baseline, baseline_dir=baseline_dir
     )
     if os.environ.get("IGNORE_EXPORT") == "true":
+        lazy = backend_cfg.getboolean(
+            "export", "LAZY_EXPORT_STATE", fallback=True)
         export_data = {}
         export_data["orgConfig"] = apigee_export.read_export_state(
-            os.path.join(export_dir, "orgConfig")
+            os.path.join(export_dir, "orgConfig"), lazy=lazy
         )  # noqa pylint: disable=C0301
         export_data["envConfig"] = apigee_export.read_export_state(
-            os.path.join(export_dir, "envConfig")
+            os.path.join(export_dir, "envConfig"), lazy=lazy
         )  # noqa pylint: disable=C0301
     else:
         export_data = apigee_export.get_export_data(resources_list, export_dir)
         logger.debug(export_data)
         apigee_export.create_export_state(export_dir)
-    proxy_dependency_map = sharding.proxy_dependency_map(cfg, export_data)
-    export_data["proxy_dependency_map"] = proxy_dependency_map
-    if not os.environ.get("IGNORE_ENV_SHARD") == "true":
+    return _export_data_view(cfg, backend_cfg, export_dir, export_data,
+                             baseline=baseline)
+
+
+def load_export_data(cfg, backend_cfg):
+    """Loads the export data of a completed export.
+
+    The organization and environment configurations are read
+    lazily from the packed export store rather than decoded from
+    the export data file. The proxy dependency map and sharding
+    output are restored from the pages of the previous run, and
+    only derived again if it did not store them.
+
+    Args:
+        cfg (configparser.ConfigParser): The parsed configuration from
+                                        input.properties.
+        backend_cfg (configparser.ConfigParser): The parsed
+                                        backend.properties.
+
+    Returns:
+        ExportData: The export data, or None if the export
+                directory holds no export store.
+    """
+    target_dir = cfg.get("inputs", "TARGET_DIR")
+    export_dir = f"{target_dir}/{backend_cfg.get('export', 'EXPORT_DIR')}"
+    if not ExportStore.exists(export_dir):
+        return None
+    store = ExportStore(export_dir)
+    export_data = {"orgConfig": store.read("orgConfig"),
+                   "envConfig": store.read("envConfig")}
+    return _export_data_view(cfg, backend_cfg, export_dir, export_data,
+                             resume=True)
+
+
+def _export_data_view(cfg, backend_cfg, export_dir, export_data,  # noqa pylint: disable=R0913,R0917
+                      baseline=None, resume=False):
+    """Pages the export data in from disk and adds the sharding data.
+
+    Args:
+        cfg (configparser.ConfigParser): The parsed configuration from
+                                        input.properties.
+        backend_cfg (configparser.ConfigParser): The parsed
+                                        backend.properties.
+        export_dir (str): The export directory.
+        export_data (dict): The organization and environment
+                                        configurations.
+        baseline (dict, optional): The export data of a previous run.
+        resume (bool): Restore the sharding data of the run being
+                                        resumed where it was stored.
+
+    Returns:
+        ExportData: The export data.
+    """
+    export_data = ExportData(
+        export_dir, export_data,
+        memory_budget=backend_cfg.getint(
+            "export", "EXPORT_MEMORY_BUDGET_MB", fallback=256) * 1024 * 1024,
+        resume=resume)
+    if export_data.restore("proxy_dependency_map"):
+        proxy_dependency_map = export_data["proxy_dependency_map"]
+    else:
+        proxy_dependency_map = sharding.proxy_dependency_map(
+            cfg, export_data, baseline=baseline)
+        export_data["proxy_dependency_map"] = proxy_dependency_map
+    if (not os.environ.get("IGNORE_ENV_SHARD") == "true" and
+            not export_data.restore("sharding_output")):
         sharding_output = sharding.sharding_wrapper(
             proxy_dependency_map, export_data)
         export_data["sharding_output"] = sharding_output
+    # A resumed run restores the pages written so far
+    export_data.close()
     return export_data
 
 
@@ -267,6 +394,7 @@ def validate_artifacts(
     target_export_data_file = f"{target_export_dir}/export_data.json"
     api_export_dir = f"{target_export_dir}/apis"
     sf_export_dir = f"{target_export_dir}/sharedflows"
+    bundle_store_dir = f"{target_dir}/{backend_cfg.get('export', 'BUNDLE_STORE_DIR', fallback='bundle_store')}"  # noqa pylint: disable=C0301
     create_dir(api_export_dir)
     create_dir(sf_export_dir)
 
@@ -311,13 +439,24 @@ def validate_artifacts(
     target_export_data = parse_json(target_export_data_file)
     if target_compare and (not target_export_data.get("export", False)):
         apigee_export = ApigeeExporter(
-            target_url, gcp_project_id, gcp_token, "oauth", ssl_verification
+            target_url, gcp_project_id, gcp_token, "oauth", ssl_verification,
+            bundle_store_dir=bundle_store_dir,
+            workers=backend_cfg.getint(
+                "export", "EXPORT_WORKERS", fallback=10),
+            deployment_snapshot=backend_cfg.getboolean(
+                "export", "DEPLOYMENT_SNAPSHOT", fallback=True)
         )
         target_export_data = apigee_export.get_export_data(
             target_resource_list, target_export_dir
         )  # noqa pylint: disable=C0301
         target_export_data["export"] = True
-        write_json(target_export_data_file, target_export_data)
+        write_json(target_export_data_file, target_export_data,
+                   **export_file_options(backend_cfg))
+    _, baseline = load_baseline(cfg, backend_cfg)
+    baseline_report = (baseline or {}).get("validation_report")
+    if target_compare:
+        # Target objects may have changed since the baseline.
+        baseline_report = None
     apigee_validator = ApigeeValidator(
         target_url,
         gcp_project_id,
@@ -377,8 +516,9 @@ def validate_artifacts(
         apis = (
             export_data.get("orgConfig", {}).get("apis", {}).keys()
         )  # noqa pylint: disable=C0301
-        apis_validation = apigee_validator.validate_proxy_bundles(
-            apis, export_dir, target_export_dir, "apis"
+        apis_validation = validate_changed_bundles(
+            apigee_validator, export_data, baseline_report, apis,
+            export_dir, target_export_dir, "apis"
         )  # noqa pylint: disable=C0301
         # Todo  # pylint: disable=W0511
         # validate proxy unifier output bundles
@@ -387,8 +527,9 @@ def validate_artifacts(
         sharedflows = (
             export_data.get("orgConfig", {}).get("sharedflows", {}).keys()
         )  # noqa pylint: disable=C0301
-        sf_validation = apigee_validator.validate_proxy_bundles(
-            sharedflows, export_dir, target_export_dir, "sharedflows"
+        sf_validation = validate_changed_bundles(
+            apigee_validator, export_data, baseline_report, sharedflows,
+            export_dir, target_export_dir, "sharedflows"
         )  # noqa pylint: disable=C0301
         # Todo  # pylint: disable=W0511
         # validate proxy unifier output bundles
@@ -396,6 +537,44 @@ def validate_artifacts(
     return report
 
 
+def validate_changed_bundles(apigee_validator, export_data, baseline_report,  # noqa pylint: disable=R0913,R0917
+                             apis, export_dir, target_export_dir, api_type):
+    """Validates the bundles changed since the baseline.
+
+    Validation results of bundles unchanged since the baseline are
+    reused from the baseline report, all bundles are validated
+    without a baseline.
+
+    Args:
+        apigee_validator (ApigeeValidator): The validator.
+        export_data (dict): The exported artifact data.
+        baseline_report (dict): The validation report of the
+                                baseline, or None.
+        apis (list): The API or Sharedflow names.
+        export_dir (str): The export directory.
+        target_export_dir (str): The target export directory.
+        api_type (str): 'apis' or 'sharedflows'.
+
+    Returns:
+        dict: The validation results, keyed by `api_type`.
+    """
+    changes = export_data.get("changes", {}).get(api_type)
+    previous = {each["name"]: each
+                for each in (baseline_report or {}).get(api_type, [])}
+    if changes is None or not previous:
+        return apigee_validator.validate_proxy_bundles(
+            apis, export_dir, target_export_dir, api_type)
+    changed = set(changes)
+    apis = list(apis)
+    validation = apigee_validator.validate_proxy_bundles(
+        [api for api in apis if api in changed or api not in previous],
+        export_dir, target_export_dir, api_type)
+    validated = {each["name"]: each for each in validation[api_type]}
+    logger.info(f"Reusing the baseline validation of {len(apis) - len(validated)} {api_type}")  # noqa pylint: disable=W1203
+    return {api_type: [validated.get(api, previous.get(api))
+                       for api in apis]}
+
+
 def visualize_artifacts(
     cfg, export_data, report
 ):  # noqa pylint: disable=R0914,R0912,R0915
@@ -686,6 +865,7 @@ def qualification_report(cfg, backend_cfg, export_data, topology_mapping):
     qualification_report_obj.sharded_proxies()
     qualification_report_obj.report_org_resourcefiles()
     qualification_report_obj.validation_report()
+    qualification_report_obj.report_failed_objects()
     qualification_report_obj.qualification_report_summary()
 
     qualification_report_obj.reverse_sheets()
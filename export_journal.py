@@ -0,0 +1,195 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Append-only journal of exported objects.
+
+Every completed per-object fetch appends one JSON line to
+`export_journal.jsonl` with the resource type, the object key, a
+status (`ok` or `failed`) and, for completed objects, the object data
+and its SHA-256. The journal only holds the byte offsets of completed
+objects in memory and reads their data back from the file.
+
+When an export is resumed, objects journaled as `ok` whose data is
+intact are read back instead of fetched again; missing, failed or
+corrupted objects are fetched. Later lines win, so an object that
+failed and later succeeded is considered completed.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import json_codec
+from base_logger import logger
+
+JOURNAL_FILE = 'export_journal.jsonl'
+
+
+def _line_prefix(resource_type, key, sha256):
+    """Returns the bytes of a completed object line before its data."""
+    header = json.dumps({'type': resource_type, 'key': key,
+                         'sha256': sha256, 'status': 'ok'})
+    return f'{header[:-1]}, "data": '.encode('utf-8')
+
+
+class ExportJournal():  # pylint: disable=R0902
+    """A per-object export journal.
+
+    Attributes:
+        directory (str): The journal directory.
+        resumed (int): Objects read back from the journal.
+        recorded (int): Objects journaled in this run.
+        failed (int): Failures journaled in this run.
+    """
+
+    def __init__(self, directory, resume=False):
+        self.directory = directory
+        self.resumed = 0
+        self.recorded = 0
+        self.failed = 0
+        # (type, key) -> (sha256, data offset, data length)
+        self._completed = {}
+        self._lock = threading.Lock()
+        self._writer = None
+        self.path = os.path.join(directory, JOURNAL_FILE)
+        os.makedirs(directory, exist_ok=True)
+        if resume:
+            self._load()
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _load(self):
+        try:
+            fl = open(self.path, 'r+b')  # noqa pylint: disable=R1732
+        except OSError:
+            return
+        offset = 0
+        with fl:
+            for line in fl:
+                if not line.endswith(b'\n'):
+                    # Drop a line torn by a crash, new lines follow it
+                    fl.truncate(offset)
+                    break
+                self._load_line(line, offset)
+                offset += len(line)
+        logger.info(f"Resuming export, {len(self._completed)} objects already exported")  # noqa pylint: disable=W1203
+
+    def _load_line(self, line, offset):
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return
+        key = (entry['type'], entry['key'])
+        if entry['status'] != 'ok':
+            self._completed.pop(key, None)
+            return
+        prefix = _line_prefix(entry['type'], entry['key'], entry['sha256'])
+        if not line.startswith(prefix) or not line.endswith(b'}\n'):
+            return
+        self._completed[key] = (entry['sha256'], offset + len(prefix),
+                                len(line) - len(prefix) - 2)
+
+    def _append(self, line):
+        """Appends a line and returns its offset in the journal."""
+        with self._lock:
+            if self._writer is None:
+                # Unbuffered, so a crash loses at most a torn line
+                self._writer = open(self.path, 'ab', buffering=0)  # noqa pylint: disable=R1732
+            offset = self._writer.seek(0, os.SEEK_END)
+            self._writer.write(line)
+            return offset
+
+    def get(self, resource_type, key):
+        """Returns the data of a completed object.
+
+        Args:
+            resource_type (str): The resource type,
+                e.g. `envConfig/test/targetServers`.
+            key (str): The object key.
+
+        Returns:
+            The object data, or None if the object was not
+                completed or its data failed the integrity check.
+        """
+        completed = self._completed.get((resource_type, key))
+        if completed is None:
+            return None
+        sha256, offset, length = completed
+        try:
+            with open(self.path, 'rb') as fl:
+                fl.seek(offset)
+                data = fl.read(length)
+        except OSError:
+            return None
+        if hashlib.sha256(data).hexdigest() != sha256:
+            logger.warning(f"Journaled {resource_type} {key} is corrupted, exporting it again")  # noqa pylint: disable=W1203
+            return None
+        with self._lock:
+            self.resumed += 1
+        return json_codec.loads(data)
+
+    def record(self, resource_type, key, data):
+        """Journals a completed object.
+
+        Args:
+            resource_type (str): The resource type.
+            key (str): The object key.
+            data: The JSON serializable object data.
+
+        Returns:
+            str: The SHA-256 of the journaled data.
+        """
+        content = json_codec.dumps(data)
+        sha256 = hashlib.sha256(content).hexdigest()
+        prefix = _line_prefix(resource_type, key, sha256)
+        offset = self._append(prefix + content + b'}\n')
+        with self._lock:
+            self._completed[(resource_type, key)] = (
+                sha256, offset + len(prefix), len(content))
+            self.recorded += 1
+        return sha256
+
+    def record_failure(self, resource_type, key, error):
+        """Journals a failed object, fetched again on resume.
+
+        Args:
+            resource_type (str): The resource type.
+            key (str): The object key.
+            error (Exception): The error.
+        """
+        entry = {'type': resource_type, 'key': key, 'sha256': None,
+                 'status': 'failed', 'error': str(error)}
+        self._append(json.dumps(entry).encode('utf-8') + b'\n')
+        with self._lock:
+            self._completed.pop((resource_type, key), None)
+            self.failed += 1
+
+    def stats(self):
+        """Returns the journal usage.
+
+        Returns:
+            dict: Resumed, recorded and failed objects.
+        """
+        with self._lock:
+            return {'resumed': self.resumed, 'recorded': self.recorded,
+                    'failed': self.failed}
+
+    def close(self):
+        """Closes the journal file, reopened by the next record."""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
@@ -0,0 +1,728 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Packed on-disk store of exported objects.
+
+The export state is kept in a single segment file,
+`<export_dir>/export_state.jsonl`, with one compact JSON record per
+object: `[section, name, data]`, where the section is the path of
+the object in the export data, e.g. `orgConfig/apps` or
+`envConfig/test/targetServers`. A record without a name clears its
+section. Records are only appended, the latest record of an object
+wins.
+
+`export_state.idx` maps every object to the offset and length of
+its record, so objects are read with one seek, and sections are
+scanned in file order. The index is rewritten on `close`; a
+missing or stale index is rebuilt by scanning the segment file.
+
+`close` also writes `export_state.manifest.json`, listing the size
+and SHA-256 of the segment file and the object count, size and
+SHA-256 of every section. Sections are verified against it before
+they are read. They are either read back lazily, so large
+populations (apps, developers) never have to be held in memory at
+once, or decoded in parallel into dicts.
+
+`ExportData` holds the export data of a run on top of the store:
+sections are paged in on access and evicted from an LRU cache
+bounded by a memory budget.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import collections.abc
+import json_codec
+from atomic_file import FILE_MODE
+from base_logger import logger
+from utils import fan_out
+
+STATE_FILE = 'export_state.jsonl'
+INDEX_FILE = 'export_state.idx'
+MANIFEST_FILE = 'export_state.manifest.json'
+PAGES_DIR = 'export_data_pages'
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+# The nesting depth of the store sections of a configuration
+VIEW_DEPTHS = {'orgConfig': 1, 'envConfig': 2}
+
+
+class ExportSection(collections.abc.Mapping):
+    """A lazily loaded section of the export data.
+
+    Behaves like a read-only dict of object name to object data.
+    Only the names are kept in memory, the data is read from the
+    store on every access, or from the page cache of the store if
+    it has one.
+
+    Attributes:
+        store (ExportStore): The store of the section.
+        key (str): The section path, e.g. `orgConfig/apps`.
+    """
+
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+
+    def put(self, name, data):
+        """Writes an object of the section.
+
+        Args:
+            name (str): The object name.
+            data: The JSON serializable object data.
+        """
+        self.store.put(self.key, name, data)
+
+    def load(self):
+        """Reads the whole section.
+
+        Returns:
+            dict: The objects of the section keyed by name.
+        """
+        return self.store.load(self.key)
+
+    def clear(self):
+        """Removes all objects of the section."""
+        self.store.clear(self.key)
+
+    def scan(self):
+        """Reads all objects of the section in file order.
+
+        Yields:
+            tuple: The name and data of each object.
+        """
+        page = self.store.page(self.key)
+        if page is not None:
+            return iter(page.items())
+        return self.store.scan(self.key)
+
+    def __getitem__(self, name):
+        page = self.store.page(self.key)
+        if page is not None:
+            return page[name]
+        self.store.verify(self.key)
+        return self.store.get(self.key, name)
+
+    def __contains__(self, name):
+        return name in self.store.names(self.key)
+
+    def __iter__(self):
+        return iter(list(self.store.names(self.key)))
+
+    def __len__(self):
+        return len(self.store.names(self.key))
+
+    def __repr__(self):
+        return f'ExportSection({self.key!r}, {len(self)} objects)'
+
+
+class PageCache():
+    """An LRU cache of decoded sections under a memory budget.
+
+    The size of a section is the size of its records, i.e. of its
+    compact JSON encoding. Sections larger than the budget are not
+    cached. Cached sections are shared, they must not be modified.
+
+    Attributes:
+        budget (int): The memory budget in bytes.
+        size (int): The size of the cached sections.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.size = 0
+        self._pages = collections.OrderedDict()
+        self._oversized = set()
+        self._lock = threading.Lock()
+
+    def get(self, store, key):
+        """Returns a section, paging it in if needed.
+
+        Args:
+            store (ExportStore): The store of the section.
+            key (str): The section path.
+
+        Returns:
+            dict: The objects of the section keyed by name, or None
+                if the section is larger than the budget.
+
+        Raises:
+            ValueError: If the section does not match its checksum.
+        """
+        page_key = (store.path, key)
+        with self._lock:
+            page = self._pages.get(page_key)
+            if page is not None:
+                self._pages.move_to_end(page_key)
+                return page[0]
+            if page_key in self._oversized:
+                return None
+        size = sum(entry[1] for entry in store.names(key).values())
+        if size > self.budget:
+            with self._lock:
+                self._oversized.add(page_key)
+            return None
+        objects = store.load(key)
+        with self._lock:
+            if page_key not in self._pages:
+                self.size += size
+            self._pages[page_key] = (objects, size)
+            while self.size > self.budget:
+                _, (_, evicted) = self._pages.popitem(last=False)
+                self.size -= evicted
+        return objects
+
+    def discard(self, store, key):
+        """Drops a section, e.g. after it was written.
+
+        Args:
+            store (ExportStore): The store of the section.
+            key (str): The section path.
+        """
+        page_key = (store.path, key)
+        with self._lock:
+            self._oversized.discard(page_key)
+            page = self._pages.pop(page_key, None)
+            if page is not None:
+                self.size -= page[1]
+
+
+class ExportStore():
+    """The packed on-disk store of an export.
+
+    Attributes:
+        export_dir (str): The export directory.
+        path (str): The segment file.
+        pages (PageCache): The cache sections are read through,
+            None to read objects from the segment file on every
+            access.
+    """
+
+    def __init__(self, export_dir):
+        self.export_dir = export_dir
+        self.path = os.path.join(export_dir, STATE_FILE)
+        self.pages = None
+        self._index = {}
+        self._size = 0
+        self._live = 0
+        self._writer = None
+        self._reader = None
+        self._manifest = None
+        self._verified = set()
+        self._lock = threading.Lock()
+        os.makedirs(export_dir, exist_ok=True)
+        if os.path.exists(self.path):
+            self._load()
+            self._load_manifest()
+
+    def __getstate__(self):
+        self._flush()
+        state = self.__dict__.copy()
+        for name in ('_lock', '_writer', '_reader'):
+            del state[name]
+        state['pages'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._writer = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def exists(export_dir):
+        """Returns whether a directory holds a packed export state.
+
+        Args:
+            export_dir (str): The export directory.
+
+        Returns:
+            bool: True if the segment file exists.
+        """
+        return os.path.exists(os.path.join(export_dir, STATE_FILE))
+
+    def _load(self):
+        size = os.path.getsize(self.path)
+        try:
+            with open(os.path.join(self.export_dir, INDEX_FILE),
+                      encoding='utf-8') as fl:
+                index = json.load(fl)
+        except (OSError, ValueError):
+            index = {}
+        if index.get('size') == size:
+            self._index = {key: {name: tuple(entry)
+                                 for name, entry in entries.items()}
+                           for key, entries in index['sections'].items()}
+            self._size = size
+            self._live = sum(entry[1] for entries in self._index.values()
+                             for entry in entries.values())
+            return
+        logger.info(f"Rebuilding the index of {self.path}")  # noqa pylint: disable=W1203
+        offset = 0
+        with open(self.path, 'rb') as fl:
+            for line in fl:
+                try:
+                    key, name, _ = json_codec.loads(line)
+                except ValueError:
+                    # A record torn by a crash while it was written
+                    break
+                self._index_record(key, name, offset, len(line))
+                offset += len(line)
+        self._size = offset
+        if offset != size:
+            with open(self.path, 'r+b') as fl:
+                fl.truncate(offset)
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.export_dir, MANIFEST_FILE),
+                      encoding='utf-8') as fl:
+                manifest = json.load(fl)
+        except (OSError, ValueError):
+            return
+        if manifest['files'][STATE_FILE]['size'] != self._size:
+            logger.debug(f"Ignoring the stale manifest of {self.path}")  # noqa pylint: disable=W1203
+            return
+        self._manifest = manifest
+
+    def _index_record(self, key, name, offset, length):
+        entries = self._index.setdefault(key, {})
+        if name is None:
+            self._live -= sum(entry[1] for entry in entries.values())
+            entries.clear()
+            return
+        previous = entries.pop(name, None)
+        if previous is not None:
+            self._live -= previous[1]
+        entries[name] = (offset, length)
+        self._live += length
+
+    def _append(self, key, name, data):
+        record = json_codec.dumps([key, name, data]) + b'\n'
+        with self._lock:
+            if self._writer is None:
+                self._writer = open(self.path, 'ab')  # noqa pylint: disable=R1732
+            self._writer.write(record)
+            self._index_record(key, name, self._size, len(record))
+            self._size += len(record)
+            # The manifest no longer describes the store
+            self._manifest = None
+        if self.pages is not None:
+            self.pages.discard(self, key)
+
+    def _flush(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+
+    def section(self, *path):
+        """Returns a section of the store.
+
+        Args:
+            *path (str): The section path, e.g. ('orgConfig', 'apps').
+
+        Returns:
+            ExportSection: The section, holding the objects already
+                stored in it.
+        """
+        key = '/'.join(path)
+        if key not in self._index:
+            self._append(key, None, None)
+        return ExportSection(self, key)
+
+    def sections(self, prefix):
+        """Lists the sections under a path.
+
+        Args:
+            prefix (str): The path, e.g. `orgConfig`.
+
+        Returns:
+            list: The section paths.
+        """
+        return [key for key in self._index
+                if key.startswith(f'{prefix}/')]
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def names(self, key):
+        """Returns the object names of a section.
+
+        Args:
+            key (str): The section path.
+
+        Returns:
+            dict: The index of the section keyed by object name.
+        """
+        return self._index.get(key, {})
+
+    def put(self, key, name, data):
+        """Writes an object.
+
+        Args:
+            key (str): The section path.
+            name (str): The object name.
+            data: The JSON serializable object data.
+        """
+        self._append(key, name, data)
+
+    def clear(self, key):
+        """Removes all objects of a section.
+
+        Args:
+            key (str): The section path.
+        """
+        self._append(key, None, None)
+
+    def _read(self, offset, length):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+            if self._reader is None:
+                self._reader = open(self.path, 'rb')  # noqa pylint: disable=R1732
+            self._reader.seek(offset)
+            return self._reader.read(length)
+
+    def get(self, key, name):
+        """Reads an object.
+
+        Args:
+            key (str): The section path.
+            name (str): The object name.
+
+        Returns:
+            The object data.
+
+        Raises:
+            KeyError: If the object is not stored.
+        """
+        entry = self.names(key).get(name)
+        if entry is None:
+            raise KeyError(name)
+        return json_codec.loads(self._read(*entry))[2]
+
+    def page(self, key):
+        """Returns a whole section from the page cache.
+
+        Args:
+            key (str): The section path.
+
+        Returns:
+            dict: The objects of the section keyed by name, or None
+                if the store has no page cache or the section does
+                not fit in it.
+
+        Raises:
+            ValueError: If the section does not match its checksum.
+        """
+        if self.pages is None:
+            return None
+        return self.pages.get(self, key)
+
+    def scan(self, key):
+        """Reads all objects of a section in file order.
+
+        Args:
+            key (str): The section path.
+
+        Yields:
+            tuple: The name and data of each object.
+        """
+        self.verify(key)
+        entries = sorted(self.names(key).items(), key=lambda item: item[1])
+        for name, entry in entries:
+            yield name, json_codec.loads(self._read(*entry))[2]
+
+    def _read_section(self, key):
+        """Reads the records of a section in file order, on a file
+        handle of its own so sections can be read concurrently.
+        """
+        entries = sorted(self.names(key).items(), key=lambda item: item[1])
+        self._flush()
+        with open(self.path, 'rb') as fl:
+            for name, (offset, length) in entries:
+                fl.seek(offset)
+                yield name, fl.read(length)
+
+    def _check(self, key, sha256):
+        expected = (self._manifest or {}).get('sections', {}).get(key)
+        if expected is not None and expected['sha256'] != sha256:
+            raise ValueError(f"Section {key} of {self.path} does not match "
+                             f"its manifest, export it again")
+        with self._lock:
+            self._verified.add(key)
+
+    def verify(self, key):
+        """Verifies a section against the manifest, once.
+
+        Sections written since the manifest are not verified.
+
+        Args:
+            key (str): The section path.
+
+        Raises:
+            ValueError: If the section does not match its checksum.
+        """
+        if self._manifest is None or key in self._verified:
+            return
+        sha256 = hashlib.sha256()
+        for _, record in self._read_section(key):
+            sha256.update(record)
+        self._check(key, sha256.hexdigest())
+
+    def load(self, key):
+        """Reads and verifies a whole section.
+
+        Args:
+            key (str): The section path.
+
+        Returns:
+            dict: The objects of the section keyed by name.
+
+        Raises:
+            ValueError: If the section does not match its checksum.
+        """
+        sha256 = hashlib.sha256()
+        objects = {}
+        for name, record in self._read_section(key):
+            sha256.update(record)
+            objects[name] = json_codec.loads(record)[2]
+        self._check(key, sha256.hexdigest())
+        return objects
+
+    def read(self, prefix, lazy=True, workers=10):
+        """Reads the export data under a path.
+
+        Args:
+            prefix (str): The path, e.g. `orgConfig`.
+            lazy (bool): Return sections reading their objects on
+                access, instead of decoding all sections upfront.
+            workers (int): Sections decoded concurrently if not lazy.
+
+        Returns:
+            dict: The sections nested by path, e.g.
+                `{env: {resource: ExportSection}}` for `envConfig`.
+
+        Raises:
+            ValueError: If a section does not match its checksum.
+        """
+        keys = self.sections(prefix)
+        if lazy:
+            sections = [(key, ExportSection(self, key)) for key in keys]
+        else:
+            sections = fan_out(self.load, keys, workers=workers)
+        export_data = {}
+        for key, section in sections:
+            *parents, leaf = key.split('/')[1:]
+            node = export_data
+            for parent in parents:
+                node = node.setdefault(parent, {})
+            node[leaf] = section
+        return export_data
+
+    def close(self):
+        """Writes the index, compacting the segment file first if
+        most of it holds replaced objects.
+        """
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+            if self._size - self._live > max(self._live, 1024 * 1024):
+                self._compact()
+            self._write(INDEX_FILE,
+                        {'size': self._size, 'sections': self._index})
+            self._manifest = self._build_manifest()
+            self._verified = set(self._index)
+            self._write(MANIFEST_FILE, self._manifest)
+
+    def _write(self, file_name, data):
+        fd, temp_path = tempfile.mkstemp(dir=self.export_dir, suffix='.part')
+        os.chmod(temp_path, FILE_MODE)
+        with os.fdopen(fd, 'w', encoding='utf-8') as fl:
+            json.dump(data, fl)
+        os.replace(temp_path, os.path.join(self.export_dir, file_name))
+
+    def _build_manifest(self):
+        """Hashes the segment file and its sections in one pass."""
+        owners = {entry[0]: key for key, entries in self._index.items()
+                  for entry in entries.values()}
+        sections = {key: {'objects': len(entries), 'size': 0,
+                          'sha256': hashlib.sha256()}
+                    for key, entries in self._index.items()}
+        file_sha256 = hashlib.sha256()
+        offset = 0
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as fl:
+                for record in fl:
+                    file_sha256.update(record)
+                    key = owners.get(offset)
+                    if key is not None:
+                        sections[key]['size'] += len(record)
+                        sections[key]['sha256'].update(record)
+                    offset += len(record)
+        for section in sections.values():
+            section['sha256'] = section['sha256'].hexdigest()
+        return {'files': {STATE_FILE: {'size': offset,
+                                       'sha256': file_sha256.hexdigest()}},
+                'sections': sections}
+
+    def _compact(self):
+        index = {}
+        offset = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.export_dir,
+                                         suffix='.part')
+        os.chmod(temp_path, FILE_MODE)
+        with os.fdopen(fd, 'wb') as target, open(self.path, 'rb') as source:
+            for key, entries in self._index.items():
+                record = json_codec.dumps([key, None, None]) + b'\n'
+                target.write(record)
+                offset += len(record)
+                index[key] = {}
+                for name, (entry_offset, length) in sorted(
+                        entries.items(), key=lambda item: item[1]):
+                    source.seek(entry_offset)
+                    target.write(source.read(length))
+                    index[key][name] = (offset, length)
+                    offset += length
+        os.replace(temp_path, self.path)
+        logger.debug(f"Compacted {self.path} from {self._size} to {offset} bytes")  # noqa pylint: disable=W1203
+        self._index = index
+        self._size = offset
+
+    @staticmethod
+    def is_stored(section, export_dir, *path):
+        """Returns whether a section is already stored in a store.
+
+        Args:
+            section: A section of the export data.
+            export_dir (str): The export directory of the store.
+            *path (str): The section path.
+
+        Returns:
+            bool: True if `section` is the stored section `path`.
+        """
+        return (isinstance(section, ExportSection) and
+                section.key == '/'.join(path) and
+                os.path.abspath(section.store.export_dir) ==
+                os.path.abspath(export_dir))
+
+
+class ExportData(collections.abc.MutableMapping):
+    """The export data of a run, paged in from disk.
+
+    Behaves like the export data dict. The organization and
+    environment configurations are kept as given, usually as
+    sections of the export store. Other non-empty mappings, e.g.
+    the proxy dependency map or the validation report, are written
+    to a store of their own under `<export_dir>/export_data_pages`
+    and read back as sections. Sections of both stores are paged in
+    whole on first access and evicted from an LRU cache of
+    `memory_budget` bytes. A resumed run keeps the pages of the
+    previous one, so its mappings can be restored rather than
+    computed again.
+
+    Attributes:
+        export_dir (str): The export directory.
+        pages (PageCache): The cache sections are read through.
+    """
+
+    def __init__(self, export_dir, data=None,
+                 memory_budget=DEFAULT_MEMORY_BUDGET, resume=False):
+        self.export_dir = export_dir
+        self.pages = PageCache(memory_budget)
+        self._data = {}
+        self._store = None
+        self._resume = resume
+        for key, value in (data or {}).items():
+            self[key] = value
+
+    def _page_store(self):
+        if self._store is None:
+            path = os.path.join(self.export_dir, PAGES_DIR)
+            if not self._resume:
+                # Pages of a previous run are not read back
+                shutil.rmtree(path, ignore_errors=True)
+            self._store = ExportStore(path)
+            self._store.pages = self.pages
+        return self._store
+
+    def restore(self, key):
+        """Restores a mapping written by the run being resumed.
+
+        Args:
+            key (str): The export data key, e.g. `sharding_output`.
+
+        Returns:
+            bool: True if the mapping was restored, False if the
+                previous run did not store it.
+        """
+        if not self._resume:
+            return False
+        store = self._page_store()
+        if key not in store:
+            return False
+        self._data[key] = ExportSection(store, key)
+        return True
+
+    def close(self):
+        """Writes the index of the pages, e.g. before a run is
+        recorded as complete. The pages are reopened on the next
+        write.
+        """
+        if self._store is not None:
+            self._store.close()
+
+    def _attach(self, value, depth):
+        """Reads the store sections of a view through the cache."""
+        if isinstance(value, ExportSection):
+            value.store.pages = self.pages
+        elif depth > 0 and isinstance(value, collections.abc.Mapping):
+            for child in value.values():
+                self._attach(child, depth - 1)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        if key in VIEW_DEPTHS:
+            self._attach(value, VIEW_DEPTHS[key])
+        elif isinstance(value, ExportSection):
+            self._attach(value, 0)
+        elif isinstance(value, collections.abc.Mapping) and value:
+            store = self._page_store()
+            store.clear(key)
+            for name, data in value.items():
+                store.put(key, name, data)
+            value = ExportSection(store, key)
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f'ExportData({list(self._data)!r})'
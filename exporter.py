@@ -34,10 +34,16 @@ offers methods to fetch dependency data, such as references.
 """
 
 import os
-import json
+import shutil
+import functools
+import concurrent.futures
+from bundle_store import BundleStore
 from classic import ApigeeClassic
+from export_journal import ExportJournal
+from export_store import ExportSection, ExportStore
 from nextgen import ApigeeNewGen
-from utils import create_dir, run_parallel, write_file, write_json
+from utils import (create_dir, fan_out, parse_json, run_parallel,
+                   write_file)
 from base_logger import logger
 
 
@@ -63,20 +69,45 @@ class ApigeeExporter():  # pylint: disable=R0902
         env_object_types (dict): Mapping of environment object types.
         org_object_types (dict): Mapping of organization object types.
         export_data (dict): A dictionary to store the exported data.
+        workers (int): Maximum number of concurrent per-object GETs.
+        deployment_snapshot (bool): Whether API deployments are read
+                        from one deployments call per environment.
+        failed_objects (list): Environment objects that could not be
+                        exported, with the error. Saved as the
+                        `failedObjects` of the export data.
+        journal (ExportJournal): The journal of exported objects,
+                        None if objects are not journaled.
+        baseline (dict): The export data of a previous run, only
+                        objects changed since are fetched again.
+        baseline_dir (str): The export directory of the baseline.
     """
 
-    def __init__(self, baseurl, org, token, auth_type, ssl_verify):  # noqa pylint: disable=R0902,R0917,R0913
+    def __init__(self, baseurl, org, token, auth_type, ssl_verify,  # noqa pylint: disable=R0902,R0917,R0913
+                 cache_dir=None, bundle_store_dir=None, workers=10,
+                 deployment_snapshot=False, journal_dir=None,
+                 resume=False, baseline=None, baseline_dir=None):
         self.baseurl = baseurl
         self.org = org
         self.token = token
         self.auth_type = auth_type
+        bundle_store = (BundleStore(bundle_store_dir)
+                        if bundle_store_dir else None)
         self.apigee = (ApigeeNewGen(baseurl, org, token,
-                       'ENVIRONMENT_TYPE_UNSPECIFIED', ssl_verify)
+                                    'ENVIRONMENT_TYPE_UNSPECIFIED',
+                                    ssl_verify, cache_dir=cache_dir,
+                                    bundle_store=bundle_store)
                        if 'apigee.googleapis.com' in baseurl else
-                       ApigeeClassic(baseurl, org, token,
-                       self.auth_type, ssl_verify=ssl_verify))
+                       ApigeeClassic(baseurl, org, token, self.auth_type,
+                                     ssl_verify=ssl_verify,
+                                     cache_dir=cache_dir,
+                                     bundle_store=bundle_store))
         self.apigee_type = ('x' if 'apigee.googleapis.com' in baseurl
                             else 'edge')
+        self.workers = workers
+        self._executor = None
+        self.deployment_snapshot = deployment_snapshot
+        self.journal = (ExportJournal(journal_dir, resume=resume)
+                        if journal_dir else None)
         self.env_object_types = {
             'targetservers': 'targetServers',
             'keyvaluemaps': 'kvms',
@@ -95,10 +126,19 @@ class ApigeeExporter():  # pylint: disable=R0902
             'resourcefiles': 'resourcefiles',
         }
         self.unsupported_x_objects = ['resourcefiles', 'companies']
+        self.failed_objects = []
         self.export_data = {
             'orgConfig': {},
             'envConfig': {}
         }
+        self.baseline = baseline
+        self.baseline_dir = baseline_dir
+        self._export_stores = {}
+        if baseline is not None:
+            # Names changed since the baseline, per orgConfig section,
+            # and the lastModifiedAt of APIs for the next baseline.
+            self.export_data['changes'] = {}
+            self.export_data['lastModified'] = {}
 
     def export_env(self):
         """Exports Apigee environments.
@@ -133,7 +173,7 @@ class ApigeeExporter():  # pylint: disable=R0902
                     vhost_data = self.apigee.get_env_vhost(env, vhost)
                     self.export_data['envConfig'][env]['vhosts'][vhost] = vhost_data  # noqa
 
-    def export_env_objects(self, env_objects_keys, export_dir):    # noqa pylint: disable=R0912
+    def export_env_objects(self, env_objects_keys, export_dir):
         """Exports environment-level objects.
 
         Retrieves and exports various environment-level objects based
@@ -141,88 +181,271 @@ class ApigeeExporter():  # pylint: disable=R0902
         and keystores, saving them to specific directories. Stores the
         object data in the export_data dictionary.
 
+        The export runs as a task graph on a bounded thread pool:
+        the (env, type) listings, then every (env, type, name) fetch,
+        then the keystore aliases. Results are stored in listing
+        order, and a failing fetch only skips its own object, see
+        `failed_objects`.
+
         Args:
             env_objects_keys (list): A list of environment object
                                         types to export.
             export_dir (str): The directory to export files to.
         """
-        for env in self.export_data.get('envConfig', {}):    # noqa pylint: disable=R1702
-            for each_env_object_type in env_objects_keys:
-                env_objects = self.apigee.list_env_objects(
-                    env, each_env_object_type)
-                if each_env_object_type == 'resourcefiles':
-                    logger.info("--Exporting Resourcefiles--")
-                    if self.apigee_type == 'x' and len(env_objects) == 0:
-                        env_objects['resourceFile'] = []
-                    env_objects = env_objects['resourceFile']
-                    for each_env_object in env_objects:
-                        logger.info(      # noqa pylint: disable=W1203
-                            f"Exporting Resourcefile {each_env_object['name']}")  # noqa
-                        create_dir(
-                            f"{export_dir}/resourceFiles/{each_env_object['type']}")    # noqa pylint: disable=W1203
-                        obj_data = self.apigee.get_env_object(
-                            env, each_env_object_type, each_env_object)
-                        obj_data = (obj_data if isinstance(obj_data, bytes)
-                                    else obj_data.encode('utf-8'))
-                        write_file(
-                            f"{export_dir}/resourceFiles/{each_env_object['type']}/{each_env_object['name']}", obj_data)  # noqa pylint: disable=C0301
-                        self.export_data['envConfig'][env][self.env_object_types[each_env_object_type]][each_env_object['name']] = {  # noqa pylint: disable=C0301
-                            'name': each_env_object['name'],
-                            'type': each_env_object['type'],
-                            'file': f"{export_dir}/resourceFiles/{each_env_object['type']}/{each_env_object['name']}"  # noqa pylint: disable=C0301
-                        }
-                elif each_env_object_type == 'keystores':
-                    create_dir(f"{export_dir}/keystore_certificates/env-{env}")  # noqa
-                    logger.info("--Exporting keystores--")
-                    for each_env_object in env_objects:
-                        logger.info(f"Exporting keystore {each_env_object}")    # noqa pylint: disable=W1203
-                        create_dir(
-                            f"{export_dir}/keystore_certificates/env-{env}/{each_env_object}")  # noqa pylint: disable=C0301
-                        obj_data = self.apigee.get_env_object(
-                            env, each_env_object_type, each_env_object)
-                        obj_data['alias_data'] = {}
-                        for alias in obj_data.get('aliases', []):
-                            if self.apigee_type == 'x':
-                                alias_name = alias
-                            else:
-                                alias_name = alias.get('aliasName')
-                            create_dir(
-                                f"{export_dir}/keystore_certificates/env-{env}/{each_env_object}/{alias_name}")  # noqa pylint: disable=C0301
-                            alias_data = self.apigee.get_env_object(
-                                env, f"keystores/{each_env_object}/aliases", alias_name)  # noqa pylint: disable=C0301
-                            certificate = self.apigee.get_env_object(
-                                env, f"keystores/{each_env_object}/aliases", f"{alias_name}/certificate")  # noqa pylint: disable=C0301
-                            with open(f"{export_dir}/keystore_certificates/env-{env}/{each_env_object}/{alias_name}/certificate.pem", "wb") as f:  # noqa pylint: disable=C0301
-                                if isinstance(certificate, bytes):
-                                    f.write(certificate)
-                                else:
-                                    f.write(certificate.encode('utf-8'))
-                            obj_data['alias_data'][alias_name] = alias_data
-                        self.export_data['envConfig'][env][self.env_object_types[each_env_object_type]  # noqa pylint: disable=C0301
-                                                           ][each_env_object] = obj_data  # noqa pylint: disable=C0301
+        tasks = self._env_object_tasks(env_objects_keys, export_dir)
+        fetched = self._fetch_all(
+            functools.partial(self._export_env_object, export_dir), tasks,
+            return_exceptions=True)
+
+        alias_tasks = []
+        for (env, each_env_object_type, each_env_object), obj_data in fetched:  # noqa pylint: disable=C0301
+            if each_env_object_type == 'resourcefiles':
+                each_env_object = each_env_object['name']
+            if isinstance(obj_data, Exception):
+                self._object_failed(env, each_env_object_type,
+                                    each_env_object, obj_data)
+                continue
+            if each_env_object_type == 'keystores':
+                obj_data['alias_data'] = {}
+                alias_tasks.extend(
+                    (env, each_env_object, obj_data,
+                     alias if self.apigee_type == 'x'
+                     else alias.get('aliasName'))
+                    for alias in obj_data.get('aliases', []))
+            self.export_data['envConfig'][env][self.env_object_types[each_env_object_type]  # noqa pylint: disable=C0301
+                                               ][each_env_object] = obj_data  # noqa
+
+        self._export_aliases(alias_tasks, export_dir)
+
+        if self.failed_objects:
+            logger.warning(f"{len(self.failed_objects)} objects could not be exported")  # noqa pylint: disable=W1203
+
+    def _env_object_tasks(self, env_objects_keys, export_dir):
+        """Lists the environment-level objects to fetch.
+
+        Args:
+            env_objects_keys (list): The environment object types.
+            export_dir (str): The directory to export files to.
+
+        Returns:
+            list: (env, type, object) tuples, in listing order.
+        """
+        listings = self._fetch_all(
+            lambda task: self.apigee.list_env_objects(*task),
+            [(env, each_env_object_type)
+             for env in self.export_data.get('envConfig', {})
+             for each_env_object_type in env_objects_keys],
+            return_exceptions=True)
+
+        tasks = []
+        for (env, each_env_object_type), env_objects in listings:
+            if isinstance(env_objects, Exception):
+                self._object_failed(env, each_env_object_type, None,
+                                    env_objects)
+                continue
+            logger.info(f"--Exporting {each_env_object_type} of env {env}--")  # noqa pylint: disable=W1203
+            if each_env_object_type == 'resourcefiles':
+                if self.apigee_type == 'x' and len(env_objects) == 0:
+                    env_objects['resourceFile'] = []
+                env_objects = env_objects['resourceFile']
+                for each_env_object in env_objects:
+                    create_dir(
+                        f"{export_dir}/resourceFiles/{each_env_object['type']}")    # noqa pylint: disable=W1203
+            elif each_env_object_type == 'keystores':
+                create_dir(f"{export_dir}/keystore_certificates/env-{env}")  # noqa
+            tasks.extend((env, each_env_object_type, each_env_object)
+                         for each_env_object in env_objects)
+        return tasks
+
+    def _export_aliases(self, alias_tasks, export_dir):
+        """Fetches the aliases of the exported keystores.
+
+        Args:
+            alias_tasks (list): (env, keystore, keystore data,
+                                alias name) tuples.
+            export_dir (str): The directory to export files to.
+        """
+        aliases = self._fetch_all(
+            functools.partial(self._export_alias, export_dir), alias_tasks,
+            return_exceptions=True)
+        for (env, keystore, obj_data, alias_name), alias_data in aliases:
+            if isinstance(alias_data, Exception):
+                self._object_failed(env, 'keystores',
+                                    f"{keystore}/aliases/{alias_name}",
+                                    alias_data)
+                continue
+            obj_data['alias_data'][alias_name] = alias_data
+
+    def _object_failed(self, env, object_type, name, error):
+        """Records an object that could not be exported.
+
+        Args:
+            env (str): The environment.
+            object_type (str): The object type.
+            name (str): The object name, None if the listing failed.
+            error (Exception): The error.
+        """
+        logger.error(f"Failed to export {object_type} {name or ''} of env {env}: {error}")  # noqa pylint: disable=C0301,W1203
+        self.failed_objects.append({'env': env, 'type': object_type,
+                                    'name': name, 'error': str(error)})
+
+    def _fetch_all(self, func, objects, return_exceptions=False):
+        """Calls a per-object fetch for each object concurrently.
+
+        Args:
+            func: Function fetching one object.
+            objects (list): The objects to fetch.
+            return_exceptions (bool): Return the exception of a
+                                        failed fetch as its data.
+
+        Returns:
+            list: (object, data) tuples, in the order of `objects`.
+        """
+        if self._executor is None and self.workers > 1:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.workers,
+                initializer=self.apigee.client.init_worker)
+        return fan_out(func, objects, workers=self.workers,
+                       initializer=self.apigee.client.init_worker,
+                       return_exceptions=return_exceptions,
+                       executor=self._executor)
+
+    def _shutdown_executor(self):
+        """Shuts down the thread pool of the per-object fetches."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _export_env_object(self, export_dir, task):
+        """Fetches an environment-level object.
+
+        Resource files are written to the export directory. Objects
+        completed in a resumed export are read from the journal.
+
+        Args:
+            export_dir (str): The directory to export files to.
+            task (tuple): The environment, object type and object.
+
+        Returns:
+            The object data.
+        """
+        env, env_object_type, env_object = task
+        resource_type = f"envConfig/{env}/{self.env_object_types[env_object_type]}"  # noqa pylint: disable=C0301
+        if env_object_type == 'resourcefiles':
+            file_path = f"{export_dir}/resourceFiles/{env_object['type']}/{env_object['name']}"  # noqa pylint: disable=C0301
+
+            def fetch():
+                obj_data = self._get_env_object(env, env_object_type,
+                                                env_object)
+                write_file(file_path, obj_data if isinstance(obj_data, bytes)
+                           else obj_data.encode('utf-8'))
+                return {'name': env_object['name'],
+                        'type': env_object['type'], 'file': file_path}
+            return self._journaled(resource_type, env_object['name'], fetch,
+                                   output=file_path)
+        if env_object_type == 'keystores':
+            create_dir(
+                f"{export_dir}/keystore_certificates/env-{env}/{env_object}")  # noqa pylint: disable=C0301
+        return self._journaled(resource_type, env_object, functools.partial(
+            self._get_env_object, env, env_object_type, env_object))
+
+    def _journaled(self, resource_type, key, fetch, output=None):
+        """Fetches an object unless the journal holds it.
+
+        Args:
+            resource_type (str): The journal resource type,
+                                    e.g. `envConfig/test/targetServers`.
+            key (str): The object key.
+            fetch: Function fetching the object data.
+            output (str, optional): A file written by `fetch`, the
+                                    journaled data is only used if it
+                                    exists.
+
+        Returns:
+            The object data.
+        """
+        if self.journal is None:
+            return fetch()
+        if output is None or os.path.exists(output):
+            obj_data = self.journal.get(resource_type, key)
+            if obj_data is not None:
+                return obj_data
+        try:
+            obj_data = fetch()
+        except Exception as error:
+            self.journal.record_failure(resource_type, key, error)
+            raise
+        self.journal.record(resource_type, key, obj_data)
+        return obj_data
+
+    def _get_env_object(self, env, env_object_type, env_object):
+        """Fetches an environment-level object.
+
+        Args:
+            env (str): The environment.
+            env_object_type (str): The object type.
+            env_object (str or dict): The object name, or the
+                                        listed resource file.
+
+        Returns:
+            The object data.
+        """
+        if env_object_type == 'resourcefiles':
+            logger.info(f"Exporting Resourcefile {env_object['name']}")  # noqa pylint: disable=W1203
+        else:
+            logger.info(f"Exporting {env_object_type} {env_object}")  # noqa pylint: disable=W1203
+        if self.apigee_type == 'x' and env_object_type == 'keyvaluemaps':
+            return self.apigee.get_env_object(
+                env, env_object_type, f'{env_object}/entries')
+        return self.apigee.get_env_object(env, env_object_type, env_object)
+
+    def _export_alias(self, export_dir, task):
+        """Exports a keystore alias and its certificate.
+
+        Args:
+            export_dir (str): The directory to export files to.
+            task (tuple): The environment, keystore name, keystore
+                            data and alias name.
+
+        Returns:
+            dict: The alias data.
+        """
+        env, keystore, _, alias_name = task
+        alias_dir = f"{export_dir}/keystore_certificates/env-{env}/{keystore}/{alias_name}"  # noqa pylint: disable=C0301
+
+        def fetch():
+            create_dir(alias_dir)
+            alias_data = self.apigee.get_env_object(
+                env, f"keystores/{keystore}/aliases", alias_name)
+            certificate = self.apigee.get_env_object(
+                env, f"keystores/{keystore}/aliases", f"{alias_name}/certificate")  # noqa pylint: disable=C0301
+            with open(f"{alias_dir}/certificate.pem", "wb") as f:
+                if isinstance(certificate, bytes):
+                    f.write(certificate)
                 else:
-                    logger.info(f"--Exporting {each_env_object_type}--")      # noqa pylint: disable=W1203
-                    for each_env_object in env_objects:
-                        logger.info(    # noqa pylint: disable=W1203
-                            f"Exporting {each_env_object_type} {each_env_object}")  # noqa
-                        if self.apigee_type == 'x' and each_env_object_type == 'keyvaluemaps':  # noqa pylint: disable=C0301
-                            obj_data = self.apigee.get_env_object(
-                                        env, each_env_object_type, f'{each_env_object}/entries')  # noqa pylint: disable=C0301
-                        else:
-                            obj_data = self.apigee.get_env_object(env, each_env_object_type, each_env_object)  # noqa pylint: disable=C0301
-                        self.export_data['envConfig'][env][self.env_object_types[each_env_object_type]  # noqa pylint: disable=C0301
-                                                           ][each_env_object] = obj_data  # noqa
-
-    def export_org_objects(self, org_objects_keys):
+                    f.write(certificate.encode('utf-8'))
+            return alias_data
+        return self._journaled(
+            f"envConfig/{env}/keystores/{keystore}/aliases", alias_name,
+            fetch, output=f"{alias_dir}/certificate.pem")
+
+    def export_org_objects(self, org_objects_keys, export_dir=None):
         """Exports organization-level objects.
 
         Retrieves and exports various organization-level objects based
         on the provided keys. Handles special cases for resource files
         and KVMs. Stores the object data in the export_data dictionary.
 
+        Expandable objects (apps, developers, API products) are
+        streamed page by page into the export store when an
+        `export_dir` is given, their export_data section then
+        reads them back from disk on access.
+
         Args:
             org_objects_keys (list): A list of organization object types
                                         to export.
+            export_dir (str, optional): The directory of the
+                                        export store.
         """
         for each_org_object_type in org_objects_keys:
             logger.info(f"--Exporting org {each_org_object_type}--")    # noqa pylint: disable=W1203
@@ -233,43 +456,134 @@ class ApigeeExporter():  # pylint: disable=R0902
 
             if each_org_object_type == 'org_keyvaluemaps':
                 each_org_object_type = 'keyvaluemaps'
+            if (self.apigee.capabilities.get(each_org_object_type, {}).get('bulk')  # noqa pylint: disable=C0301
+                    and each_org_object_type != 'keyvaluemaps'):
+                self.export_data['orgConfig'][self.org_object_types[each_org_object_type]  # noqa pylint: disable=C0301
+                                              ] = self._export_expanded(each_org_object_type, export_dir)  # noqa pylint: disable=C0301
+                continue
             org_objects = self.apigee.list_org_objects(each_org_object_type)
 
             if each_org_object_type == 'resourcefiles':
+                # The listing holds all exported details, the file
+                # contents are not needed.
                 org_objects = org_objects['resourceFile']
                 for each_org_object in org_objects:
                     logger.info(    # noqa pylint: disable=W1203
                         f"Exporting {each_org_object_type} {each_org_object}")
-                    obj_data = self.apigee.get_org_object(
-                        each_org_object_type, each_org_object)
                     self.export_data['orgConfig'][self.org_object_types[each_org_object_type]][each_org_object['name']] = {  # noqa pylint: disable=C0301
                         'name': each_org_object['name'],
                         'type': each_org_object['type']
                     }
-
-            elif each_org_object_type == 'keyvaluemaps':
-                for each_org_object in org_objects:
-                    logger.info(    # noqa pylint: disable=W1203
-                        f"Exporting {each_org_object_type} {each_org_object}")
-                    if self.apigee_type == 'x':
-                        obj_data = self.apigee.get_org_object(
-                                    each_org_object_type, f'{each_org_object}/entries')  # noqa pylint: disable=C0301
-                    else:
-                        obj_data = self.apigee.get_org_object(
-                            each_org_object_type, each_org_object)
-                    self.export_data['orgConfig'][self.org_object_types['org_keyvaluemaps']  # noqa
-                                                  ][each_org_object] = obj_data
             else:
-                if each_org_object_type in self.apigee.can_expand:
-                    self.export_data['orgConfig'][self.org_object_types[each_org_object_type]  # noqa pylint: disable=C0301
-                                                    ] = self.apigee.list_org_objects_expand(each_org_object_type)   # noqa pylint: disable=C0301
-                else:
-                    for each_org_object in org_objects:
-                        logger.info(    # noqa pylint: disable=W1203
-                            f"Exporting {each_org_object_type} {each_org_object}")  # noqa
-                        obj_data = self.apigee.get_org_object(
-                            each_org_object_type, each_org_object)
-                        self.export_data['orgConfig'][self.org_object_types[each_org_object_type]][each_org_object] = obj_data  # noqa pylint: disable=C0301
+                section = ('org_keyvaluemaps'
+                           if each_org_object_type == 'keyvaluemaps'
+                           else each_org_object_type)
+                fetched = self._fetch_all(functools.partial(
+                    self._get_org_object, each_org_object_type), org_objects)
+                for each_org_object, obj_data in fetched:
+                    self.export_data['orgConfig'][self.org_object_types[section]][each_org_object] = obj_data  # noqa pylint: disable=C0301
+
+    def _get_org_object(self, org_object_type, org_object):
+        """Fetches an organization-level object.
+
+        Objects completed in a resumed export are read from the journal.
+
+        Args:
+            org_object_type (str): The object type.
+            org_object (str): The object name.
+
+        Returns:
+            dict: The object data.
+        """
+        section = ('org_keyvaluemaps' if org_object_type == 'keyvaluemaps'
+                   else org_object_type)
+        return self._journaled(
+            f"orgConfig/{self.org_object_types[section]}", org_object,
+            functools.partial(self._fetch_org_object, org_object_type,
+                              org_object))
+
+    def _fetch_org_object(self, org_object_type, org_object):
+        logger.info(f"Exporting {org_object_type} {org_object}")    # noqa pylint: disable=W1203
+        if self.apigee_type == 'x' and org_object_type == 'keyvaluemaps':
+            return self.apigee.get_org_object(
+                org_object_type, f'{org_object}/entries')
+        return self.apigee.get_org_object(org_object_type, org_object)
+
+    def _export_expanded(self, org_object_type, export_dir=None):
+        """Exports expandable organization-level objects.
+
+        Args:
+            org_object_type (str): The organization object type.
+            export_dir (str, optional): The directory of the
+                                        export store.
+
+        Returns:
+            dict or ExportSection: The objects keyed by their ID.
+        """
+        resource = self.org_object_types[org_object_type]
+        if export_dir is None:
+            objects = self.apigee.list_org_objects_expand(org_object_type)
+            self._record_changes(resource, objects.items())
+            return objects
+        id_key = self.apigee.capabilities[org_object_type]['id']
+        section = self._export_store(export_dir).section(
+            'orgConfig', resource)
+        if self.journal is not None:
+            # The whole listing is journaled, a completed section is
+            # reused if the store still holds all of its objects.
+            names = self.journal.get('orgConfig', resource)
+            if names is not None and names == list(section):
+                logger.info(f"Resuming {len(names)} exported {org_object_type}")  # noqa pylint: disable=W1203
+                return section
+        section.clear()
+        for page in self.apigee.iter_org_objects_expand(org_object_type):
+            for each_item in page:
+                section.put(each_item[id_key], each_item)
+            self._record_changes(resource, ((each_item[id_key], each_item)
+                                            for each_item in page))
+            logger.debug(f"Exported {len(section)} {org_object_type}")  # noqa pylint: disable=W1203
+        if self.journal is not None:
+            self.journal.record('orgConfig', resource, list(section))
+        return section
+
+    def _export_store(self, export_dir):
+        """Returns the export store of a directory.
+
+        Args:
+            export_dir (str): The export directory.
+
+        Returns:
+            ExportStore: The store, shared by all sections of the
+                directory.
+        """
+        path = os.path.abspath(export_dir)
+        if path not in self._export_stores:
+            self._export_stores[path] = ExportStore(export_dir)
+        return self._export_stores[path]
+
+    def _record_changes(self, resource, objects):
+        """Records the objects changed since the baseline.
+
+        Objects are compared by `lastModifiedAt`, or by content if
+        they have none.
+
+        Args:
+            resource (str): The orgConfig section, e.g. `apps`.
+            objects: (name, data) tuples of the exported objects.
+        """
+        if self.baseline is None:
+            return
+        baseline = self.baseline.get('orgConfig', {}).get(resource, {})
+        changes = self.export_data['changes'].setdefault(resource, [])
+        for name, data in objects:
+            previous = baseline.get(name)
+            if previous is None:
+                changes.append(name)
+            elif 'lastModifiedAt' in data:
+                if data['lastModifiedAt'] != previous.get('lastModifiedAt'):
+                    changes.append(name)
+            elif data != previous:
+                changes.append(name)
 
     def developers_list(self):
         """Retrieves a list of developers in the organization.
@@ -277,12 +591,10 @@ class ApigeeExporter():  # pylint: disable=R0902
         Returns:
             dict: A dictionary of developers, keyed by developerId.
         """
-        developers = self.apigee.list_org_objects('developers')
         developers_dict = {}
-        for developer in developers:
-            developer_data = self.apigee.get_org_object('developers',
-                                                        developer)
-            developers_dict[developer_data['developerId']] = developer
+        for page in self.apigee.iter_org_objects_expand('developers'):
+            for developer in page:
+                developers_dict[developer['developerId']] = developer['email']
         return developers_dict
 
     def export_api_metadata(self, api_types):
@@ -290,6 +602,9 @@ class ApigeeExporter():  # pylint: disable=R0902
 
         Retrieves revisions and deployment information for APIs and
         shared flows & stores the metadata in the export_data dictionary.
+        In deployment snapshot mode the deployments come from one call
+        per environment and the revisions are listed concurrently,
+        otherwise each API is queried one after another.
 
         Args:
             api_types (list): A list of API types ('apis', 'sharedflows').
@@ -297,12 +612,24 @@ class ApigeeExporter():  # pylint: disable=R0902
         for each_api_type in api_types:
             self.export_data['orgConfig'][each_api_type] = {}
             logger.info(f"--Exporting {each_api_type} metadata--")    # noqa pylint: disable=W1203
+            if self.baseline is not None:
+                metadata = self.apigee.list_apis_metadata(each_api_type)
+                if metadata is not None:
+                    self._export_api_metadata_incremental(each_api_type,
+                                                          metadata)
+                    continue
             apis = self.apigee.list_org_objects(each_api_type)
 
+            if self.deployment_snapshot:
+                self._export_api_metadata_snapshot(each_api_type, apis)
+                continue
             for each_api in apis:
                 logger.info(f"Exporting {each_api_type} {each_api}")    # noqa pylint: disable=W1203
                 # extract revisions
-                revs = self.apigee.list_api_revisions(each_api_type, each_api)
+                revs = self._journaled(
+                    f"orgConfig/{each_api_type}", each_api,
+                    functools.partial(self.apigee.list_api_revisions,
+                                      each_api_type, each_api))
                 self.export_data['orgConfig'][each_api_type][each_api] = revs
 
                 # extract env level info
@@ -318,6 +645,73 @@ class ApigeeExporter():  # pylint: disable=R0902
                         self.export_data['envConfig'][env_name][each_api_type] = {}  # noqa
                         self.export_data['envConfig'][env_name][each_api_type][each_api] = revisions  # noqa pylint: disable=C0301
 
+    def _export_api_metadata_snapshot(self, api_type, apis):
+        """Exports API metadata from a deployment snapshot.
+
+        Args:
+            api_type (str): The API type ('apis' or 'sharedflows').
+            apis (list): The API or Sharedflow names.
+        """
+        envs = list(self.export_data['envConfig'])
+        snapshot = self.apigee.deployment_snapshot(api_type, envs)
+        fetched = self._fetch_all(
+            lambda each_api: self._journaled(
+                f"orgConfig/{api_type}", each_api, functools.partial(
+                    self.apigee.list_api_revisions, api_type, each_api)),
+            apis)
+        for each_api, revs in fetched:
+            self.export_data['orgConfig'][api_type][each_api] = revs
+        self._merge_deployments(api_type, snapshot, apis)
+
+    def _export_api_metadata_incremental(self, api_type, metadata):
+        """Exports API metadata against the baseline.
+
+        The revisions come from the listing, APIs whose revisions
+        or `lastModifiedAt` differ from the baseline are recorded as
+        changed. Deployments are always read from a snapshot.
+
+        Args:
+            api_type (str): The API type ('apis' or 'sharedflows').
+            metadata (dict): The listing of `list_apis_metadata`.
+        """
+        baseline_revs = self.baseline.get('orgConfig', {}).get(api_type, {})
+        baseline_modified = self.baseline.get('lastModified', {}).get(
+            api_type, {})
+        changes = []
+        for each_api, each_metadata in metadata.items():
+            revs = each_metadata['revision']
+            modified = each_metadata['lastModifiedAt']
+            self.export_data['orgConfig'][api_type][each_api] = revs
+            if (baseline_revs.get(each_api) != revs or
+                    (modified is not None and
+                     baseline_modified.get(each_api, modified) != modified)):
+                changes.append(each_api)
+        self.export_data['changes'][api_type] = changes
+        self.export_data['lastModified'][api_type] = {
+            each_api: each_metadata['lastModifiedAt']
+            for each_api, each_metadata in metadata.items()}
+        logger.info(f"{len(changes)} of {len(metadata)} {api_type} changed since the baseline")  # noqa pylint: disable=W1203
+        snapshot = self.apigee.deployment_snapshot(
+            api_type, list(self.export_data['envConfig']))
+        self._merge_deployments(api_type, snapshot, metadata)
+
+    def _merge_deployments(self, api_type, snapshot, apis):
+        """Stores the deployed revisions of a deployment snapshot.
+
+        Args:
+            api_type (str): The API type ('apis' or 'sharedflows').
+            snapshot (dict): The deployed revisions, keyed by
+                                environment and API name.
+            apis (list): The exported API or Sharedflow names.
+        """
+        listed = set(apis)
+        for env_name, deployed in snapshot.items():
+            for each_api, revisions in deployed.items():
+                if each_api not in listed:
+                    continue
+                self.export_data['envConfig'][env_name].setdefault(
+                    api_type, {})[each_api] = revisions
+
     def export_api_proxy_bundles(self, export_dir, api_types):
         """Exports API proxy and shared flow bundles.
 
@@ -332,11 +726,64 @@ class ApigeeExporter():  # pylint: disable=R0902
             logger.info(f"--Exporting {each_api_type} proxy bundle--")    # noqa pylint: disable=W1203
             # apis=self.apigee.list_apis(each_api_type)
             apis = self.export_data['orgConfig'][each_api_type].keys()
+            changes = self.export_data.get('changes', {}).get(each_api_type)
+            if changes is not None:
+                self._export_changed_bundles(
+                    each_api_type, apis, changes,
+                    f"{export_dir}/{each_api_type}")
+                continue
             args = (
                 (each_api_type, api, f"{export_dir}/{each_api_type}") for api in apis)  # noqa
-            run_parallel(self.apigee.fetch_proxy, args)
+            run_parallel(self.apigee.fetch_proxy, args, executor='thread',
+                         initializer=self.apigee.client.init_worker)
+        logger.info(f"Connection pool usage: {self.apigee.client.pool_stats()}")  # noqa pylint: disable=W1203
+        logger.info(f"GET memoization: {self.apigee.client.memo_stats()}")  # noqa pylint: disable=W1203
+        logger.info(f"HTTP cache usage: {self.apigee.client.cache_stats()}")  # noqa pylint: disable=W1203
+
+    def _export_changed_bundles(self, api_type, apis, changes, bundle_dir):
+        """Exports the bundles of an incremental export.
+
+        Bundles of unchanged APIs are kept or copied from the
+        baseline, the latest revision of changed APIs is downloaded.
 
-    def get_export_data(self, resources_list, export_dir):  # noqa pylint: disable=R0912
+        Args:
+            api_type (str): The API type ('apis' or 'sharedflows').
+            apis (list): The API or Sharedflow names.
+            changes (list): The APIs changed since the baseline.
+            bundle_dir (str): The directory to export bundles to.
+        """
+        changed = set(changes)
+        args = []
+        for api in apis:
+            file_path = f"{bundle_dir}/{api}.zip"
+            baseline_path = f"{self.baseline_dir}/{api_type}/{api}.zip"
+            if api not in changed:
+                if os.path.exists(file_path):
+                    continue
+                if self.baseline_dir and os.path.exists(baseline_path):
+                    shutil.copyfile(baseline_path, file_path)
+                    continue
+            revs = self.export_data['orgConfig'][api_type][api]
+            if revs:
+                args.append((api_type, api, revs[-1], bundle_dir,
+                             api in changed))
+        logger.info(f"Downloading {len(args)} {api_type} bundles changed since the baseline")  # noqa pylint: disable=W1203
+        run_parallel(self._fetch_bundle, args, executor='thread',
+                     initializer=self.apigee.client.init_worker)
+
+    def _fetch_bundle(self, arg_tuple):
+        """Downloads a revision bundle.
+
+        Args:
+            arg_tuple (tuple): The API type, API name, revision,
+                                export directory and whether to
+                                bypass the bundle store.
+        """
+        api_type, api, revision, bundle_dir, refresh = arg_tuple
+        self.apigee.fetch_api_revision(api_type, api, revision, bundle_dir,
+                                       refresh=refresh)
+
+    def get_export_data(self, resources_list, export_dir):
         """Orchestrates the export process.
 
         Based on the provided resource list, this method calls the
@@ -350,6 +797,15 @@ class ApigeeExporter():  # pylint: disable=R0902
         Returns:
             dict: A dictionary containing the exported configuration data.
         """
+        try:
+            return self._get_export_data(resources_list, export_dir)
+        finally:
+            self._shutdown_executor()
+            if self.journal is not None:
+                self.journal.close()
+
+    def _get_export_data(self, resources_list, export_dir):  # noqa pylint: disable=R0912
+        """Exports the resources, see `get_export_data`."""
         self.export_env()
 
         for env in self.export_data.get('envConfig', {}):
@@ -403,65 +859,103 @@ class ApigeeExporter():  # pylint: disable=R0902
         if len(env_objects) != 0:
             self.export_env_objects(env_objects, export_dir)
         if len(org_objects) != 0:
-            self.export_org_objects(org_objects)
+            self.export_org_objects(org_objects, export_dir)
+        if self.journal is not None:
+            logger.info(f"Export journal: {self.journal.stats()}")  # noqa pylint: disable=W1203
+        self.export_data['failedObjects'] = self.failed_objects
 
         return self.export_data
 
     def create_export_state(self, export_dir):
-        """Creates the export state by writing data to JSON files.
+        """Creates the export state by writing data to the export store.
 
-        Organizes the exported data and writes it to JSON files in the
-        specified directory. Creates separate directories for organization
-        and environment configurations.
+        Writes every section of the organization and environment
+        configurations to the packed export store of the specified
+        directory, see `export_store`. Sections streamed into the
+        store during the export are not written again. The sections
+        of the export data are then replaced by lazy sections of the
+        store, so their objects are no longer held in memory.
 
         Args:
             export_dir (str): The directory to create the export state in.
         """
-        create_dir(f"{export_dir}/orgConfig")
-        create_dir(f"{export_dir}/envConfig")
-
-        for resource, metadata in self.export_data["orgConfig"].items():
-            create_dir(f"{export_dir}/orgConfig/{resource}")
+        store = self._export_store(export_dir)
+        sections = [(self.export_data["orgConfig"], ('orgConfig', resource))
+                    for resource in self.export_data["orgConfig"]]
+        sections.extend((env_data, ('envConfig', env, resource))
+                        for env, env_data
+                        in self.export_data["envConfig"].items()
+                        for resource in env_data)
+        for node, path in sections:
+            metadata = node[path[-1]]
+            if ExportStore.is_stored(metadata, export_dir, *path):
+                continue
+            section = store.section(*path)
+            section.clear()
             for res_name, res_metadata in metadata.items():
-                write_json(
-                    f"{export_dir}/orgConfig/{resource}/{res_name}.json", res_metadata)  # noqa
-
-        for env, env_data in self.export_data["envConfig"].items():
-            create_dir(f"{export_dir}/envConfig/{env}")
-            for resource, metadata in env_data.items():
-                create_dir(f"{export_dir}/envConfig/{env}/{resource}")
-                for res_name, res_metadata in metadata.items():
-                    write_json(
-                        f"{export_dir}/envConfig/{env}/{resource}/{res_name}.json", res_metadata)  # noqa pylint: disable=C0301
+                section.put(res_name, res_metadata)
+        store.close()
+        for node, path in sections:
+            node[path[-1]] = ExportSection(store, '/'.join(path))
 
-    def read_export_state(self, folder_path):
-        """Reads the export state from JSON files.
+    def read_export_state(self, folder_path, lazy=True):
+        """Reads the export state.
 
-        Reads the previously exported configuration data from JSON files
-        in the specified directory.  Reconstructs the data structure
-        from the files.
+        Reads the previously exported configuration data from the
+        packed export store, verified against its manifest, or from
+        the JSON files of exports written before it, in the specified
+        directory. Reconstructs the data structure from the store or
+        the files. Files and, unless lazy, store sections are decoded
+        concurrently.
 
         Args:
             folder_path (str): The path to the directory containing
-                                    the export state.
+                                    the export state, e.g.
+                                    `<export_dir>/orgConfig`.
+            lazy (bool): Read the objects of store sections only when
+                                    they are accessed.
 
         Returns:
             dict: A dictionary containing the read configuration data.
+
+        Raises:
+            ValueError: If a store section does not match its
+                                    checksum.
         """
+        export_dir, prefix = os.path.split(os.path.normpath(folder_path))
+        if ExportStore.exists(export_dir):
+            return self._export_store(export_dir).read(
+                prefix, lazy=lazy, workers=self.workers)
         export_data = {}
-        for item in os.listdir(folder_path):
-            item_path = os.path.join(folder_path, item)
-            if os.path.isdir(item_path):
-                if export_data.get(item):
-                    export_data[item].append(self.read_export_state(item_path))
-                else:
-                    export_data[item] = self.read_export_state(item_path)
+        files = []
+        for root, dirs, names in os.walk(folder_path):
+            node = self._state_node(export_data, folder_path, root)
+            for each_dir in dirs:
+                node.setdefault(each_dir, {})
+            files.extend(os.path.join(root, name) for name in names
+                         if name.endswith('.json'))
+        for file_path, json_content in fan_out(parse_json, files,
+                                               workers=self.workers):
+            node = self._state_node(export_data, folder_path,
+                                    os.path.dirname(file_path))
+            name = os.path.basename(file_path)[:-5]
+            if isinstance(node.get(name), dict) and isinstance(json_content, dict):  # noqa pylint: disable=C0301
+                # A directory and a file of the same name are merged
+                node[name].update(json_content)
             else:
-                with open(item_path, "r") as json_file:  # noqa pylint: disable=W1514
-                    json_content = json.load(json_file)
-                    export_data[item[:-5]] = json_content
+                node[name] = json_content
         return export_data
 
+    @staticmethod
+    def _state_node(export_data, folder_path, directory):
+        """Returns the export data dict of a state directory."""
+        node = export_data
+        relative = os.path.relpath(directory, folder_path)
+        if relative != os.curdir:
+            for part in relative.split(os.sep):
+                node = node.setdefault(part, {})
+        return node
+
     def get_dependencies_data(self, dependencies):
         """Retrieves dependency data.
 
@@ -478,17 +972,20 @@ class ApigeeExporter():  # pylint: disable=R0902
         for dependency in dependencies:
             dependencies_data[dependency] = {}
             if dependency == 'references':
-                envs = self.apigee.list_environments()
+                envs = (list(self.export_data['envConfig']) or
+                        self.apigee.list_environments())
                 for env in envs:
                     dependencies_data[dependency][env] = {}
                     references = self.apigee.list_env_objects(env, dependency)
-                    for reference in references:
-                        dependencies_data[dependency][env][reference] = self.apigee.get_env_object(  # noqa pylint: disable=C0301
-                            env, dependency, reference)
+                    fetched = self._fetch_all(functools.partial(
+                        self.apigee.get_env_object, env, dependency),
+                        references)
+                    dependencies_data[dependency][env] = dict(fetched)
             else:
                 org_objects = self.apigee.list_org_objects(dependency)
-                for each_org_object in org_objects:
-                    dependencies_data[dependency][each_org_object] = self.apigee.get_org_object(  # noqa pylint: disable=C0301
-                        dependency, each_org_object)
+                fetched = self._fetch_all(functools.partial(
+                    self.apigee.get_org_object, dependency), org_objects)
+                dependencies_data[dependency] = dict(fetched)
 
+        self._shutdown_executor()
         return dependencies_data
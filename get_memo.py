@@ -0,0 +1,143 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""GET request coalescing and memoization of a RestClient."""
+
+import copy
+import time
+import threading
+import collections
+import concurrent.futures
+from urllib.parse import urlsplit
+
+
+class GetMemo():
+    """Coalesces and memoizes the GET results of a client.
+
+    Concurrent identical GETs share a single in-flight request,
+    and successful results are kept for `ttl` seconds in an LRU
+    bounded by the size of their response bodies. Error responses
+    and failed requests are not memoized.
+
+    Callers always receive their own deep copy of a result, so they
+    may modify it. Copying costs about as much as decoding the body
+    again; the memo saves the round trip, not the decoding.
+    """
+
+    def __init__(self, ttl, max_bytes):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        # Process pool tasks start with an empty memo rather than
+        # shipping every result with each pickled client.
+        state['_entries'] = collections.OrderedDict()
+        state['_in_flight'] = {}
+        state['size'] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch):
+        """Returns the memoized result of a GET, fetching it if needed.
+
+        Args:
+            key (tuple): The URL and the serialized query params.
+            fetch (callable): Sends the request and returns its
+                status code, body size in bytes and processed content.
+
+        Returns:
+            A copy of the response content.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry[2])
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return copy.deepcopy(future.result())
+        try:
+            status_code, size, value = fetch()
+        except BaseException as error:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(error)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            if (self.ttl > 0 and 200 <= status_code < 300
+                    and size <= self.max_bytes):
+                self._drop(key)
+                self._entries[key] = (time.monotonic() + self.ttl, size,
+                                      value)
+                self.size += size
+                while self.size > self.max_bytes:
+                    self.size -= self._entries.popitem(last=False)[1][1]
+        future.set_result(value)
+        return copy.deepcopy(value)
+
+    def invalidate(self, url):
+        """Drops the results affected by a change to a URL.
+
+        Drops the results of the URL, of the objects below it
+        and of the collections containing it.
+
+        Args:
+            url (str): The URL changed by a non GET request.
+        """
+        path = urlsplit(url).path.rstrip('/')
+        with self._lock:
+            for key in list(self._entries):
+                key_path = urlsplit(key[0]).path.rstrip('/')
+                if key_path.startswith(path) or path.startswith(key_path):
+                    self._drop(key)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def stats(self):
+        """Returns the memo usage.
+
+        Returns:
+            dict: Hits, coalesced requests, misses, entries and
+                their size in bytes.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'coalesced': self.coalesced,
+                    'misses': self.misses, 'entries': len(self._entries),
+                    'bytes': self.size}
@@ -0,0 +1,132 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Hedged GET support: request latency tracking and the threads
+running the hedged requests.
+
+The primary request of a hedged GET runs on a thread of its own,
+started right away, so the hedge delay is measured from the moment
+the request is sent and exporter workers are never queued behind
+each other. Only the duplicate requests go to a bounded executor.
+"""
+
+import threading
+import collections
+import concurrent.futures
+
+
+class LatencyTracker():
+    """Keeps a sliding window of request latencies.
+
+    Used to derive the delay after which a hedged GET
+    fires its duplicate request.
+    """
+
+    def __init__(self, window):
+        self._latencies = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """Records the latency of a request.
+
+        Args:
+            seconds (float): The request latency.
+        """
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, percentile, min_samples):
+        """Returns a latency percentile of the window.
+
+        Args:
+            percentile (float): The percentile, 0-100.
+            min_samples (int): Samples required for an estimate.
+
+        Returns:
+            float: The latency, or None without enough samples.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies or len(latencies) < min_samples:
+            return None
+        index = min(len(latencies) - 1,
+                    int(len(latencies) * percentile / 100))
+        return latencies[index]
+
+
+_hedge_executor_lock = threading.Lock()
+_hedge_executor = None  # pylint: disable=C0103
+
+
+def get_hedge_executor(max_workers):
+    """Returns the thread pool running the duplicate GET requests.
+
+    Args:
+        max_workers (int): The hedges in flight at once, used
+            when the executor is first created.
+
+    Returns:
+        concurrent.futures.ThreadPoolExecutor: The executor.
+    """
+    global _hedge_executor  # noqa pylint: disable=W0603
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix='hedged-get')
+        return _hedge_executor
+
+
+def start_primary(fn, *args, **kwargs):
+    """Starts the primary request of a hedged GET on its own thread.
+
+    Args:
+        fn (callable): The request function.
+        *args: Positional arguments of `fn`.
+        **kwargs: Keyword arguments of `fn`.
+
+    Returns:
+        concurrent.futures.Future: The result of `fn`.
+    """
+    future = concurrent.futures.Future()
+    future.set_running_or_notify_cancel()
+
+    def run():
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as error:  # noqa pylint: disable=W0718
+            future.set_exception(error)
+    threading.Thread(target=run, name='hedged-get-primary',
+                     daemon=True).start()
+    return future
+
+
+def close_response(future):
+    """Closes the response of a request that lost a hedge race.
+
+    Args:
+        future (concurrent.futures.Future): The request future.
+    """
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
@@ -0,0 +1,332 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Persistent on-disk cache of Management API GET responses.
+
+Responses are stored under the cache directory (by default
+`<TARGET_DIR>/http_cache`) and survive across runs, so a repeated
+assessment of the same org only downloads what changed:
+
+- Responses carrying an `ETag` or `Last-Modified` header are
+  revalidated with `If-None-Match` / `If-Modified-Since`; a
+  `304 Not Modified` is answered from the cache.
+- Other responses are reused for `HTTP_CACHE_TTL` seconds. The
+  default of 0 always refetches them, since a listing without
+  validators cannot tell that objects were added or removed.
+
+The cache is capped at `HTTP_CACHE_MAX_MB`; least recently used
+entries are evicted first. The running size of the bodies is kept in
+`cache_size.json`, so opening the cache does not walk the directory;
+eviction recounts it from disk. Entries are written atomically, so
+concurrent threads and processes can share a cache directory.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+import requests  # pylint: disable=E0401
+from requests.structures import CaseInsensitiveDict  # pylint: disable=E0401
+from base_logger import logger
+
+# Response headers kept with cached bodies
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+SIZE_FILE = 'cache_size.json'
+
+
+def cache_url(url, params=None):
+    """Returns the full URL of a request, used as cache key.
+
+    Args:
+        url (str): The URL.
+        params (dict, optional): Query parameters.
+
+    Returns:
+        str: The URL including the encoded query.
+    """
+    return requests.Request('GET', url, params=params).prepare().url
+
+
+class CacheEntry():
+    """A cached response.
+
+    Attributes:
+        url (str): The request URL.
+        status_code (int): The response status.
+        headers (dict): The cached response headers.
+        stored_at (float): When the response was fetched or last
+            revalidated, as a Unix timestamp.
+        body_path (str): The file holding the response body.
+    """
+
+    def __init__(self, url, status_code, headers, stored_at, body_path):  # noqa pylint: disable=R0913,R0917
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.stored_at = stored_at
+        self.body_path = body_path
+
+    @property
+    def validators(self):
+        """Returns the conditional request headers of the entry.
+
+        Returns:
+            dict: `If-None-Match` / `If-Modified-Since` headers,
+                empty if the server sent no validators.
+        """
+        validators = {}
+        if self.headers.get('ETag'):
+            validators['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = self.headers['Last-Modified']
+        return validators
+
+    def is_fresh(self, ttl):
+        """Returns whether the entry can be used without revalidation.
+
+        Args:
+            ttl (float): Seconds entries without validators are
+                reused for.
+
+        Returns:
+            bool: True if the entry can be used as is.
+        """
+        return (not self.validators and
+                time.time() - self.stored_at < ttl)
+
+    def to_response(self):
+        """Builds a response from the entry.
+
+        Returns:
+            requests.Response: The cached response.
+        """
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.headers = CaseInsensitiveDict(self.headers)
+        with open(self.body_path, 'rb') as fl:
+            response._content = fl.read()  # noqa pylint: disable=W0212
+        response._content_consumed = True  # noqa pylint: disable=W0212
+        response.url = self.url
+        response.request = requests.Request('GET', self.url).prepare()
+        response.encoding = 'utf-8'
+        return response
+
+
+class HttpCache():  # pylint: disable=R0902
+    """A size capped on-disk HTTP response cache.
+
+    Attributes:
+        directory (str): The cache directory.
+        ttl (float): Seconds responses without validators are
+            reused for.
+        max_bytes (int): The size cap of the cached bodies.
+    """
+
+    def __init__(self, directory, ttl=0.0, max_bytes=1024 ** 3):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.stored = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # The body size, None until read from the size file or disk
+        self._size = self._read_size()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key)
+
+    def _bodies(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.body'):
+                    yield os.path.join(root, name)
+
+    def _read_size(self):
+        try:
+            with open(os.path.join(self.directory, SIZE_FILE),
+                      encoding='utf-8') as fl:
+                return int(json.load(fl)['size_bytes'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_size(self, size):
+        """Persists the body size, must be called holding the lock."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fl:
+            json.dump({'size_bytes': size}, fl)
+        os.replace(temp_path, os.path.join(self.directory, SIZE_FILE))
+
+    def _disk_size(self):
+        return sum(os.path.getsize(path) for path in self._bodies())
+
+    def _current_size(self):
+        """Returns the body size, counted on disk if unknown."""
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_size()
+                self._write_size(self._size)
+            return self._size
+
+    def lookup(self, url):
+        """Returns the cached response of a URL.
+
+        Args:
+            url (str): The full request URL, see `cache_url`.
+
+        Returns:
+            CacheEntry: The entry, or None if not cached.
+        """
+        path = self._path(url)
+        try:
+            with open(f'{path}.json', encoding='utf-8') as fl:
+                meta = json.load(fl)
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url or not os.path.exists(f'{path}.body'):
+            return None
+        return CacheEntry(url, meta['status_code'], meta['headers'],
+                          meta['stored_at'], f'{path}.body')
+
+    def hit(self, entry, revalidated=False):
+        """Records the use of an entry.
+
+        Args:
+            entry (CacheEntry): The entry used.
+            revalidated (bool): Whether the server confirmed the
+                entry with a 304, which restarts its TTL.
+        """
+        now = time.time()
+        if revalidated:
+            entry.stored_at = now
+            self._write_meta(self._path(entry.url), entry.url,
+                             entry.status_code, entry.headers, now)
+        try:
+            os.utime(entry.body_path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            self.revalidated += int(revalidated)
+
+    def store(self, response, url, body=None, body_file=None):
+        """Caches a response.
+
+        Args:
+            response (requests.Response): The response.
+            url (str): The full request URL, see `cache_url`.
+            body (bytes, optional): The response body.
+            body_file (str, optional): A file holding the response
+                body, used instead of `body` for downloads.
+        """
+        if response.status_code != 200:
+            return
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                         suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fl:
+                if body_file is not None:
+                    with open(body_file, 'rb') as source:
+                        shutil.copyfileobj(source, fl)
+                else:
+                    fl.write(body or b'')
+            previous = (os.path.getsize(f'{path}.body')
+                        if os.path.exists(f'{path}.body') else 0)
+            os.replace(temp_path, f'{path}.body')
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        headers = {name: response.headers[name] for name in CACHED_HEADERS
+                   if response.headers.get(name)}
+        self._write_meta(path, url, response.status_code, headers,
+                         time.time())
+        added = os.path.getsize(f'{path}.body') - previous
+        with self._lock:
+            self.stored += 1
+            if self._size is None:
+                # Counted on disk, the new body included
+                self._size = self._disk_size()
+            else:
+                self._size += added
+            self._write_size(self._size)
+            over_cap = self._size > self.max_bytes
+        if over_cap:
+            self.evict()
+
+    def _write_meta(self, path, url, status_code, headers, stored_at):  # noqa pylint: disable=R0913,R0917
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                         suffix='.part')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fl:
+            json.dump({'url': url, 'status_code': status_code,
+                       'headers': headers, 'stored_at': stored_at}, fl)
+        os.replace(temp_path, f'{path}.json')
+
+    def evict(self):
+        """Evicts least recently used entries down to 90% of the cap."""
+        entries = []
+        for body_path in self._bodies():
+            try:
+                stat = os.stat(body_path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, body_path))
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for _, entry_size, body_path in entries:
+            if size <= target:
+                break
+            for suffix in ('.body', '.json'):
+                try:
+                    os.remove(body_path[:-len('.body')] + suffix)
+                except OSError:
+                    pass
+            size -= entry_size
+            evicted += 1
+        with self._lock:
+            self._size = size
+            self._write_size(size)
+        logger.debug(f"Evicted {evicted} HTTP cache entries")  # noqa pylint: disable=W1203
+
+    def stats(self):
+        """Returns the cache usage.
+
+        Returns:
+            dict: Hits, revalidations, stored responses and size.
+        """
+        size = self._current_size()
+        with self._lock:
+            return {'hits': self.hits, 'revalidated': self.revalidated,
+                    'stored': self.stored, 'size_bytes': size}
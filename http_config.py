@@ -0,0 +1,94 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""HTTP client settings of the [http] section of backend.properties."""
+
+import configparser
+
+HTTP_CONFIG_FILE = 'backend.properties'
+
+# Settings of the [http] section of backend.properties: (type, default)
+HTTP_SETTINGS = {
+    'POOL_CONNECTIONS': (int, 10),
+    'POOL_MAXSIZE': (int, 20),
+    'POOL_BLOCK': (bool, False),
+    'KEEP_ALIVE': (bool, True),
+    'CONNECT_RETRIES': (int, 3),
+    'CONNECT_BACKOFF': (float, 0.5),
+    'CONNECT_TIMEOUT': (float, 10.0),
+    'READ_TIMEOUT': (float, 60.0),
+    'HEDGE_GETS': (bool, False),
+    'HEDGE_PERCENTILE': (float, 95.0),
+    'HEDGE_MIN_SAMPLES': (int, 20),
+    'HEDGE_MIN_DELAY': (float, 0.1),
+    'HEDGE_WINDOW': (int, 200),
+    'RATE_LIMIT_PER_SEC': (float, 0.0),
+    'RATE_LIMIT_BURST': (float, 10.0),
+    'ADAPTIVE_CONCURRENCY': (bool, False),
+    'CONCURRENCY_INITIAL': (int, 10),
+    'CONCURRENCY_MIN': (int, 1),
+    'CONCURRENCY_MAX': (int, 50),
+    'THROTTLE_RETRIES': (int, 5),
+    'THROTTLE_BACKOFF': (float, 1.0),
+    'THROTTLE_MAX_DELAY': (float, 60.0),
+    'DOWNLOAD_CHUNK_SIZE': (int, 65536),
+    'LOG_BODY_MAX_BYTES': (int, 2048),
+    'LOG_SAMPLE_RATE': (float, 1.0),
+    'LOG_REDACT': (bool, True),
+    'CASSETTE_MODE': (str, 'off'),
+    'CASSETTE_FILE': (str, 'http_cassette.jsonl.gz'),
+    'CASSETTE_LATENCY_SCALE': (float, 0.0),
+    'MEMOIZE_GETS': (bool, True),
+    'MEMO_TTL': (float, 600.0),
+    'MEMO_MAX_MB': (float, 64.0),
+    'HTTP_CACHE': (bool, True),
+    'HTTP_CACHE_TTL': (float, 0.0),
+    'HTTP_CACHE_MAX_MB': (int, 1024),
+    'ACCEPT_ENCODING': (str, 'gzip, deflate'),
+}
+
+# Per method timeout overrides, e.g. FILE_GET_READ_TIMEOUT=300.
+# Unset overrides fall back to CONNECT_TIMEOUT / READ_TIMEOUT.
+REST_METHODS = ('GET', 'FILE_GET', 'POST', 'FILE_POST', 'PATCH', 'PUT',
+                'DELETE')
+HTTP_VERBS = {'GET': 'get', 'FILE_GET': 'get', 'POST': 'post',
+              'FILE_POST': 'post', 'PATCH': 'patch', 'PUT': 'put',
+              'DELETE': 'delete'}
+for _method in REST_METHODS:
+    HTTP_SETTINGS[f'{_method}_CONNECT_TIMEOUT'] = (float, None)
+    HTTP_SETTINGS[f'{_method}_READ_TIMEOUT'] = (float, None)
+
+
+def load_http_config(config_file=HTTP_CONFIG_FILE):
+    """Loads the HTTP client settings.
+
+    Reads the [http] section of backend.properties, falling
+    back to the defaults of `HTTP_SETTINGS` for missing keys.
+
+    Args:
+        config_file (str): The properties file to read.
+
+    Returns:
+        dict: The typed settings keyed by setting name.
+    """
+    cfg = configparser.ConfigParser()
+    cfg.read(config_file)
+    getters = {int: cfg.getint, float: cfg.getfloat, bool: cfg.getboolean,
+               str: cfg.get}
+    return {
+        key: getters[value_type]('http', key, fallback=default)
+        for key, (value_type, default) in HTTP_SETTINGS.items()
+    }
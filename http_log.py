@@ -0,0 +1,123 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Debug logging of HTTP responses.
+
+Response bodies are only formatted when a record is actually
+emitted: nothing is touched unless DEBUG is enabled and the
+response is sampled. Bodies are truncated to a configurable size,
+binary payloads (bundles) are never read, and credentials are
+redacted before being written.
+
+Settings ([http] section of backend.properties):
+
+- `LOG_BODY_MAX_BYTES`: Bytes of body to log, 0 logs no body.
+- `LOG_SAMPLE_RATE`: Fraction of responses to log, from 0 to 1.
+- `LOG_REDACT`: Whether to redact tokens and secrets.
+"""
+
+import re
+import random
+import logging
+from base_logger import logger
+
+TEXT_CONTENT_TYPES = ('application/json', 'text/', 'application/xml')
+
+REDACTED = '***'
+
+_SECRET_KEYS = ('access_token', 'refresh_token', 'id_token', 'token',
+                'password', 'client_secret', 'consumerSecret',
+                'consumerKey', 'secret', 'apiKey')
+
+_REDACT_PATTERNS = (
+    (re.compile(r'((?:Bearer|Basic)\s+)[A-Za-z0-9._~+/=-]+'),
+     rf'\1{REDACTED}'),
+    (re.compile(r'("(?:' + '|'.join(_SECRET_KEYS) + r')"\s*:\s*")[^"]*(")'),
+     rf'\1{REDACTED}\2'),
+    (re.compile(r'((?:' + '|'.join(_SECRET_KEYS) + r')=)[^&\s]+'),
+     rf'\1{REDACTED}'),
+)
+
+
+def redact(text):
+    """Masks tokens and secrets in a text.
+
+    Args:
+        text (str): The text to redact.
+
+    Returns:
+        str: The text with credentials replaced by `***`.
+    """
+    for pattern, replacement in _REDACT_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class LazyBody():  # noqa pylint: disable=R0903
+    """A response body formatted only when rendered.
+
+    Attributes:
+        response: The HTTP response object.
+        max_bytes (int): Bytes of body to render.
+        redact (bool): Whether to redact credentials.
+    """
+
+    def __init__(self, response, max_bytes, redact_secrets=True):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.redact = redact_secrets
+
+    def __str__(self):
+        headers = self.response.headers
+        content_type = headers.get('Content-Type') or ''
+        if self.max_bytes <= 0:
+            return '<body not logged>'
+        if not content_type.startswith(TEXT_CONTENT_TYPES):
+            length = headers.get('Content-Length', 'unknown')
+            return f'<{content_type or "binary"} body, {length} bytes>'
+        content = self.response.content or b''
+        if not isinstance(content, (bytes, str)):
+            content = str(content)
+        body = content[:self.max_bytes]
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', errors='replace')
+        if self.redact:
+            body = redact(body)
+        if len(content) > self.max_bytes:
+            body += f'... [{len(content) - self.max_bytes} more bytes]'
+        return body
+
+
+def log_response(response, http_config):
+    """Logs an HTTP response at DEBUG level.
+
+    Args:
+        response: The HTTP response object.
+        http_config (dict): The [http] settings of
+            backend.properties.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    sample_rate = http_config['LOG_SAMPLE_RATE']
+    if sample_rate < 1 and random.random() >= sample_rate:
+        return
+    url = response.request.url
+    if http_config['LOG_REDACT']:
+        url = redact(url)
+    logger.debug('Response: %s %s %s: %s', response.request.method, url,
+                 response.status_code,
+                 LazyBody(response, http_config['LOG_BODY_MAX_BYTES'],
+                          http_config['LOG_REDACT']))
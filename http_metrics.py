@@ -0,0 +1,342 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Per-endpoint HTTP metrics of the Management API calls.
+
+Every request sent by `RestClient` is recorded against its
+endpoint template, e.g. `organizations/{org}/apis/{api}/revisions`,
+so that calls to different objects of the same kind aggregate.
+For each method and template the registry keeps the request count,
+a latency histogram (p50/p95/p99), bytes in and out, status codes,
+retries and throttled responses.
+
+Metrics are kept per process: requests sent from process pool
+workers are not included in the parent's summary.
+"""
+
+import bisect
+import threading
+import collections
+from urllib.parse import urlparse, unquote
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3,
+                   0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0,
+                   30.0, 60.0, 120.0, 300.0)
+
+PERCENTILES = (50, 95, 99)
+
+# Collection names and the placeholder of the identifier following them
+PLACEHOLDERS = {
+    'organizations': '{org}',
+    'environments': '{env}',
+    'apis': '{api}',
+    'sharedflows': '{sharedflow}',
+    'revisions': '{revision}',
+    'apiproducts': '{apiproduct}',
+    'developers': '{developer}',
+    'apps': '{app}',
+    'keys': '{key}',
+    'keyvaluemaps': '{kvm}',
+    'entries': '{entry}',
+    'targetservers': '{targetserver}',
+    'keystores': '{keystore}',
+    'aliases': '{alias}',
+    'references': '{reference}',
+    'caches': '{cache}',
+    'flowhooks': '{flowhook}',
+    'virtualhosts': '{vhost}',
+    'envgroups': '{envgroup}',
+    'instances': '{instance}',
+    'attachments': '{attachment}',
+    'operations': '{operation}',
+    'reports': '{report}',
+    'companies': '{company}',
+    'userroles': '{userrole}',
+}
+
+
+def endpoint_template(url):
+    """Returns the endpoint template of a URL.
+
+    Identifiers following a known collection are replaced by
+    placeholders, the API version prefix and query are dropped.
+
+    Args:
+        url (str): The request URL.
+
+    Returns:
+        str: The template, e.g.
+            `organizations/{org}/apis/{api}/revisions/{revision}`.
+    """
+    segments = [unquote(segment) for segment
+                in urlparse(url).path.split('/') if segment]
+    if 'organizations' in segments:
+        segments = segments[segments.index('organizations'):]
+    elif segments and segments[0][:1] == 'v' and segments[0][1:].isdigit():
+        segments = segments[1:]
+    template = []
+    pending = []
+    for segment in segments:
+        if pending:
+            template.append(pending.pop(0))
+            continue
+        template.append(segment)
+        if segment == 'resourcefiles':
+            pending = ['{type}', '{name}']
+        elif segment in PLACEHOLDERS:
+            pending = [PLACEHOLDERS[segment]]
+    return '/'.join(template)
+
+
+class Histogram():
+    """A fixed bucket latency histogram.
+
+    Attributes:
+        bounds (tuple): Upper bounds of the buckets, in seconds.
+        counts (list): Observations per bucket, the last bucket
+            holds observations above the highest bound.
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        """Records an observation.
+
+        Args:
+            seconds (float): The latency.
+        """
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, percentile):
+        """Estimates a percentile of the recorded latencies.
+
+        The value is interpolated linearly within its bucket
+        and never exceeds the largest observation.
+
+        Args:
+            percentile (float): The percentile, from 0 to 100.
+
+        Returns:
+            float: The latency in seconds, or None without
+                observations.
+        """
+        if not self.total:
+            return None
+        rank = percentile / 100 * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = (self.bounds[index] if index < len(self.bounds)
+                         else self.max)
+                value = lower + (upper - lower) * (rank - seen) / count
+                return min(value, self.max)
+            seen += count
+        return self.max
+
+
+class EndpointMetrics():  # noqa pylint: disable=R0902
+    """Counters of one method and endpoint template."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttled = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.status_codes = collections.Counter()
+        self.latency = Histogram()
+
+    def to_dict(self):
+        """Returns the metrics as JSON serializable dict.
+
+        Returns:
+            dict: The counters and latency percentiles.
+        """
+        latency = {f'p{p}': self.latency.percentile(p) for p in PERCENTILES}
+        latency['max'] = self.latency.max
+        latency['mean'] = (self.latency.sum / self.latency.total
+                           if self.latency.total else None)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'status_codes': {str(code): count for code, count
+                             in sorted(self.status_codes.items())},
+            'latency_seconds': latency,
+        }
+
+
+class MetricsRegistry():
+    """Thread safe registry of per-endpoint metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = collections.defaultdict(EndpointMetrics)
+
+    def record(self, method, url, status_code, seconds,  # noqa pylint: disable=R0913,R0917
+               bytes_in=0, bytes_out=0):
+        """Records a completed request.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The request URL.
+            status_code (int): The response status, None if the
+                request failed without response.
+            seconds (float): The request latency.
+            bytes_in (int): The response body size.
+            bytes_out (int): The request body size.
+        """
+        key = (method, endpoint_template(url))
+        with self._lock:
+            metrics = self._endpoints[key]
+            metrics.requests += 1
+            metrics.latency.record(seconds)
+            metrics.bytes_in += bytes_in
+            metrics.bytes_out += bytes_out
+            if status_code is None:
+                metrics.errors += 1
+            else:
+                metrics.status_codes[status_code] += 1
+
+    def record_retry(self, method, url, throttled=False, count=1):
+        """Records retries of a request.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The request URL.
+            throttled (bool): Whether the retry follows a
+                throttled response.
+            count (int): The number of retries.
+        """
+        key = (method, endpoint_template(url))
+        with self._lock:
+            metrics = self._endpoints[key]
+            metrics.retries += count
+            if throttled:
+                metrics.throttled += count
+
+    def reset(self):
+        """Drops all recorded metrics."""
+        with self._lock:
+            self._endpoints.clear()
+
+    def summary(self):
+        """Returns the metrics of all endpoints.
+
+        Returns:
+            dict: The totals and the metrics keyed by
+                `<METHOD> <endpoint template>`.
+        """
+        with self._lock:
+            endpoints = {f'{method} {template}': metrics.to_dict()
+                         for (method, template), metrics
+                         in sorted(self._endpoints.items())}
+        totals = {key: sum(each[key] for each in endpoints.values())
+                  for key in ('requests', 'errors', 'retries', 'throttled',
+                              'bytes_in', 'bytes_out')}
+        return {'totals': totals, 'endpoints': endpoints}
+
+
+REGISTRY = MetricsRegistry()
+
+
+def summary():
+    """Returns the metrics of this process.
+
+    Returns:
+        dict: See `MetricsRegistry.summary`.
+    """
+    return REGISTRY.summary()
+
+
+def slowest_endpoints(metrics_summary, count=5):
+    """Returns the endpoints with the highest p95 latency.
+
+    Args:
+        metrics_summary (dict): A `summary()` result.
+        count (int): The number of endpoints to return.
+
+    Returns:
+        list: (endpoint, p95 seconds) tuples, slowest first.
+    """
+    latencies = [(endpoint, metrics['latency_seconds']['p95'])
+                 for endpoint, metrics
+                 in metrics_summary['endpoints'].items()
+                 if metrics['latency_seconds']['p95'] is not None]
+    return sorted(latencies, key=lambda item: item[1], reverse=True)[:count]
+
+
+def body_size(data):
+    """Returns the size of a request body.
+
+    Args:
+        data: The request body.
+
+    Returns:
+        int: The size in bytes, 0 if unknown.
+    """
+    if isinstance(data, str):
+        return len(data.encode('utf-8'))
+    if isinstance(data, bytes):
+        return len(data)
+    return 0
+
+
+def response_size(response, stream=False):
+    """Returns the size of a response body without reading it.
+
+    Args:
+        response (requests.Response): The response.
+        stream (bool): Whether the body is streamed.
+
+    Returns:
+        int: The size in bytes, 0 if unknown.
+    """
+    length = response.headers.get('Content-Length')
+    if length is not None and str(length).isdigit():
+        return int(length)
+    if stream:
+        return 0
+    content = response.content
+    return len(content) if isinstance(content, (bytes, str)) else 0
+
+
+def connect_retries(response):
+    """Returns the number of connection retries urllib3 made.
+
+    Args:
+        response (requests.Response): The response.
+
+    Returns:
+        int: The number of retries.
+    """
+    retries = getattr(getattr(response, 'raw', None), 'retries', None)
+    history = getattr(retries, 'history', None)
+    return len(history) if isinstance(history, tuple) else 0
@@ -0,0 +1,160 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Connection pooling of RestClient sessions.
+
+`PooledHTTPAdapter` is the transport adapter mounted on every
+RestClient session. It tracks the requests in flight of its
+connection pools in the process wide `POOL_STATS`, which reports
+pool saturation.
+"""
+
+import threading
+import weakref
+from requests.adapters import HTTPAdapter  # pylint: disable=E0401
+from base_logger import logger
+
+
+class PoolStats():
+    """Process wide connection pool usage of all RestClient sessions.
+
+    Counters are cumulative, so sessions of finished pool workers
+    still count towards the totals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._adapters = weakref.WeakSet()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.saturated = 0
+
+    def register(self, adapter):
+        """Tracks the connection pools of an adapter.
+
+        Args:
+            adapter (PooledHTTPAdapter): The adapter.
+        """
+        with self._lock:
+            self._adapters.add(adapter)
+
+    def request_started(self, adapter):
+        """Records a request sent through an adapter.
+
+        Args:
+            adapter (PooledHTTPAdapter): The adapter.
+        """
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            adapter.in_flight += 1
+            if adapter.in_flight > adapter.pool_maxsize:
+                self.saturated += 1
+
+    def request_finished(self, adapter):
+        """Records the end of a request sent through an adapter.
+
+        Args:
+            adapter (PooledHTTPAdapter): The adapter.
+        """
+        with self._lock:
+            self.in_flight -= 1
+            adapter.in_flight -= 1
+
+    def snapshot(self):
+        """Returns the current pool statistics.
+
+        Returns:
+            dict: Request counters, the number of requests sent
+                while their pool was saturated and the connections
+                opened by the live pools.
+        """
+        with self._lock:
+            adapters = list(self._adapters)
+            stats = {
+                'requests': self.requests,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'saturated': self.saturated,
+            }
+        stats['connections_opened'] = sum(
+            adapter.connections_opened() for adapter in adapters)
+        return stats
+
+
+POOL_STATS = PoolStats()
+
+
+def pool_stats():
+    """Returns the connection pool statistics of this process.
+
+    Returns:
+        dict: The pool statistics.
+    """
+    return POOL_STATS.snapshot()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """An HTTPAdapter that reports connection pool saturation.
+
+    A request is counted as saturated when the adapter already has
+    `pool_maxsize` requests in flight, i.e. it either waits for a
+    free connection (`POOL_BLOCK=true`) or opens a connection that
+    is discarded afterwards.
+    """
+
+    def __init__(self, pool_connections, pool_maxsize, pool_block,
+                 max_retries):
+        self.in_flight = 0
+        self.pool_maxsize = pool_maxsize
+        super().__init__(pool_connections=pool_connections,
+                         pool_maxsize=pool_maxsize, pool_block=pool_block,
+                         max_retries=max_retries)
+        POOL_STATS.register(self)
+
+    def send(self, request, **kwargs):  # noqa pylint: disable=W0221
+        """Sends a request, tracking pool usage.
+
+        Args:
+            request (requests.PreparedRequest): The request.
+            **kwargs: Arguments of `HTTPAdapter.send`.
+
+        Returns:
+            requests.Response: The response.
+        """
+        POOL_STATS.request_started(self)
+        if self.in_flight > self.pool_maxsize:
+            logger.debug(f"Connection pool saturated: {self.in_flight} requests in flight, pool_maxsize={self.pool_maxsize}")  # noqa pylint: disable=C0301,W1203
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            POOL_STATS.request_finished(self)
+
+    def connections_opened(self):
+        """Returns the connections opened by the adapter's pools.
+
+        Returns:
+            int: The number of connections.
+        """
+        pools = self.poolmanager.pools
+        total = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                total += pool.num_connections
+        return total
@@ -0,0 +1,177 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""JSON encoding and decoding with the fastest available backend.
+
+Uses `orjson` or `ujson` when installed, falling back to the
+standard library `json` module otherwise. Documents the fast
+backend rejects (e.g. integers beyond 64 bits, NaN literals) are
+handled by the standard library. The one difference between the
+backends: `orjson` encodes non-finite floats (NaN, Infinity) as
+`null`, where the standard library writes `NaN` and `Infinity`
+literals. Management API responses hold no such values.
+"""
+
+import json
+import collections.abc
+
+try:
+    import orjson  # pylint: disable=E0401
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson  # pylint: disable=E0401
+except ImportError:  # pragma: no cover
+    ujson = None
+
+if orjson is not None:
+    BACKEND = 'orjson'
+elif ujson is not None:
+    BACKEND = 'ujson'
+else:
+    BACKEND = 'json'
+
+
+def _default(data):
+    """Serializes mappings other than dict, e.g. lazy export sections."""
+    if isinstance(data, collections.abc.Mapping):
+        # Export sections are read back in one sequential scan
+        return dict(data.scan() if hasattr(data, 'scan') else data)
+    raise TypeError(f'Object of type {type(data).__name__} '
+                    f'is not JSON serializable')
+
+
+def loads(data):
+    """Decodes a JSON document.
+
+    Args:
+        data (bytes or str): The document. Bytes are decoded
+            directly, without an intermediate str.
+
+    Returns:
+        The decoded document.
+
+    Raises:
+        ValueError: If the document is not valid JSON.
+    """
+    if BACKEND == 'orjson':
+        try:
+            return orjson.loads(data)  # pylint: disable=E1101
+        except ValueError:
+            pass
+    elif BACKEND == 'ujson':
+        try:
+            return ujson.loads(data)
+        except ValueError:
+            pass
+    return json.loads(data)
+
+
+def dumps(data, indent=None):
+    """Encodes a JSON document.
+
+    Args:
+        data: The document.
+        indent (int, optional): Indent pretty printed documents
+            by 2 spaces, compact output if None.
+
+    Returns:
+        bytes: The UTF-8 encoded document. Non-finite floats are
+            encoded as `null` by `orjson`.
+
+    Raises:
+        TypeError: If the document is not JSON serializable.
+    """
+    if BACKEND == 'orjson':
+        option = orjson.OPT_NON_STR_KEYS  # pylint: disable=E1101
+        if indent:
+            option |= orjson.OPT_INDENT_2  # pylint: disable=E1101
+        try:
+            return orjson.dumps(  # pylint: disable=E1101
+                data, default=_default, option=option)
+        except TypeError:
+            pass
+    elif BACKEND == 'ujson':
+        try:
+            return ujson.dumps(data, indent=2 if indent else 0,
+                               ensure_ascii=False,
+                               escape_forward_slashes=False,
+                               default=_default).encode('utf-8')
+        except (TypeError, OverflowError):
+            pass
+    separators = None if indent else (',', ':')
+    return json.dumps(data, indent=2 if indent else None,
+                      separators=separators, ensure_ascii=False,
+                      default=_default).encode('utf-8')
+
+
+def _key(key):
+    """Encodes a mapping key the way json.dumps does."""
+    if not isinstance(key, str):
+        key = json.dumps(key)
+    return dumps(key)
+
+
+def iterdumps(data, indent=None, level=0):
+    """Encodes a JSON document one section at a time.
+
+    Mappings, including lazy export sections, are walked key by key
+    and only their leaf values are encoded at once, so the whole
+    document is never held in memory as one string.
+
+    Args:
+        data: The document.
+        indent (int, optional): Indent pretty printed documents
+            by 2 spaces, compact output if None.
+        level (int, optional): The nesting level of the document.
+
+    Yields:
+        bytes: UTF-8 encoded chunks, laid out like `dumps`.
+
+    Raises:
+        TypeError: If the document is not JSON serializable.
+    """
+    padding = b'\n' + b'  ' * level if indent else b''
+    if not isinstance(data, collections.abc.Mapping) or not data:
+        chunk = dumps(data, indent)
+        yield chunk.replace(b'\n', padding) if indent else chunk
+        return
+    inner = padding + b'  ' if indent else b''
+    separator = b': ' if indent else b':'
+    items = data.scan() if hasattr(data, 'scan') else data.items()
+    prefix = b'{'
+    for key, value in items:
+        yield prefix + inner + _key(key) + separator
+        yield from iterdumps(value, indent, level + 1)
+        prefix = b','
+    yield padding + b'}'
+
+
+def dump(data, fl, indent=None):
+    """Writes a JSON document to a binary file, streaming it.
+
+    Args:
+        data: The document.
+        fl: The binary file object to write to.
+        indent (int, optional): Indent pretty printed documents
+            by 2 spaces, compact output if None.
+
+    Raises:
+        TypeError: If the document is not JSON serializable.
+    """
+    for chunk in iterdumps(data, indent):
+        fl.write(chunk)
@@ -29,10 +29,13 @@ This module orchestrates the assessment process:
 import argparse
 import os
 
+import http_metrics
 from base_logger import logger
 from core_wrappers import (
     export_artifacts,
+    export_file_options,
     get_topology,
+    load_export_data,
     pre_validation_checks,
     qualification_report,
     validate_artifacts,
@@ -41,7 +44,32 @@ from core_wrappers import (
 from utils import parse_config, parse_json, write_json
 
 
-def main():
+def _load_legacy_export(export_data_file, export_status_file, export_status):
+    """Loads an export written before the export status file.
+
+    Args:
+        export_data_file (str): The export data file.
+        export_status_file (str): The export status file, written
+                                  from the loaded export.
+        export_status (dict): The current export status.
+
+    Returns:
+        tuple: The export data, None if the file holds no complete
+                export, and the export status.
+    """
+    export_data = parse_json(export_data_file)
+    if not export_data.get("export", False):
+        return None, export_status
+    export_status = {
+        "export": True,
+        "validation_report": bool(export_data.get("validation_report")),
+        "failedObjects": export_data.get("failedObjects", []),
+    }
+    write_json(export_status_file, export_status)
+    return export_data, export_status
+
+
+def main():  # noqa pylint: disable=R0914,R0915
     """Main function to execute the assessment workflow.
 
     Parses command-line arguments for resource selection,
@@ -127,13 +155,27 @@ def main():
     export_dir = backend_cfg.get("export", "EXPORT_DIR")
     export_file = backend_cfg.get("export", "EXPORT_FILE")
     export_data_file = f"{target_dir}/{export_dir}/{export_file}"
-    export_data = parse_json(export_data_file)
+    export_options = export_file_options(backend_cfg)
+    # The progress of earlier runs, kept apart from the export data
+    # so it is known without decoding the whole export data file
+    export_status_file = f"{target_dir}/{export_dir}/export_status.json"
+    export_status = parse_json(export_status_file)
 
     report_data_file = f"{target_dir}/{export_dir}/report.json"
+    http_metrics_file = f"{target_dir}/{export_dir}/http_metrics.json"
     report = parse_json(report_data_file)
 
-    if not export_data.get("export", False):
-        export_data["export"] = False
+    export_data = (load_export_data(cfg, backend_cfg)
+                   if export_status.get("export", False) else None)
+    if export_data is None:
+        export_data, export_status = _load_legacy_export(
+            export_data_file, export_status_file, export_status)
+    if export_data is not None:
+        export_data["export"] = True
+        export_data["failedObjects"] = export_status.get(
+            "failedObjects", [])
+    else:
+        export_status = {}
         topology_mapping = {}
 
         # Export Artifacts from Apigee OPDK/Edge (4G)
@@ -146,9 +188,14 @@ def main():
 
         export_data = export_artifacts(cfg, resources_list)
         export_data["export"] = True
-        write_json(export_data_file, export_data)
-
-    if not report.get("report", False) or not export_data.get(
+        write_json(export_data_file, export_data, **export_options)
+        export_status = {
+            "export": True,
+            "failedObjects": export_data.get("failedObjects", []),
+        }
+        write_json(export_status_file, export_status)
+
+    if not report.get("report", False) or not export_status.get(
         "validation_report", False
     ):
         report = validate_artifacts(
@@ -156,8 +203,12 @@ def main():
         )
         report["report"] = True
         export_data["validation_report"] = report
-        write_json(export_data_file, export_data)
+        write_json(export_data_file, export_data, **export_options)
         write_json(report_data_file, report)
+        export_status["validation_report"] = True
+        write_json(export_status_file, export_status)
+    else:
+        export_data["validation_report"] = report
     # Visualize artifacts
     if not os.environ.get("IGNORE_VIZ") == "true":
         visualize_artifacts(cfg, export_data, report)
@@ -170,6 +221,13 @@ def main():
     # Qualification report
     qualification_report(cfg, backend_cfg, export_data, topology_mapping)
 
+    # HTTP metrics of the Management API calls of this run
+    metrics = http_metrics.summary()
+    logger.info(f"Management API calls: {metrics['totals']}")  # noqa pylint: disable=W1203
+    for endpoint, p95 in http_metrics.slowest_endpoints(metrics):
+        logger.info(f"Slow endpoint {endpoint}: p95 {p95:.3f}s")  # noqa pylint: disable=W1203
+    write_json(http_metrics_file, metrics)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,692 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Local mock of the Apigee Edge and X/hybrid Management APIs.
+
+Serves a synthetic organization through the endpoints used by
+`classic.ApigeeClassic` and `nextgen.ApigeeNewGen`: organization,
+environments, paginated listings (`startKey`, `pageToken`,
+`expand=true`), environment objects, revisions, deployments,
+bundle downloads, `?action=validate` uploads and pod components.
+
+Latency, server errors and throttling (HTTP 429 with Retry-After)
+can be injected to load test the full pipeline locally, e.g. with
+10k proxies:
+
+    python mock_server.py --port 8080 --proxies 10000
+    python mock_server.py --port 8081 --flavor x
+
+and `SOURCE_URL=http://localhost:8080/v1`,
+`TARGET_URL=http://localhost:8081/v1` in input.properties.
+
+The `edge` flavor answers with the response shapes of Apigee Edge
+and OPDK, the `x` flavor with those of Apigee X/hybrid. Note that
+the exporter treats every source URL other than
+apigee.googleapis.com as Edge.
+"""
+
+import io
+import re
+import json
+import time
+import random
+import bisect
+import zipfile
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FLAVORS = ('edge', 'x')
+
+# lastModifiedAt of the mock APIs and Sharedflows, in epoch millis
+LAST_MODIFIED_AT = 1700000000000
+
+PODS = {
+    'gateway': ['message-processor', 'router'],
+    'central': ['management-server'],
+    'analytics': ['postgres-server', 'qpid-server'],
+}
+
+
+class MockError(Exception):
+    """An error response of the mock server.
+
+    Attributes:
+        status_code (int): The HTTP status code.
+        message (str): The error message.
+        headers (dict): Extra response headers.
+    """
+
+    def __init__(self, status_code, message, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.headers = headers or {}
+
+
+class MockOrg():  # noqa pylint: disable=R0902
+    """A synthetic Apigee organization.
+
+    Object names are generated from their index, so listings stay
+    sorted and cheap to page through even for large orgs.
+
+    Attributes:
+        name (str): The organization name.
+        flavor (str): `edge` or `x` response shapes.
+        envs (list): The environment names.
+    """
+
+    def __init__(self, name='mock-org', flavor='edge', envs=2,  # noqa pylint: disable=R0913,R0917
+                 proxies=100, sharedflows=10, developers=100, apps=200,
+                 products=20, revisions=2, env_objects=5):
+        if flavor not in FLAVORS:
+            raise ValueError(f"Unknown flavor {flavor}, "
+                             f"expected one of {FLAVORS}")
+        self.name = name
+        self.flavor = flavor
+        self.revisions = [str(rev) for rev in range(1, revisions + 1)]
+        self.envs = [f'env-{index}' for index in range(envs)]
+        self.objects = {
+            'apis': [f'proxy-{index:05d}' for index in range(proxies)],
+            'sharedflows': [f'flow-{index:05d}'
+                            for index in range(sharedflows)],
+            'developers': [f'developer-{index:05d}@example.com'
+                           for index in range(developers)],
+            'apps': [f'app-{index:06d}' for index in range(apps)],
+            'apiproducts': [f'product-{index:05d}'
+                            for index in range(products)],
+            'keyvaluemaps': [f'kvm-{index}' for index in range(env_objects)],
+            'companies': [],
+            'envgroups': ['default-group'],
+        }
+        self.env_objects = {
+            kind: [f'{kind[:-1]}-{index}' for index in range(env_objects)]
+            for kind in ('targetservers', 'keyvaluemaps', 'references',
+                         'caches', 'keystores', 'virtualhosts')
+        }
+        self.env_objects['flowhooks'] = ['PreProxyFlowHook',
+                                         'PostProxyFlowHook']
+        self.resourcefiles = [{'name': f'file-{index}.js', 'type': 'jsc'}
+                              for index in range(env_objects)]
+        self._positions = {kind: {name: index for index, name
+                                  in enumerate(names)}
+                           for kind, names in self.objects.items()}
+        self._bundles = {}
+        self._bundles_lock = threading.Lock()
+
+    def org(self):
+        """Returns the organization details."""
+        if self.flavor == 'x':
+            return {'name': self.name, 'runtimeType': 'CLOUD',
+                    'environments': self.envs}
+        return {'name': self.name, 'type': 'paid',
+                'environments': self.envs,
+                'properties': {'property': []}}
+
+    def exists(self, kind, name):
+        """Returns whether an organization object exists.
+
+        Args:
+            kind (str): The collection, e.g. `apps`.
+            name (str): The object identifier.
+
+        Returns:
+            bool: True if the object exists.
+        """
+        return name in self._positions.get(kind, {})
+
+    def entity(self, kind, name):
+        """Returns the details of an organization object.
+
+        Args:
+            kind (str): The collection, e.g. `apps`.
+            name (str): The object identifier.
+
+        Returns:
+            dict: The object details.
+        """
+        if kind == 'developers':
+            index = self._positions['developers'][name]
+            apps = self.objects['apps'][index::len(self.objects['developers'])]  # noqa pylint: disable=C0301
+            return {'email': name, 'developerId': f'dev-id-{index}',
+                    'firstName': 'Mock', 'lastName': str(index),
+                    'userName': name.split('@')[0], 'apps': apps,
+                    'status': 'active', 'attributes': []}
+        if kind == 'apps':
+            index = self._positions['apps'][name]
+            products = self.objects['apiproducts']
+            developers = self.objects['developers']
+            return {'appId': name, 'name': name, 'status': 'approved',
+                    'developerId': f'dev-id-{index % len(developers)}'
+                    if developers else '',
+                    'credentials': [{
+                        'apiProducts': [{
+                            'apiproduct': products[index % len(products)],
+                            'status': 'approved'}] if products else [],
+                        'consumerKey': f'key-{index}',
+                        'consumerSecret': f'secret-{index}',
+                        'status': 'approved'}],
+                    'attributes': []}
+        if kind == 'apiproducts':
+            index = self._positions['apiproducts'][name]
+            proxies = self.objects['apis']
+            return {'name': name, 'displayName': name,
+                    'approvalType': 'auto', 'environments': self.envs,
+                    'proxies': proxies[index::max(1, len(
+                        self.objects['apiproducts']))][:10],
+                    'scopes': [], 'attributes': []}
+        if kind == 'envgroups':
+            return {'name': name, 'hostnames': [f'{name}.example.com']}
+        return {'name': name}
+
+    def env_entity(self, env, kind, name):  # noqa pylint: disable=R0911
+        """Returns the details of an environment object.
+
+        Args:
+            env (str): The environment name.
+            kind (str): The collection, e.g. `targetservers`.
+            name (str): The object name.
+
+        Returns:
+            dict: The object details.
+        """
+        if kind == 'targetservers':
+            return {'name': name, 'host': f'{name}.{env}.example.com',
+                    'port': 443, 'isEnabled': True,
+                    'sSLInfo': {'enabled': True}}
+        if kind == 'keyvaluemaps':
+            entries = [{'name': f'key-{index}', 'value': f'value-{index}'}
+                       for index in range(3)]
+            if self.flavor == 'x':
+                return {'keyValueEntries': entries, 'nextPageToken': ''}
+            return {'name': name, 'encrypted': False, 'entry': entries}
+        if kind == 'references':
+            return {'name': name, 'refers': self.env_objects['keystores'][0],
+                    'resourceType': 'KeyStore'}
+        if kind == 'caches':
+            return {'name': name, 'expirySettings': {
+                'timeoutInSec': {'value': '300'}}}
+        if kind == 'keystores':
+            aliases = ['alias-0', 'alias-1']
+            if self.flavor == 'edge':
+                aliases = [{'aliasName': alias, 'cert': alias}
+                           for alias in aliases]
+            return {'name': name, 'aliases': aliases, 'certs': []}
+        if kind == 'virtualhosts':
+            return {'name': name, 'port': '443',
+                    'hostAliases': [f'{name}.{env}.example.com']}
+        if kind == 'flowhooks':
+            return {'flowHookPoint': name, 'continueOnError': True,
+                    'sharedFlow': (self.objects['sharedflows'] or [''])[0]}
+        return {'name': name}
+
+    def bundle(self, api_type, name, revision):
+        """Returns the zipped bundle of an API or sharedflow revision.
+
+        Args:
+            api_type (str): `apis` or `sharedflows`.
+            name (str): The API or sharedflow name.
+            revision (str): The revision.
+
+        Returns:
+            bytes: The bundle.
+        """
+        key = (api_type, name, revision)
+        with self._bundles_lock:
+            if key in self._bundles:
+                return self._bundles[key]
+        root = 'apiproxy' if api_type == 'apis' else 'sharedflowbundle'
+        tag = 'APIProxy' if api_type == 'apis' else 'SharedFlowBundle'
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as bundle:
+            bundle.writestr(
+                f'{root}/{name}.xml',
+                f'<{tag} revision="{revision}" name="{name}">'
+                f'<Description>Mock {name}</Description></{tag}>')
+            bundle.writestr(
+                f'{root}/policies/Assign-Message.xml',
+                '<AssignMessage name="Assign-Message">'
+                '<Set><Headers><Header name="x-mock">true</Header>'
+                '</Headers></Set></AssignMessage>')
+            if api_type == 'apis':
+                bundle.writestr(
+                    f'{root}/proxies/default.xml',
+                    '<ProxyEndpoint name="default"><PreFlow><Request>'
+                    '<Step><Name>Assign-Message</Name></Step></Request>'
+                    '</PreFlow><HTTPProxyConnection>'
+                    f'<BasePath>/{name}</BasePath></HTTPProxyConnection>'
+                    '<RouteRule name="default"><TargetEndpoint>default'
+                    '</TargetEndpoint></RouteRule></ProxyEndpoint>')
+                bundle.writestr(
+                    f'{root}/targets/default.xml',
+                    '<TargetEndpoint name="default"><HTTPTargetConnection>'
+                    '<URL>https://mocktarget.apigee.net</URL>'
+                    '</HTTPTargetConnection></TargetEndpoint>')
+            else:
+                bundle.writestr(
+                    f'{root}/sharedflows/default.xml',
+                    '<SharedFlow name="default"><Step>'
+                    '<Name>Assign-Message</Name></Step></SharedFlow>')
+        data = buffer.getvalue()
+        with self._bundles_lock:
+            self._bundles[key] = data
+        return data
+
+
+def page(names, start_key=None, count=None):
+    """Returns a page of a sorted listing.
+
+    Like the Management API, the page starts at `start_key`
+    itself, so clients drop the first element of next pages.
+
+    Args:
+        names (list): The sorted names.
+        start_key (str, optional): The first name of the page.
+        count (int, optional): The page size.
+
+    Returns:
+        list: The names of the page.
+    """
+    start = bisect.bisect_left(names, start_key) if start_key else 0
+    end = start + count if count else len(names)
+    return names[start:end]
+
+
+class MockApigee():  # pylint: disable=R0902,R0903
+    """Routes Management API requests to a `MockOrg`.
+
+    Attributes:
+        org (MockOrg): The organization served.
+        latency (float): Mean latency added to every request,
+            in seconds.
+        error_rate (float): Fraction of requests failing with
+            HTTP 500.
+        throttle_rate (float): Fraction of requests throttled
+            with HTTP 429.
+        max_rps (float): Requests per second above which requests
+            are throttled, 0 disables the limit.
+        retry_after (int): The Retry-After of throttled requests.
+    """
+
+    def __init__(self, org, latency=0.0, error_rate=0.0,  # noqa pylint: disable=R0913,R0917
+                 throttle_rate=0.0, max_rps=0.0, retry_after=1, seed=None):
+        self.org = org
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window = (0, 0)
+        self._routes = [
+            (re.compile(pattern), handler) for pattern, handler in (
+                (r'^servers$', self._pod_components),
+                (r'^organizations/[^/]+$', self._org),
+                (r'^organizations/[^/]+/environments$', self._environments),
+                (r'^organizations/[^/]+/deployments$', self._org_deployments),
+                (r'^organizations/[^/]+/environments/([^/]+)/deployments$',
+                 self._env_deployments),
+                (r'^organizations/[^/]+/resourcefiles$',
+                 self._org_resourcefiles),
+                (r'^organizations/[^/]+/environments/([^/]+)/resourcefiles$',
+                 self._resourcefiles),
+                (r'^organizations/[^/]+/environments/([^/]+)/resourcefiles/'
+                 r'([^/]+)/([^/]+)$', self._resourcefile),
+                (r'^organizations/[^/]+/environments/([^/]+)/keystores/'
+                 r'([^/]+)/aliases/([^/]+)(/certificate)?$', self._alias),
+                (r'^organizations/[^/]+/environments/([^/]+)/([^/]+)$',
+                 self._env_objects),
+                (r'^organizations/[^/]+/environments/([^/]+)/([^/]+)/'
+                 r'([^/]+)(/entries)?$', self._env_object),
+                (r'^organizations/[^/]+/(apis|sharedflows)/([^/]+)/'
+                 r'revisions$', self._revisions),
+                (r'^organizations/[^/]+/(apis|sharedflows)/([^/]+)/'
+                 r'revisions/([^/]+)$', self._revision),
+                (r'^organizations/[^/]+/(apis|sharedflows)/([^/]+)/'
+                 r'deployments$', self._api_deployments),
+                (r'^organizations/[^/]+/([^/]+)$', self._org_objects),
+                (r'^organizations/[^/]+/([^/]+)/([^/]+)$', self._org_object),
+            )]
+
+    def handle(self, method, path, query, body=b''):
+        """Handles a request.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The URL path.
+            query (dict): The parsed query string.
+            body (bytes): The request body.
+
+        Returns:
+            tuple: The status code, headers and body.
+        """
+        with self._lock:
+            self.requests += 1
+            draw = self._random.random()
+            jitter = self._random.random()
+        if self.latency > 0:
+            time.sleep(self.latency * (0.5 + jitter))
+        try:
+            self._inject_faults(draw)
+            status_code, content = self._route(method, path, query, body)
+        except MockError as error:
+            payload = {'code': error.status_code, 'message': error.message}
+            if self.org.flavor == 'x':
+                payload = {'error': payload}
+            return (error.status_code,
+                    {'Content-Type': 'application/json', **error.headers},
+                    json.dumps(payload).encode())
+        if isinstance(content, bytes):
+            return status_code, {'Content-Type': 'application/octet-stream'}, content  # noqa pylint: disable=C0301
+        if isinstance(content, str):
+            return status_code, {'Content-Type': 'text/plain'}, content.encode()  # noqa pylint: disable=C0301
+        return (status_code, {'Content-Type': 'application/json'},
+                json.dumps(content).encode())
+
+    def _inject_faults(self, draw):
+        """Raises the injected throttling and server errors.
+
+        Args:
+            draw (float): A random number in [0, 1).
+
+        Raises:
+            MockError: If the request is throttled or fails.
+        """
+        throttled = draw < self.throttle_rate
+        if self.max_rps > 0:
+            with self._lock:
+                second = int(time.time())
+                start, count = self._window
+                count = count + 1 if start == second else 1
+                self._window = (second, count)
+            throttled = throttled or count > self.max_rps
+        if throttled:
+            raise MockError(429, 'Too many requests',
+                            {'Retry-After': str(self.retry_after)})
+        if draw < self.throttle_rate + self.error_rate:
+            raise MockError(500, 'Injected server error')
+
+    def _route(self, method, path, query, body):
+        segments = [unquote(segment) for segment in path.split('/')
+                    if segment]
+        if segments and re.match(r'^v\d+$', segments[0]):
+            segments = segments[1:]
+        route = '/'.join(segments)
+        for pattern, handler in self._routes:
+            match = pattern.match(route)
+            if match:
+                return handler(method, query, body, *match.groups())
+        raise MockError(404, f'Unknown endpoint {path}')
+
+    def _pod_components(self, method, query, body):  # noqa pylint: disable=W0613
+        pod = query.get('pod', [''])[0]
+        return 200, [{
+            'externalHostName': f'{pod}-{component}-{index}.example.com',
+            'externalIP': f'10.0.{index}.{number}',
+            'internalHostName': f'{pod}-{component}-{index}.internal',
+            'internalIP': f'192.168.{index}.{number}',
+            'isUp': True, 'pod': pod, 'reachable': True,
+            'region': f'dc-{index + 1}', 'type': [component],
+        } for index in range(2)
+            for number, component in enumerate(PODS.get(pod, []))]
+
+    def _org(self, method, query, body):  # noqa pylint: disable=W0613
+        return 200, self.org.org()
+
+    def _environments(self, method, query, body):  # noqa pylint: disable=W0613
+        return 200, self.org.envs
+
+    def _check_env(self, env):
+        if env not in self.org.envs:
+            raise MockError(404, f'Environment {env} not found')
+
+    def _env_deployments(self, method, query, body, env):  # noqa pylint: disable=W0613
+        self._check_env(env)
+        revision = self.org.revisions[-1]
+        api_type = ('sharedflows' if query.get('sharedFlows', ['false'])[0]
+                    == 'true' else 'apis')
+        if self.org.flavor == 'x':
+            return 200, {'deployments': [
+                {'environment': env, 'apiProxy': api, 'revision': revision}
+                for api in self.org.objects[api_type]]}
+        return 200, {'name': env, 'aPIProxy': [
+            {'name': api, 'revision': [{'name': revision}]}
+            for api in self.org.objects[api_type]]}
+
+    def _org_deployments(self, method, query, body):  # noqa pylint: disable=W0613
+        if self.org.flavor != 'x':
+            raise MockError(404, 'Unknown collection deployments')
+        deployments = []
+        for env in self.org.envs:
+            deployments.extend(self._env_deployments(
+                method, query, body, env)[1]['deployments'])
+        return 200, {'deployments': deployments}
+
+    def _org_resourcefiles(self, method, query, body):  # noqa pylint: disable=W0613
+        return 200, {'resourceFile': self.org.resourcefiles}
+
+    def _resourcefiles(self, method, query, body, env):  # noqa pylint: disable=W0613
+        self._check_env(env)
+        return 200, {'resourceFile': self.org.resourcefiles}
+
+    def _resourcefile(self, method, query, body, env, file_type, name):  # noqa pylint: disable=W0613,R0913,R0917
+        self._check_env(env)
+        if {'name': name, 'type': file_type} not in self.org.resourcefiles:
+            raise MockError(404, f'Resource file {name} not found')
+        return 200, f'// {file_type} resource {name} of {env}\n'
+
+    def _alias(self, method, query, body, env, keystore, alias, certificate):  # noqa pylint: disable=W0613,R0913,R0917
+        self._check_env(env)
+        if certificate:
+            return 200, ('-----BEGIN CERTIFICATE-----\n'
+                         f'{keystore}/{alias}\n'
+                         '-----END CERTIFICATE-----\n')
+        return 200, {'alias': alias, 'keyName': alias,
+                     'certsInfo': {'certInfo': [{'subject': alias}]}}
+
+    def _env_objects(self, method, query, body, env, kind):  # noqa pylint: disable=W0613,R0913,R0917
+        self._check_env(env)
+        if kind not in self.org.env_objects:
+            raise MockError(404, f'Unknown collection {kind}')
+        return 200, self.org.env_objects[kind]
+
+    def _env_object(self, method, query, body, env, kind, name, entries):  # noqa pylint: disable=W0613,R0913,R0917
+        self._check_env(env)
+        if name not in self.org.env_objects.get(kind, []):
+            raise MockError(404, f'{kind} {name} not found')
+        data = self.org.env_entity(env, kind, name)
+        if entries and self.org.flavor == 'edge':
+            return 200, {'entry': data['entry']}
+        return 200, data
+
+    def _check_api(self, api_type, name):
+        if not self.org.exists(api_type, name):
+            raise MockError(404, f'{api_type} {name} not found')
+
+    def _revisions(self, method, query, body, api_type, name):  # noqa pylint: disable=W0613,R0913,R0917
+        self._check_api(api_type, name)
+        return 200, self.org.revisions
+
+    def _revision(self, method, query, body, api_type, name, revision):  # noqa pylint: disable=W0613,R0913,R0917
+        self._check_api(api_type, name)
+        if revision not in self.org.revisions:
+            raise MockError(404, f'Revision {revision} not found')
+        if query.get('format', [''])[0] == 'bundle':
+            return 200, self.org.bundle(api_type, name, revision)
+        return 200, {'name': name, 'revision': revision}
+
+    def _api_deployments(self, method, query, body, api_type, name):  # noqa pylint: disable=W0613,R0913,R0917
+        self._check_api(api_type, name)
+        revision = self.org.revisions[-1]
+        if self.org.flavor == 'x':
+            return 200, {'deployments': [
+                {'environment': env, 'apiProxy': name, 'revision': revision}
+                for env in self.org.envs]}
+        return 200, {'name': name, 'environment': [
+            {'name': env, 'revision': [{'name': revision}]}
+            for env in self.org.envs]}
+
+    def _org_objects(self, method, query, body, kind):  # noqa pylint: disable=R0911
+        if method == 'POST':
+            return self._create_api(query, body, kind)
+        names = self.org.objects.get(kind)
+        if names is None:
+            raise MockError(404, f'Unknown collection {kind}')
+        start_key = (query.get('startKey') or query.get('pageToken')
+                     or [None])[0]
+        count = (query.get('count') or query.get('pageSize') or [None])[0]
+        names = page(names, start_key, int(count) if count else None)
+        expand = query.get('expand', ['false'])[0].lower() == 'true'
+        if (kind in ('apis', 'sharedflows') and
+                query.get('includeRevisions', ['false'])[0] == 'true'):
+            apis = [{'name': name, 'revision': self.org.revisions,
+                     'metaData': {'lastModifiedAt': LAST_MODIFIED_AT}}
+                    for name in names]
+            if self.org.flavor == 'x':
+                return 200, {'proxies' if kind == 'apis'
+                             else 'sharedFlows': apis}
+            return 200, apis
+        if self.org.flavor == 'x':
+            expand_keys = {'apis': 'proxies', 'sharedflows': 'sharedFlows',
+                           'apps': 'app', 'developers': 'developer',
+                           'apiproducts': 'apiProduct',
+                           'envgroups': 'environmentGroups'}
+            if kind in expand_keys:
+                return 200, {expand_keys[kind]: [
+                    self.org.entity(kind, name) for name in names]}
+            return 200, names
+        if expand:
+            expand_keys = {'apps': 'app', 'developers': 'developer',
+                           'apiproducts': 'apiProduct',
+                           'companies': 'company'}
+            return 200, {expand_keys.get(kind, kind): [
+                self.org.entity(kind, name) for name in names]}
+        return 200, names
+
+    def _org_object(self, method, query, body, kind, name):  # noqa pylint: disable=W0613,R0913,R0917
+        if not self.org.exists(kind, name):
+            raise MockError(404, f'{kind} {name} not found')
+        return 200, self.org.entity(kind, name)
+
+    def _create_api(self, query, body, api_type):
+        if api_type not in ('apis', 'sharedflows'):
+            raise MockError(405, f'POST not supported on {api_type}')
+        name = query.get('name', [''])[0]
+        if b'PK\x03\x04' not in body:
+            raise MockError(400, f'Bundle of {name} is not a zip file')
+        action = query.get('action', ['import'])[0]
+        revision = '1' if action == 'validate' else str(
+            len(self.org.revisions) + 1)
+        return 200, {'name': name, 'revision': revision,
+                     'type': 'Application', 'basepaths': [f'/{name}']}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Serves requests with the `MockApigee` of the server."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, Nagle's algorithm
+    # would hold the body back until the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def _serve(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status_code, headers, content = self.server.apigee.handle(
+            self.command, url.path, parse_qs(url.query), body)
+        self.send_response(status_code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _serve  # noqa pylint: disable=C0103
+
+    def log_message(self, format, *args):  # noqa pylint: disable=W0622
+        """Silences the per-request access log."""
+
+
+def make_server(apigee, host='127.0.0.1', port=8080):
+    """Creates the mock server.
+
+    Args:
+        apigee (MockApigee): The mock API to serve.
+        host (str): The interface to listen on.
+        port (int): The port, 0 picks a free port.
+
+    Returns:
+        ThreadingHTTPServer: The server, not yet serving.
+    """
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.apigee = apigee
+    return server
+
+
+def main():
+    """Runs the mock server from the command line."""
+    parser = argparse.ArgumentParser(
+        description='Mock Apigee Management API server for load testing')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--flavor', choices=FLAVORS, default='edge',
+                        help='Response shapes of Apigee Edge/OPDK or X')
+    parser.add_argument('--org', default='mock-org')
+    parser.add_argument('--envs', type=int, default=2)
+    parser.add_argument('--proxies', type=int, default=100)
+    parser.add_argument('--sharedflows', type=int, default=10)
+    parser.add_argument('--developers', type=int, default=100)
+    parser.add_argument('--apps', type=int, default=200)
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--revisions', type=int, default=2)
+    parser.add_argument('--env-objects', type=int, default=5,
+                        help='Objects per environment collection')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Mean latency per request in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests failing with HTTP 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0,
+                        help='Fraction of requests throttled with HTTP 429')
+    parser.add_argument('--max-rps', type=float, default=0.0,
+                        help='Throttle requests above this rate')
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    org = MockOrg(args.org, args.flavor, args.envs, args.proxies,
+                  args.sharedflows, args.developers, args.apps,
+                  args.products, args.revisions, args.env_objects)
+    apigee = MockApigee(org, args.latency, args.error_rate,
+                        args.throttle_rate, args.max_rps, args.retry_after,
+                        args.seed)
+    server = make_server(apigee, args.host, args.port)
+    print(f"Serving {args.flavor} org {args.org} on "
+          f"http://{args.host}:{server.server_port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
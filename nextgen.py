@@ -20,10 +20,11 @@ This module provides a client for interacting with Apigee X or hybrid.
 It offers methods for creating and validating API proxies and sharedflows.
 """
 
+from urllib.parse import urlsplit
 from requests.utils import quote as urlencode  # pylint: disable=E0401
 from google.cloud import resourcemanager_v3  # pylint: disable=E0401
 from google.oauth2.credentials import Credentials  # pylint: disable=E0401
-from utils import parse_json
+from utils import paginate, parse_json
 from rest import RestClient
 
 class ApigeeNewGen():   # noqa pylint: disable=R0902
@@ -32,7 +33,8 @@ class ApigeeNewGen():   # noqa pylint: disable=R0902
     Provides methods to interact with Apigee X or hybrid environments,
     including creating and validating API proxies and shared flows.
     """
-    def __init__(self, baseurl, project_id, token, env_type, ssl_verify): # noqa pylint: disable=R0913,R0917
+    def __init__(self, baseurl, project_id, token, env_type, ssl_verify, # noqa pylint: disable=R0913,R0917
+                 cache_dir=None, bundle_store=None):
         """Initializes the ApigeeNewGen client.
 
         Args:
@@ -40,9 +42,15 @@ class ApigeeNewGen():   # noqa pylint: disable=R0902
             token (str): The OAuth2 access token.
             env_type (str): The environment type ('hybrid' or 'x').
                             Defaults to 'ENVIRONMENT_TYPE_UNSPECIFIED'.
+            cache_dir (str, optional): The on-disk HTTP cache
+                            directory, None disables the cache.
+            bundle_store (BundleStore, optional): The store of
+                            downloaded revision bundles.
         """
         self.baseurl = baseurl
         self.project_id = project_id
+        self.bundle_store = bundle_store
+        self.bundle_org = f"{urlsplit(baseurl).netloc}/{project_id}"
         self.token = token
         self.env_type = env_type or 'ENVIRONMENT_TYPE_UNSPECIFIED'
         self.requires_pagination = {
@@ -50,19 +58,29 @@ class ApigeeNewGen():   # noqa pylint: disable=R0902
             'developers': {'limit': 'count', 'next_key': 'startKey'},
             'apiproducts': {'limit': 'count', 'next_key': 'startKey'},
             }
-        self.can_expand = {
+        # Per resource type capabilities of the Management API:
+        # expand_key/id locate objects in listings, bulk marks
+        # listings returning full objects (with expand=true if
+        # expand_param is set). Other types are fetched one GET
+        # per object.
+        self.capabilities = {
             'apis': {'expand_key': 'proxies', 'id': 'name'},
-            'apiproducts': {'expand_key': 'apiProduct', 'id': 'name'},
+            'apiproducts': {'expand_key': 'apiProduct', 'id': 'name',
+                            'bulk': True, 'expand_param': True},
             'sharedflows': {'expand_key': 'sharedFlows', 'id': 'name'},
-            'envgroups': {'expand_key': 'environmentGroups', 'id': 'name'},
-            'apps': {'expand_key': 'app', 'id': 'appId'},
-            'developers': {'expand_key': 'developer', 'id': 'email'},
+            'envgroups': {'expand_key': 'environmentGroups', 'id': 'name',
+                          'bulk': True},
+            'apps': {'expand_key': 'app', 'id': 'appId',
+                     'bulk': True, 'expand_param': True},
+            'developers': {'expand_key': 'developer', 'id': 'email',
+                           'bulk': True, 'expand_param': True},
             'keyvaluemaps': {'expand_key': None, 'id': None},
             'environments': {'expand_key': None, 'id': None},
         }
         self.env_objects = ['keyvaluemaps', 'targetservers', 'flowhooks',
                             'keystores', 'caches']
-        self.client = RestClient('oauth', token, ssl_verify)
+        self.client = RestClient('oauth', token, ssl_verify,
+                                 cache_dir=cache_dir)
 
     def validate_permissions(self):
         """Validate if the user has right permissions.
@@ -101,8 +119,8 @@ class ApigeeNewGen():   # noqa pylint: disable=R0902
         return self.list_org_objects('environments')
 
     def _apigee_object_util(self, org_object, each_org_object_data, expand=False):  # noqa pylint: disable=C0301
-        expand_key = self.can_expand.get(org_object).get('expand_key')
-        id_key = self.can_expand.get(org_object).get('id')
+        expand_key = self.capabilities.get(org_object).get('expand_key')
+        id_key = self.capabilities.get(org_object).get('id')
         objects = []
         if isinstance(each_org_object_data, list):
             objects.extend(each_org_object_data)
@@ -130,17 +148,16 @@ class ApigeeNewGen():   # noqa pylint: disable=R0902
                 limit_param: object_count
             }
             start_url = f"{self.baseurl}/organizations/{self.project_id}/{org_object}"    # noqa
-            each_org_object_data = self.client.get(start_url, params=params)
-            each_org_object = self._apigee_object_util(org_object, each_org_object_data)  # noqa pylint: disable=C0301
-            org_objects.extend(each_org_object)
-            while len(each_org_object) > 0:
-                start_key = each_org_object[-1]
-                params[next_key] = start_key
-                each_org_object_data = self.client.get(start_url, params=params)  # noqa pylint: disable=C0301
-                each_org_object = self._apigee_object_util(org_object, each_org_object_data)  # noqa pylint: disable=C0301
-                if start_key in each_org_object:
-                    each_org_object.remove(start_key)
-                org_objects.extend(each_org_object)
+
+            def fetch(start_key):
+                page_params = dict(params)
+                if start_key is not None:
+                    page_params[next_key] = start_key
+                each_org_object_data = self.client.get(start_url, params=page_params)  # noqa pylint: disable=C0301
+                return self._apigee_object_util(org_object, each_org_object_data)  # noqa pylint: disable=C0301
+
+            for page in paginate(fetch, lambda name: name):
+                org_objects.extend(page)
         else:
             url = f"{self.baseurl}/organizations/{self.project_id}/{org_object}"  # noqa pylint: disable=C0301
             org_object_data = self.client.get(url)
@@ -153,11 +170,20 @@ class ApigeeNewGen():   # noqa pylint: disable=R0902
         Returns:
             list: A list containing the org object details.
         """
-        org_objects = {}
+        id_key = self.capabilities.get(org_object).get('id')
+        return {each_item[id_key]: each_item
+                for page in self.iter_org_objects_expand(org_object)
+                for each_item in page}
+
+    def iter_org_objects_expand(self, org_object):
+        """Streams org objects of the Apigee organization.
+
+        Yields:
+            list: The expanded org objects of each page.
+        """
         object_count = 100
-        expand_param = ['developers', 'apiproducts']
         next_key = self.requires_pagination.get(org_object, {}).get('next_key', None)  # noqa
-        id_key = self.can_expand.get(org_object).get('id')
+        id_key = self.capabilities.get(org_object).get('id')
         limit_key = self.requires_pagination.get(org_object, {}).get('limit', None)  # noqa pylint: disable=C0301
         if next_key is None:
             params = {}
@@ -165,25 +191,22 @@ class ApigeeNewGen():   # noqa pylint: disable=R0902
             params = {
                 limit_key: object_count,
             }
-        if org_object in expand_param:
+        if self.capabilities.get(org_object).get('expand_param'):
             params['expand'] = True
         start_url = f"{self.baseurl}/organizations/{self.project_id}/{org_object}"    # noqa
-        each_org_object_data = self.client.get(start_url, params=params)
-        each_org_object = self._apigee_object_util(org_object, each_org_object_data, True)    # noqa
-        for each_item in each_org_object:
-            org_objects[each_item[id_key]] = each_item
+
+        def fetch(start_key):
+            page_params = dict(params)
+            if start_key is not None:
+                page_params[next_key] = start_key
+            each_org_object_data = self.client.get(start_url, params=page_params)  # noqa pylint: disable=C0301
+            return self._apigee_object_util(org_object, each_org_object_data, True)  # noqa pylint: disable=C0301
+
+        # Listings without a cursor parameter are not paginated
         if next_key is None:
-            return org_objects
-        while len(each_org_object) > 0:
-            start_key = each_org_object[-1].get(id_key)    # noqa
-            params[next_key] = start_key    # noqa
-            each_org_object_data = self.client.get(start_url, params=params)
-            each_org_object = self._apigee_object_util(org_object, each_org_object_data, True)       # noqa pylint: disable=C0301
-            if each_org_object:
-                each_org_object.pop(0)
-            for each_item in each_org_object:
-                org_objects[each_item[id_key]] = each_item
-        return org_objects
+            yield fetch(None)
+        else:
+            yield from paginate(fetch, lambda item: item.get(id_key))
 
     def get_org_object(self, org_object, org_object_name):
         """Retrieves details of a specific organization-level object.
@@ -277,6 +300,34 @@ class ApigeeNewGen():   # noqa pylint: disable=R0902
         apis = self.list_org_objects(api_type)
         return apis
 
+    def list_apis_metadata(self, api_type):
+        """Lists APIs or Sharedflows with their revisions and metadata.
+
+        Uses one listing with `includeRevisions` and `includeMetaData`
+        instead of one revisions call per API.
+
+        Args:
+            api_type (str): The type of API - 'apis' or 'sharedflows'.
+
+        Returns:
+            dict: The revision numbers (`revision`) and `lastModifiedAt`
+                of each API or Sharedflow keyed by name, or None if
+                the Management API only lists the names.
+        """
+        url = f"{self.baseurl}/organizations/{self.project_id}/{api_type}"
+        apis = self.client.get(url, params={'includeRevisions': 'true',
+                                            'includeMetaData': 'true'})
+        expand_key = self.capabilities.get(api_type).get('expand_key')
+        metadata = {}
+        for api in (apis or {}).get(expand_key, []):
+            if 'revision' not in api:
+                return None
+            metadata[api['name']] = {
+                'revision': api['revision'],
+                'lastModifiedAt': api.get('metaData', {}).get(
+                    'lastModifiedAt')}
+        return metadata
+
     def list_api_revisions(self, api_type, api_name):
         """Lists revisions of a specific API or Sharedflow.
 
@@ -329,7 +380,32 @@ class ApigeeNewGen():   # noqa pylint: disable=R0902
         apis_list = [api.get('apiProxy') for api in deployments]
         return apis_list
 
-    def fetch_api_revision(self, api_type, api_name, revision, export_dir):
+    def deployment_snapshot(self, api_type, envs):
+        """Retrieves the deployed revisions of all APIs or Sharedflows.
+
+        Uses the org-level deployments call instead of one per API
+        or Sharedflow.
+
+        Args:
+            api_type (str): The type of API - 'apis' or 'sharedflows'.
+            envs (list): The environment names.
+
+        Returns:
+            dict: The deployed revision numbers, keyed by environment
+                and API or Sharedflow name.
+        """
+        params = {'sharedFlows': 'true' if api_type == 'sharedflows' else 'false'}  # noqa pylint: disable=C0301
+        url = f"{self.baseurl}/organizations/{self.project_id}/deployments"
+        deployments_data = self.client.get(url, params=params)
+        snapshot = {env: {} for env in envs}
+        for dep in (deployments_data or {}).get('deployments', []):
+            deployed = snapshot.setdefault(dep.get('environment'), {})
+            deployed.setdefault(dep.get('apiProxy'), []).append(
+                dep.get('revision'))
+        return snapshot
+
+    def fetch_api_revision(self, api_type, api_name, revision, export_dir,  # noqa pylint: disable=R0913,R0917
+                           refresh=False):
         """Downloads the bundle for a specific API or Sharedflow revision.
 
         Args:
@@ -337,22 +413,25 @@ class ApigeeNewGen():   # noqa pylint: disable=R0902
             api_name (str): The name of the API or Sharedflow.
             revision (str): The revision number.
             export_dir (str): The directory to save the bundle to.
-        """
-        url = f"{self.baseurl}/organizations/{self.project_id}/{api_type}/{api_name}/revisions/{revision}?format=bundle"  # noqa pylint: disable=C0301
-        bundle = self.client.file_get(url)
-        self._write_proxy_bundle(export_dir, api_name, bundle)
-
-    def _write_proxy_bundle(self, export_dir, file_name, data):
-        """Writes a proxy bundle to a file.
+            refresh (bool): Download the bundle even if it is in the
+                bundle store, e.g. after the revision was updated.
 
-        Args:
-            export_dir (str): The directory to write the file to.
-            file_name (str): The name of the file.
-            data (bytes): The bundle data.
+        Returns:
+            dict: The SHA-256 digest and size of the bundle.
+                Revisions already in the bundle store are copied
+                from it instead of downloaded.
         """
-        file_path = f"./{export_dir}/{file_name}.zip"
-        with open(file_path, 'wb') as fl:
-            fl.write(data)
+        file_path = f"./{export_dir}/{api_name}.zip"
+        bundle_key = (self.bundle_org, api_type, api_name, revision)
+        if self.bundle_store is not None and not refresh:
+            stored = self.bundle_store.get(*bundle_key, file_path)
+            if stored is not None:
+                return stored
+        url = f"{self.baseurl}/organizations/{self.project_id}/{api_type}/{api_name}/revisions/{revision}?format=bundle"  # noqa pylint: disable=C0301
+        result = self.client.file_download(url, file_path)
+        if self.bundle_store is not None:
+            self.bundle_store.put(*bundle_key, file_path, result['sha256'])
+        return result
 
     def fetch_proxy(self, arg_tuple):
         """Fetches the latest revision of an API proxy bundle.
@@ -35,6 +35,7 @@ from qualification_report_mapping.header_mapping import (
     sharded_proxies,
     org_resourcefiles,
     validation_report,
+    failed_objects,
 )
 from qualification_report_mapping.report_summary import report_summary
 from base_logger import logger
@@ -1063,6 +1064,38 @@ class QualificationReport():  # noqa pylint: disable=R0902,R0904
         self.qualification_report_info_box(
             org_resourcefiles, org_resourcefiles_sheet)
 
+    def report_failed_objects(self):
+        """Generates the "Failed Objects" report sheet."""
+
+        logger.info(
+            '------------------- Failed Objects -----------------------')  # noqa
+        failed_objects_sheet = self.workbook.add_worksheet(
+            name='Failed Objects')
+
+        # Headings
+        self.qualification_report_heading(
+            failed_objects["headers"], failed_objects_sheet)
+
+        row = 1
+
+        for failed in self.export_data.get('failedObjects', []):
+            col = 0
+            failed_objects_sheet.write(row, col, self.org_name)
+            col += 1
+            failed_objects_sheet.write(row, col, failed['env'])
+            col += 1
+            failed_objects_sheet.write(row, col, failed['type'])
+            col += 1
+            failed_objects_sheet.write(row, col, failed['name'] or '')
+            col += 1
+            failed_objects_sheet.write(row, col, failed['error'])
+
+            row += 1
+        failed_objects_sheet.autofit()
+        # Info block
+        self.qualification_report_info_box(
+            failed_objects, failed_objects_sheet)
+
     def report_network_topology(self):
         """Generates the "Apigee (4G) components" report sheet (Topology)."""
 
@@ -64,3 +64,5 @@ org_resourcefiles = parse_json(
     "./qualification_report_mapping_json/org_resourcefiles.json")
 validation_report = parse_json(
     "./qualification_report_mapping_json/validation_report.json")
+failed_objects = parse_json(
+    "./qualification_report_mapping_json/failed_objects.json")
@@ -0,0 +1,195 @@
+#!/usr/bin/python
+
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License
+
+"""Adaptive rate limiting for Apigee Management API calls.
+
+This module provides a per-host limiter combining a token bucket
+(requests per second) with AIMD adaptive concurrency: the number of
+requests allowed in flight is halved whenever the server throttles
+(HTTP 429/503) and grows additively while responses are healthy.
+A `Retry-After` received by one worker pauses every worker sending
+to that host.
+
+Limiter state lives in shared memory, so a limiter is shared by
+threads and by forked process pool workers.
+"""
+
+import time
+import threading
+import email.utils
+import multiprocessing
+from urllib.parse import urlparse
+from base_logger import logger
+
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Indexes in the shared limiter state
+_TOKENS, _LAST_REFILL, _PAUSED_UNTIL, _LIMIT, _IN_FLIGHT = range(5)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class HostLimiter():
+    """Token bucket and AIMD concurrency limiter for one host.
+
+    Attributes:
+        rate (float): Allowed requests per second, 0 disables
+            the token bucket.
+        burst (float): Token bucket capacity.
+        adaptive (bool): Whether AIMD concurrency is enabled.
+        min_concurrency (int): Lower concurrency bound.
+        max_concurrency (int): Upper concurrency bound.
+    """
+
+    def __init__(self, rate=0.0, burst=10.0, adaptive=False,  # noqa pylint: disable=R0913,R0917
+                 initial_concurrency=10, min_concurrency=1,
+                 max_concurrency=50, poll_interval=0.01):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.adaptive = adaptive
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.poll_interval = poll_interval
+        self._state = multiprocessing.Array(
+            'd', [self.burst, time.time(), 0.0,
+                  float(initial_concurrency), 0.0])
+
+    def acquire(self):
+        """Blocks until a request may be sent to the host."""
+        while True:
+            with self._state.get_lock():
+                wait = self._try_acquire(time.time())
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _try_acquire(self, now):
+        """Takes a token and a concurrency slot if available.
+
+        Must be called holding the state lock.
+
+        Args:
+            now (float): The current time.
+
+        Returns:
+            float: 0 if acquired, else the seconds to wait.
+        """
+        state = self._state
+        if state[_PAUSED_UNTIL] > now:
+            return state[_PAUSED_UNTIL] - now
+        if self.adaptive and state[_IN_FLIGHT] >= max(1, int(state[_LIMIT])):  # noqa pylint: disable=C0301
+            return self.poll_interval
+        if self.rate > 0:
+            elapsed = max(0.0, now - state[_LAST_REFILL])
+            state[_TOKENS] = min(self.burst,
+                                 state[_TOKENS] + elapsed * self.rate)
+            state[_LAST_REFILL] = now
+            if state[_TOKENS] < 1:
+                return (1 - state[_TOKENS]) / self.rate
+            state[_TOKENS] -= 1
+        state[_IN_FLIGHT] += 1
+        return 0
+
+    def release(self, throttled=False):
+        """Releases a request slot and adapts the concurrency.
+
+        Args:
+            throttled (bool): Whether the server throttled the
+                request. Failed requests count as throttled, as
+                timeouts and dropped connections signal congestion.
+        """
+        with self._state.get_lock():
+            state = self._state
+            state[_IN_FLIGHT] = max(0.0, state[_IN_FLIGHT] - 1)
+            if not self.adaptive:
+                return
+            if throttled:
+                state[_LIMIT] = max(float(self.min_concurrency),
+                                    state[_LIMIT] / 2)
+                logger.info(f"Throttled, reducing concurrency to {int(state[_LIMIT])}")  # noqa pylint: disable=W1203
+            else:
+                state[_LIMIT] = min(float(self.max_concurrency),
+                                    state[_LIMIT] + 1 / state[_LIMIT])
+
+    def pause(self, seconds):
+        """Pauses all requests to the host.
+
+        Args:
+            seconds (float): The pause duration.
+        """
+        with self._state.get_lock():
+            self._state[_PAUSED_UNTIL] = max(self._state[_PAUSED_UNTIL],
+                                             time.time() + seconds)
+
+    @property
+    def concurrency(self):
+        """Returns the current concurrency limit.
+
+        Returns:
+            int: The number of requests allowed in flight.
+        """
+        return max(1, int(self._state[_LIMIT]))
+
+
+def get_limiter(url, http_config):
+    """Returns the shared limiter of the host of a URL.
+
+    Args:
+        url (str): The request URL.
+        http_config (dict): The [http] settings of
+            backend.properties.
+
+    Returns:
+        HostLimiter: The limiter, or None if both rate limiting
+            and adaptive concurrency are disabled.
+    """
+    rate = http_config['RATE_LIMIT_PER_SEC']
+    adaptive = http_config['ADAPTIVE_CONCURRENCY']
+    if rate <= 0 and not adaptive:
+        return None
+    host = urlparse(url).netloc
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = HostLimiter(
+                rate=rate, burst=http_config['RATE_LIMIT_BURST'],
+                adaptive=adaptive,
+                initial_concurrency=http_config['CONCURRENCY_INITIAL'],
+                min_concurrency=http_config['CONCURRENCY_MIN'],
+                max_concurrency=http_config['CONCURRENCY_MAX'])
+        return _limiters[host]
+
+
+def parse_retry_after(value):
+    """Parses a Retry-After header.
+
+    Args:
+        value (str): Delay in seconds or an HTTP date.
+
+    Returns:
+        float: The delay in seconds, or None if unparsable.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
@@ -29,8 +29,24 @@ Pythonic interface.
 """
 
 import json
+import time
+import threading
+import concurrent.futures
 import requests  # pylint: disable=E0401
 from urllib3.exceptions import InsecureRequestWarning  # pylint: disable=E0401
+from urllib3.util.retry import Retry  # pylint: disable=E0401
+import cassette
+import ratelimit
+import http_cache
+import http_log
+import http_metrics
+import json_codec
+from atomic_file import read_chunks, write_atomically
+from get_memo import GetMemo
+from hedging import (LatencyTracker, close_response, get_hedge_executor,
+                     start_primary)
+from http_config import HTTP_VERBS, load_http_config
+from http_pool import PooledHTTPAdapter, pool_stats
 from base_logger import logger, EXEC_INFO
 
 # Suppress the warnings from urllib3
@@ -39,21 +55,73 @@ requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)   #
 UNKNOWN_ERROR = 'internal.unknown'
 
 
+def _body(response):
+    """Returns the body of a response, undecoded when possible.
+
+    JSON is decoded straight from the raw bytes, which avoids
+    building an intermediate str of the whole body.
+
+    Args:
+        response (requests.Response): The response.
+
+    Returns:
+        bytes or str: The body.
+    """
+    content = response.content
+    return content if isinstance(content, bytes) else response.text
+
+
+# Sessions built by pool initializers, one registry per worker thread.
+# Process pool workers run their tasks on a single thread, so this is
+# also one registry per worker process.
+_worker_state = threading.local()
+
+
+def _rewind_files(files):
+    """Rewinds the file objects of an upload before resending it.
+
+    Args:
+        files (dict or list): The `files` argument of the request.
+    """
+    if not files:
+        return
+    values = files.values() if isinstance(files, dict) else (
+        value for _, value in files)
+    for value in values:
+        file_obj = value[1] if isinstance(value, tuple) else value
+        if hasattr(file_obj, 'seek'):
+            file_obj.seek(0)
+
+
+def _worker_sessions():
+    """Returns the session registry of the current worker.
+
+    Returns:
+        dict: Sessions keyed by RestClient session key.
+    """
+    if not hasattr(_worker_state, 'sessions'):
+        _worker_state.sessions = {}
+    return _worker_state.sessions
+
+
 class ApigeeError(Exception):
     """Represents an error during interaction with
     the Apigee management API.
     """
-    def __init__(self, status_code, error_code, message):
+    def __init__(self, status_code, error_code, message, retry_after=None):
         """Initializes an ApigeeError.
 
         Args:
             status_code (int): The HTTP status code.
             error_code (str): The Apigee error code.
             message (str):  A descriptive error message.
+            retry_after (float, optional): Seconds to wait before
+                retrying, from a Retry-After header.
         """
         self.status_code = status_code
         self.error_code = error_code
         self.message = message
+        self.retry_after = retry_after
 
     def __str__(self):
         """Returns a string representation of the error.
@@ -85,27 +153,143 @@ class RestClient(object):  # noqa pylint: disable=R0205
         ssl_verify (bool): Whether to verify SSL
             certificates (default: True).
         session (requests.Session): The underlying
-            requests session object.
+            requests session object. Inside a pool worker
+            prepared with `init_worker`, this is the
+            worker's persistent session.
         base_headers (dict): Default headers for
             all requests.
+        http_config (dict): Connection pool and retry
+            settings, see `load_http_config`.
     """
 
-    def __init__(self, auth_type, token, ssl_verify=True):
+    def __init__(self, auth_type, token, ssl_verify=True, http_config=None,  # noqa pylint: disable=R0913,R0917
+                 cache_dir=None):
         self._allowed_auth_types = ['basic', 'oauth']
-        self.session = requests.Session()
-        self.session.verify = ssl_verify
         if auth_type not in self._allowed_auth_types:
             raise ValueError(
                 f'Unknown Auth type , Allowed types are {" ,".join(self._allowed_auth_types)}')   # noqa pylint: disable=C0301
         self.auth_type = auth_type
+        self.ssl_verify = ssl_verify
+        self.http_config = http_config or load_http_config()
+        self._latency = LatencyTracker(self.http_config['HEDGE_WINDOW'])
+        self._memo = GetMemo(self.http_config['MEMO_TTL'],
+                             self.http_config['MEMO_MAX_MB'] * 1024 ** 2)
+        self._cache = None
+        if cache_dir and self.http_config['HTTP_CACHE']:
+            self._cache = http_cache.HttpCache(
+                cache_dir, ttl=self.http_config['HTTP_CACHE_TTL'],
+                max_bytes=self.http_config['HTTP_CACHE_MAX_MB'] * 1024 ** 2)
 
         self.base_headers = {
             'Authorization': f'Basic {token}' if auth_type == 'basic' else f'Bearer {token}'   # noqa pylint: disable=C0301
         }
+        self._session = self._new_session()
+
+    def __getstate__(self):
+        """Drops the session when pickled for process pool workers.
+
+        Returns:
+            dict: The picklable client state.
+        """
+        state = self.__dict__.copy()
+        state['_session'] = None
+        return state
+
+    @property
+    def session(self):
+        """Returns the session used for requests.
+
+        Prefers the session registered for this client by a
+        pool initializer, so every task run by a worker reuses
+        the same TCP/TLS connections.
+
+        Returns:
+            requests.Session: The session.
+        """
+        worker_session = _worker_sessions().get(self._session_key())
+        if worker_session is not None:
+            return worker_session
+        if self._session is None:
+            self._session = self._new_session()
+        return self._session
+
+    def init_worker(self):
+        """Pool initializer building this worker's persistent session.
+
+        Pass it as `initializer` to `utils.run_parallel` so each
+        worker builds one authenticated, connection-pooled session
+        and reuses it for every task it runs.
+        """
+        sessions = _worker_sessions()
+        if self._session_key() not in sessions:
+            sessions[self._session_key()] = self._new_session()
+
+    def _session_key(self):
+        """Returns the key identifying sessions of this client.
+
+        Returns:
+            tuple: The auth header and SSL verification flag.
+        """
+        return (self.base_headers['Authorization'], self.ssl_verify)
+
+    def memo_stats(self):
+        """Returns the GET memoization usage of this client.
+
+        Returns:
+            dict: See `GetMemo.stats`.
+        """
+        return self._memo.stats()
+
+    def cache_stats(self):
+        """Returns the on-disk HTTP cache usage of this client.
+
+        Returns:
+            dict: See `HttpCache.stats`, None without cache.
+        """
+        return self._cache.stats() if self._cache is not None else None
+
+    def pool_stats(self):
+        """Returns the connection pool statistics.
+
+        Returns:
+            dict: The pool statistics of this process.
+        """
+        return pool_stats()
+
+    def _new_session(self):
+        """Creates a new requests session with a tuned connection pool.
+
+        In cassette record or replay mode the pool adapter is
+        wrapped or replaced, see `cassette`.
+
+        Returns:
+            requests.Session: The session.
+        """
+        session = requests.Session()
+        session.verify = self.ssl_verify
+        retries = Retry(total=self.http_config['CONNECT_RETRIES'],
+                        connect=self.http_config['CONNECT_RETRIES'],
+                        read=0, status=0, other=0,
+                        backoff_factor=self.http_config['CONNECT_BACKOFF'],
+                        raise_on_status=False)
+        adapter = PooledHTTPAdapter(
+            pool_connections=self.http_config['POOL_CONNECTIONS'],
+            pool_maxsize=self.http_config['POOL_MAXSIZE'],
+            pool_block=self.http_config['POOL_BLOCK'],
+            max_retries=retries)
+        cassette.mount_cassette(session, adapter, self.http_config)
+        session.headers.update(
+            {'Accept-Encoding': self.http_config['ACCEPT_ENCODING']})
+        if not self.http_config['KEEP_ALIVE']:
+            session.headers['Connection'] = 'close'
+        return session
 
     def get(self, url, params=None):
         """Makes a GET request.
 
+        Identical GETs are coalesced and memoized for the
+        run, see `GetMemo`.
+
         Args:
             url (str): The URL to send the request to.
             params (dict, optional): Query parameters.
@@ -117,10 +301,16 @@ class RestClient(object):  # noqa pylint: disable=R0205
             ApigeeError: If the API request returns
                 an error.
         """
-        headers = self.base_headers.copy()
-        response = self.session.get(url, params=params, headers=headers)
-        logger.debug(f"Response: {response.content}")  # noqa pylint: disable=W1203
-        return self._process_response(response)
+        def fetch():
+            headers = self.base_headers.copy()
+            response = self._cached_request('GET', url, params=params,
+                                            headers=headers)
+            return (response.status_code, len(response.content or b''),
+                    self._process_response(response))
+        if not self.http_config['MEMOIZE_GETS']:
+            return fetch()[2]
+        key = (url, json.dumps(params, sort_keys=True, default=str))
+        return self._memo.get(key, fetch)
 
     def file_get(self, url, params=None):
         """Makes a GET request for file download.
@@ -136,11 +326,78 @@ class RestClient(object):  # noqa pylint: disable=R0205
             ApigeeError: If an error occurs.
         """
         headers = self.base_headers.copy()
-        response = self.session.get(
-            url, params=params, headers=headers, stream=True)
-        logger.debug(f"Response: {response.content}")  # noqa pylint: disable=W1203
+        response = self._cached_request(
+            'FILE_GET', url, params=params, headers=headers, stream=True)
         return self._process_response(response)
 
+    def file_download(self, url, file_path, params=None, use_cache=True):
+        """Streams a file download straight to disk.
+
+        Chunks are written to a temporary file next to
+        `file_path`, hashed on the fly, and the file is renamed
+        into place once complete, so memory use does not depend
+        on the file size and readers never see partial files.
+
+        Args:
+            url (str): The URL.
+            file_path (str): The destination file.
+            params (dict, optional): Query parameters.
+            use_cache (bool): Whether the HTTP cache serves and
+                keeps the download. Callers keeping the file in a
+                store of their own disable it.
+
+        Returns:
+            dict: The `sha256` hex digest and `size` in bytes
+                of the downloaded file.
+
+        Raises:
+            ApigeeError: If the server returns an error.
+        """
+        chunk_size = self.http_config['DOWNLOAD_CHUNK_SIZE']
+        headers = self.base_headers.copy()
+        # Bundles are zip archives, compressing them again only
+        # costs CPU on both ends.
+        headers['Accept-Encoding'] = 'identity'
+        key = entry = None
+        cache = self._cache if use_cache else None
+        if cache is not None:
+            key = http_cache.cache_url(url, params)
+            entry = cache.lookup(key)
+            if entry is not None and entry.is_fresh(cache.ttl):
+                cache.hit(entry)
+                return write_atomically(
+                    file_path, read_chunks(entry.body_path, chunk_size))
+            if entry is not None:
+                headers.update(entry.validators)
+        response = self._request(
+            'FILE_GET', url, params=params, headers=headers, stream=True)
+        try:
+            if response.status_code == 304 and entry is not None:
+                cache.hit(entry, revalidated=True)
+                return write_atomically(
+                    file_path, read_chunks(entry.body_path, chunk_size))
+            if response.status_code >= 400:
+                # An unparsable error body yields no Response
+                error = (self._parse(response) or
+                         EmptyResponse(response.status_code))
+                logger.warning(f"GET Access to URL {url} returned {response.status_code}")  # noqa pylint: disable=W1203
+                retry_after = None
+                if response.status_code in ratelimit.THROTTLE_STATUS_CODES:
+                    retry_after = ratelimit.parse_retry_after(
+                        response.headers.get('Retry-After'))
+                raise ApigeeError(status_code=response.status_code,
+                                  error_code=error._error_code(),  # noqa pylint: disable=W0212
+                                  message=error._error_message(),  # noqa pylint: disable=W0212
+                                  retry_after=retry_after)
+            result = write_atomically(
+                file_path, response.iter_content(chunk_size=chunk_size))
+        finally:
+            response.close()
+        if cache is not None:
+            cache.store(response, key, body_file=file_path)
+        logger.debug(f"Downloaded {result['size']} bytes from {url} to {file_path}")  # noqa pylint: disable=W1203
+        return result
+
     def post(self, url, data=None):
         """Makes a POST request.
 
@@ -155,9 +412,8 @@ class RestClient(object):  # noqa pylint: disable=R0205
             ApigeeError: If an error occurs.
         """
         headers = self.base_headers.copy()
-        response = self.session.post(
-            url, data=json.dumps(data or {}), headers=headers)
-        logger.debug(f"Response: {response.content}")  # noqa pylint: disable=W1203
+        response = self._request(
+            'POST', url, data=json.dumps(data or {}), headers=headers)
         return self._process_response(response)
 
     def file_post(self, url, params=None, data=None, files=None):
@@ -178,9 +434,9 @@ class RestClient(object):  # noqa pylint: disable=R0205
         """
         headers = self.base_headers.copy()
         headers['Content-Type'] = 'application/octet-stream'
-        response = self.session.post(
-            url, data=data, files=files, headers=headers, params=params)
-        logger.debug(f"Response: {response.content}")  # noqa pylint: disable=W1203
+        response = self._request(
+            'FILE_POST', url, data=data, files=files, headers=headers,
+            params=params)
         return self._process_response(response)
 
     def patch(self, url, data=None):
@@ -197,9 +453,8 @@ class RestClient(object):  # noqa pylint: disable=R0205
             ApigeeError:  If an error occurs.
         """
         headers = self.base_headers.copy()
-        response = self.session.patch(
-            url, data=json.dumps(data or {}), headers=headers)
-        logger.debug(f"Response: {response.content}")  # noqa pylint: disable=W1203
+        response = self._request(
+            'PATCH', url, data=json.dumps(data or {}), headers=headers)
         return self._process_response(response)
 
     def put(self, url, data=None):
@@ -216,9 +471,8 @@ class RestClient(object):  # noqa pylint: disable=R0205
             ApigeeError: If an error occurs.
         """
         headers = self.base_headers.copy()
-        response = self.session.put(
-            url, data=json.dumps(data or {}), headers=headers)
-        logger.debug(f"Response: {response.content}")  # noqa pylint: disable=W1203
+        response = self._request(
+            'PUT', url, data=json.dumps(data or {}), headers=headers)
         return self._process_response(response)
 
     def delete(self, url, params=None):
@@ -235,10 +489,236 @@ class RestClient(object):  # noqa pylint: disable=R0205
             ApigeeError: If an error occurs.
         """
         headers = self.base_headers.copy()
-        response = self.session.delete(url, headers=headers, params=params or {})     # noqa pylint: disable=C0301
-        logger.debug(f"Response: {response.content}")  # noqa pylint: disable=W1203
+        response = self._request(
+            'DELETE', url, headers=headers, params=params or {})
         return self._process_response(response)
 
+    def _cached_request(self, method, url, params=None, headers=None,
+                        **kwargs):
+        """Sends a GET request through the on-disk HTTP cache.
+
+        Fresh entries are answered from the cache, others are
+        revalidated with their ETag / Last-Modified, see
+        `http_cache`. Without cache the request is sent as is.
+
+        Args:
+            method (str): The client method, 'GET' or 'FILE_GET'.
+            url (str): The URL.
+            params (dict, optional): Query parameters.
+            headers (dict, optional): Request headers.
+            **kwargs: Arguments of the requests session call.
+
+        Returns:
+            requests.Response: The response.
+        """
+        if self._cache is None:
+            return self._request(method, url, params=params,
+                                 headers=headers, **kwargs)
+        key = http_cache.cache_url(url, params)
+        entry = self._cache.lookup(key)
+        if entry is not None:
+            if entry.is_fresh(self._cache.ttl):
+                self._cache.hit(entry)
+                return entry.to_response()
+            headers = {**(headers or {}), **entry.validators}
+        response = self._request(method, url, params=params, headers=headers,
+                                 **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self._cache.hit(entry, revalidated=True)
+            return entry.to_response()
+        self._cache.store(response, key, body=response.content)
+        return response
+
+    def _request(self, method, url, **kwargs):
+        """Sends a request, honouring rate limits and throttling.
+
+        Requests wait for the host's shared limiter (see
+        `ratelimit`). Throttled requests (HTTP 429/503) are
+        retried after the server's Retry-After delay, or an
+        exponential backoff without one, and the delay pauses
+        every worker sending to the host.
+
+        Args:
+            method (str): The client method, one of `REST_METHODS`.
+            url (str): The URL.
+            **kwargs: Arguments of the requests session call.
+
+        Returns:
+            requests.Response: The response.
+        """
+        kwargs['timeout'] = self._timeout(method)
+        if method not in ('GET', 'FILE_GET'):
+            self._memo.invalidate(url)
+        limiter = ratelimit.get_limiter(url, self.http_config)
+        retries = self.http_config['THROTTLE_RETRIES']
+        for attempt in range(retries + 1):
+            if limiter is not None:
+                limiter.acquire()
+            # A failed request counts as congestion, not as healthy
+            throttled = True
+            try:
+                response = self._send_recorded(method, url, **kwargs)
+                throttled = (response.status_code in
+                             ratelimit.THROTTLE_STATUS_CODES)
+            finally:
+                if limiter is not None:
+                    limiter.release(throttled)
+            if not throttled or attempt == retries:
+                return response
+            http_metrics.REGISTRY.record_retry(
+                HTTP_VERBS[method].upper(), url, throttled=True)
+            delay = self._throttle_delay(response, attempt)
+            logger.warning(f"{method} {url} throttled with {response.status_code}, retrying in {delay:.1f} seconds (Attempt {attempt + 1})")  # noqa pylint: disable=C0301,W1203
+            response.close()
+            _rewind_files(kwargs.get('files'))
+            if limiter is not None:
+                limiter.pause(delay)
+            else:
+                time.sleep(delay)
+        return response
+
+    def _send_recorded(self, method, url, **kwargs):
+        """Sends a single request, recording its HTTP metrics.
+
+        Args:
+            method (str): The client method, one of `REST_METHODS`.
+            url (str): The URL.
+            **kwargs: Arguments of the requests session call.
+
+        Returns:
+            requests.Response: The response.
+        """
+        verb = HTTP_VERBS[method].upper()
+        start = time.monotonic()
+        try:
+            response = self._send(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            http_metrics.REGISTRY.record(
+                verb, url, None, time.monotonic() - start,
+                bytes_out=http_metrics.body_size(kwargs.get('data')))
+            raise
+        http_metrics.REGISTRY.record(
+            verb, url, response.status_code, time.monotonic() - start,
+            bytes_in=http_metrics.response_size(response,
+                                                kwargs.get('stream')),
+            bytes_out=http_metrics.body_size(kwargs.get('data')))
+        connect_retries = http_metrics.connect_retries(response)
+        if connect_retries:
+            http_metrics.REGISTRY.record_retry(verb, url,
+                                               count=connect_retries)
+        return response
+
+    def _send(self, method, url, **kwargs):
+        """Sends a single request with the current session.
+
+        Args:
+            method (str): The client method, one of `REST_METHODS`.
+            url (str): The URL.
+            **kwargs: Arguments of the requests session call.
+
+        Returns:
+            requests.Response: The response.
+        """
+        session = self.session
+        if method == 'GET':
+            if self.http_config['HEDGE_GETS']:
+                return self._hedged_get(session, url, kwargs)
+            return self._timed_get(session, url, **kwargs)
+        return getattr(session, HTTP_VERBS[method])(url, **kwargs)
+
+    def _throttle_delay(self, response, attempt):
+        """Returns the delay before retrying a throttled request.
+
+        Args:
+            response (requests.Response): The throttled response.
+            attempt (int): The attempt number, starting at 0.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        delay = ratelimit.parse_retry_after(
+            response.headers.get('Retry-After'))
+        if delay is None:
+            delay = self.http_config['THROTTLE_BACKOFF'] * 2 ** attempt
+        return min(delay, self.http_config['THROTTLE_MAX_DELAY'])
+
+    def _timeout(self, method):
+        """Returns the (connect, read) timeout of a client method.
+
+        Args:
+            method (str): The method, one of `REST_METHODS`.
+
+        Returns:
+            tuple: The connect and read timeouts in seconds,
+                None disables a timeout.
+        """
+        timeouts = []
+        for kind in ('CONNECT', 'READ'):
+            value = self.http_config.get(f'{method}_{kind}_TIMEOUT')
+            if value is None:
+                value = self.http_config[f'{kind}_TIMEOUT']
+            timeouts.append(value if value and value > 0 else None)
+        return tuple(timeouts)
+
+    def _timed_get(self, session, url, **kwargs):
+        """Makes a GET request, recording its latency.
+
+        Args:
+            session (requests.Session): The session to use.
+            url (str): The URL.
+            **kwargs: Arguments of `requests.Session.get`.
+
+        Returns:
+            requests.Response: The response.
+        """
+        start = time.monotonic()
+        response = session.get(url, **kwargs)
+        self._latency.record(time.monotonic() - start)
+        return response
+
+    def _hedged_get(self, session, url, kwargs):
+        """Makes a hedged GET request.
+
+        Once the request is slower than the configured latency
+        percentile of recent GETs, an identical request is fired
+        and whichever returns first wins. Only used for GETs,
+        which are idempotent.
+
+        Args:
+            session (requests.Session): The session to use.
+            url (str): The URL.
+            kwargs (dict): Arguments of `requests.Session.get`.
+
+        Returns:
+            requests.Response: The first response received.
+        """
+        delay = self._latency.percentile(
+            self.http_config['HEDGE_PERCENTILE'],
+            self.http_config['HEDGE_MIN_SAMPLES'])
+        if delay is None:
+            return self._timed_get(session, url, **kwargs)
+        delay = max(delay, self.http_config['HEDGE_MIN_DELAY'])
+        primary = start_primary(self._timed_get, session, url, **kwargs)
+        try:
+            return primary.result(timeout=delay)
+        except concurrent.futures.TimeoutError:
+            pass
+        logger.debug(f"Hedging GET {url} after {delay:.3f}s")  # noqa pylint: disable=W1203
+        # At most one hedge per pooled connection
+        hedge = get_hedge_executor(self.http_config['POOL_MAXSIZE']).submit(
+            self._timed_get, session, url, **kwargs)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None or not pending:
+                    for loser in pending:
+                        loser.add_done_callback(close_response)
+                    return future.result()
+        return primary.result()
+
     def _process_response(self, response):
         """Processes the response from an HTTP request.
 
@@ -248,6 +728,7 @@ class RestClient(object):  # noqa pylint: disable=R0205
         Returns:
             The content of the response.
         """
+        http_log.log_response(response, self.http_config)
         status_code = response.status_code
         if status_code >= 400:
             logger.warning(f"{response.request.method} Access to URL {response.request.url} returned {status_code}")  # noqa pylint: disable=C0301,W1203
@@ -263,7 +744,7 @@ class RestClient(object):  # noqa pylint: disable=R0205
             A Response object (JsonResponse, PlainResponse,
             EmptyResponse, or RawResponse).
         """
-        if not response.text:
+        if not _body(response):
             return EmptyResponse(response.status_code)
         try:
             if response.headers['Content-Type'] == 'application/octet-stream':
@@ -360,7 +841,7 @@ class JsonResponse(Response):  # noqa pylint: disable=R0903
         Args:
             response: The HTTP response object.
         """
-        content = json.loads(response.text)
+        content = json_codec.loads(_body(response))
         super(JsonResponse, self).__init__(response.status_code, content)   # noqa pylint: disable=R1725
 
     def _error_code(self):
@@ -128,7 +128,7 @@ def unzip_all_bundles(input_cfg):
     os.chdir(current_dir)  # revert to current directory
 
 
-def proxy_dependency_map(cfg, export_data):  # noqa pylint: disable=R0914
+def proxy_dependency_map(cfg, export_data, baseline=None):  # noqa pylint: disable=R0914
     """Creates a proxy dependency map.
 
     This function generates a map indicating \
@@ -141,6 +141,9 @@ def proxy_dependency_map(cfg, export_data):  # noqa pylint: disable=R0914
         input configuration.
         exportData (dict): The exported Apigee \
         data.
+        baseline (dict, optional): The export data \
+        of a previous run, the map entries of \
+        proxies unchanged since are reused.
 
     Returns:
         dict: A dictionary representing the \
@@ -161,11 +164,24 @@ def proxy_dependency_map(cfg, export_data):  # noqa pylint: disable=R0914
     result = {}
     proxy_dir = apis_dirs
     proxy_dependency_map_data = {}
+    res = {}
+    changes = export_data.get("changes", {}).get("apis")
+    if baseline is not None and changes is not None:
+        # Split proxies are mapped again, their unifier output
+        # may not exist in this export.
+        baseline_map = baseline.get("proxy_dependency_map", {})
+        changed = set(changes)
+        for apiname in export_data["orgConfig"]["apis"]:
+            previous = baseline_map.get(apiname)
+            if (apiname not in changed and previous is not None
+                    and not previous.get("is_split")):
+                res[apiname] = previous
+        logger.info(f"Reusing the dependency map of {len(res)} proxies")  # noqa pylint: disable=W1203
     args = ((apiname, proxy_dir, proxy_dependency_map_data)
-            for apiname in export_data["orgConfig"]["apis"].keys())
+            for apiname in export_data["orgConfig"]["apis"].keys()
+            if apiname not in res)
 
     result = utils.run_parallel(proxy_dependency_map_parallel, args)
-    res = {}
     for item in result:
         for key, value in item.items():
             res[key] = value
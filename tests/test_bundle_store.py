@@ -0,0 +1,111 @@
+"""Test suite for bundle_store."""
+import hashlib
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from bundle_store import BundleStore
+from classic import ApigeeClassic
+
+ORG = 'api.enterprise.apigee.com/test_org'
+
+
+class TestBundleStore(unittest.TestCase):
+    """Test class for BundleStore."""
+
+    def setUp(self):
+        """Set up."""
+        self.tmp_dir = tempfile.TemporaryDirectory()  # noqa pylint: disable=R1732
+        self.store = BundleStore(os.path.join(self.tmp_dir.name, 'store'))
+        self.bundle = os.path.join(self.tmp_dir.name, 'test_api.zip')
+        with open(self.bundle, 'wb') as fl:
+            fl.write(b'bundle data')
+
+    def tearDown(self):
+        """Tear down."""
+        self.tmp_dir.cleanup()
+
+    def test_get_missing(self):
+        """Test revisions not stored are not found."""
+        target = os.path.join(self.tmp_dir.name, 'out.zip')
+        self.assertIsNone(self.store.get(ORG, 'apis', 'test_api', '1',
+                                         target))
+        self.assertFalse(os.path.exists(target))
+
+    def test_put_and_get(self):
+        """Test stored revisions are copied back with their digest."""
+        sha256 = self.store.put(ORG, 'apis', 'test_api', '1', self.bundle)
+        self.assertEqual(sha256, hashlib.sha256(b'bundle data').hexdigest())
+        target = os.path.join(self.tmp_dir.name, 'out.zip')
+        result = self.store.get(ORG, 'apis', 'test_api', '1', target)
+        self.assertEqual(result, {'sha256': sha256, 'size': 11})
+        with open(target, 'rb') as fl:
+            self.assertEqual(fl.read(), b'bundle data')
+        self.assertIsNone(self.store.lookup(ORG, 'apis', 'test_api', '2'))
+        self.assertIsNone(self.store.lookup(ORG, 'sharedflows',
+                                            'test_api', '1'))
+
+    def test_identical_bundles_stored_once(self):
+        """Test revisions with the same bundle share one object."""
+        self.store.put(ORG, 'apis', 'test_api', '1', self.bundle)
+        self.store.put(ORG, 'apis', 'test_api', '2', self.bundle)
+        objects = [name for _, _, files
+                   in os.walk(os.path.join(self.store.directory, 'objects'))
+                   for name in files]
+        self.assertEqual(len(objects), 1)
+
+    def test_concurrent_puts(self):
+        """Test threads storing same named bundles do not collide."""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            digests = set(pool.map(
+                lambda revision: self.store.put(
+                    ORG, 'apis', 'test_api', str(revision), self.bundle),
+                range(32)))
+        self.assertEqual(len(digests), 1)
+        objects = [name for _, _, files
+                   in os.walk(os.path.join(self.store.directory, 'objects'))
+                   for name in files]
+        self.assertEqual(objects, [f'{digests.pop()}.zip'])
+
+    def test_corrupted_object(self):
+        """Test corrupted objects are dropped."""
+        sha256 = self.store.put(ORG, 'apis', 'test_api', '1', self.bundle)
+        with open(self.store._object_path(sha256), 'wb') as fl:  # noqa pylint: disable=W0212
+            fl.write(b'corrupted')
+        target = os.path.join(self.tmp_dir.name, 'out.zip')
+        self.assertIsNone(self.store.get(ORG, 'apis', 'test_api', '1',
+                                         target))
+        self.assertFalse(os.path.exists(target))
+        self.assertIsNone(self.store.lookup(ORG, 'apis', 'test_api', '1'))
+
+    def test_fetch_api_revision_uses_store(self):
+        """Test revision bundles are downloaded once."""
+        export_dir = os.path.relpath(self.tmp_dir.name)
+        client = ApigeeClassic('https://api.enterprise.apigee.com/v1',
+                               'test_org', 'token', 'oauth', True,
+                               bundle_store=self.store)
+        client.client = MagicMock()
+
+        def download(_, file_path, use_cache):
+            self.assertFalse(use_cache)
+            with open(file_path, 'wb') as fl:
+                fl.write(b'downloaded')
+            return {'sha256': hashlib.sha256(b'downloaded').hexdigest(),
+                    'size': 10}
+        client.client.file_download.side_effect = download
+        first = client.fetch_api_revision('apis', 'test_api', '1', export_dir)
+        os.remove(os.path.join(export_dir, 'test_api.zip'))
+        second = client.fetch_api_revision('apis', 'test_api', '1',
+                                           export_dir)
+        self.assertEqual(first, second)
+        self.assertEqual(client.client.file_download.call_count, 1)
+        with open(os.path.join(export_dir, 'test_api.zip'), 'rb') as fl:
+            self.assertEqual(fl.read(), b'downloaded')
+        client.fetch_api_revision('apis', 'test_api', '2', export_dir)
+        self.assertEqual(client.client.file_download.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
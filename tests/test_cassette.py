@@ -0,0 +1,149 @@
+"""Test suite for cassette."""
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+import cassette
+from cassette import (CassetteMissError, RecordingAdapter, ReplayAdapter,
+                      mount_cassette)
+from rest import load_http_config
+
+
+def _recorded_response(request, body, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = 'OK'
+    response.headers['Content-Type'] = 'application/json'
+    response.headers['Set-Cookie'] = 'session=secret'
+    response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Content-Length'] = '1'
+    response.raw = io.BytesIO(body)
+    response.request = request
+    response.url = request.url
+    return response
+
+
+class TestCassette(unittest.TestCase):
+    """Test class for cassette record and replay."""
+
+    def setUp(self):
+        """Set up."""
+        self.tmp_dir = tempfile.TemporaryDirectory()  # noqa pylint: disable=R1732
+        self.path = os.path.join(self.tmp_dir.name, 'org.jsonl.gz')
+
+    def tearDown(self):
+        """Tear down."""
+        cassette.close_writers()
+        cassette._recording_started.clear()  # noqa pylint: disable=W0212
+        self.tmp_dir.cleanup()
+
+    def _record(self, bodies):
+        network = Mock()
+        network.send.side_effect = lambda request, **kwargs: \
+            _recorded_response(request, bodies.pop(0))
+        session = requests.Session()
+        session.mount('https://', RecordingAdapter(network, self.path))
+        session.headers['Authorization'] = 'Bearer token'
+        return session
+
+    def test_record_and_replay(self):
+        """Test recorded responses are replayed in order."""
+        session = self._record([b'{"page": 1}', b'{"page": 2}', b'[]'])
+        url = 'https://example.com/v1/organizations/org/apis'
+        self.assertEqual(session.get(url).json(), {'page': 1})
+        self.assertEqual(session.get(url).json(), {'page': 2})
+        session.post(url, json={'name': 'api1'})
+        cassette.close_writers()
+
+        session = requests.Session()
+        session.mount('https://', ReplayAdapter(self.path))
+        self.assertEqual(session.get(url).json(), {'page': 1})
+        self.assertEqual(session.get(url).json(), {'page': 2})
+        self.assertEqual(session.get(url).json(), {'page': 2})
+        self.assertEqual(
+            session.post(url, json={'name': 'api1'}).content, b'[]')
+        with self.assertRaises(CassetteMissError):
+            session.post(url, json={'name': 'api2'})
+        with self.assertRaises(CassetteMissError):
+            session.get(f'{url}/api1')
+
+    def test_rerecord_drops_earlier_run(self):
+        """Test a new recording run replaces the earlier recordings."""
+        url = 'https://example.com/v1/organizations/org/apis'
+        self._record([b'{"run": 1}']).get(url)
+        with open(f'{self.path}.1234', 'wb') as fl:
+            fl.write(b'stale worker recordings')
+        cassette.close_writers()
+        cassette._recording_started.clear()  # noqa pylint: disable=W0212
+        self._record([b'{"run": 2}']).get(url)
+        cassette.close_writers()
+        self.assertFalse(os.path.exists(f'{self.path}.1234'))
+        session = requests.Session()
+        session.mount('https://', ReplayAdapter(self.path))
+        self.assertEqual(session.get(url).json(), {'run': 2})
+
+    def test_credentials_not_recorded(self):
+        """Test request headers and cookies are not recorded."""
+        session = self._record([b'{}'])
+        session.get('https://example.com/v1/organizations/org')
+        cassette.close_writers()
+        with gzip.open(self.path, 'rb') as fl:
+            recorded = fl.read()
+        self.assertNotIn(b'token', recorded)
+        self.assertNotIn(b'secret', recorded)
+        self.assertNotIn(b'Content-Length', recorded)
+        self.assertNotIn(b'Content-Encoding', recorded)
+
+    def test_streamed_replay(self):
+        """Test streamed bodies are recorded once read and replayed."""
+        body = b'bundle-bytes' * cassette.SPOOL_SIZE
+        session = self._record([body])
+        url = 'https://example.com/v1/organizations/org/apis/a/revisions/1'
+        response = session.get(url, stream=True)
+        self.assertEqual(cassette.load_cassette(self.path), {})
+        self.assertEqual(b''.join(response.iter_content(chunk_size=4096)),
+                         body)
+        cassette.close_writers()
+        session = requests.Session()
+        session.mount('https://', ReplayAdapter(self.path))
+        response = session.get(url, stream=True)
+        self.assertEqual(b''.join(response.iter_content(chunk_size=4096)),
+                         body)
+
+    def test_replay_shared_by_sessions(self):
+        """Test sessions share one loaded cassette and its position."""
+        session = self._record([b'{"page": 1}', b'{"page": 2}'])
+        url = 'https://example.com/v1/organizations/org/apis'
+        session.get(url)
+        session.get(url)
+        cassette.close_writers()
+        sessions = [requests.Session(), requests.Session()]
+        with patch('cassette.load_cassette',
+                   wraps=cassette.load_cassette) as load:
+            for each_session in sessions:
+                each_session.mount('https://', ReplayAdapter(self.path))
+        load.assert_called_once_with(self.path)
+        self.assertEqual(sessions[0].get(url).json(), {'page': 1})
+        self.assertEqual(sessions[1].get(url).json(), {'page': 2})
+
+    def test_mount_cassette(self):
+        """Test the configured adapter is mounted."""
+        config = load_http_config('missing.properties')
+        adapter = Mock()
+        session = requests.Session()
+        self.assertIs(mount_cassette(session, adapter, config), adapter)
+        config.update({'CASSETTE_MODE': 'record', 'CASSETTE_FILE': self.path})
+        self.assertIsInstance(mount_cassette(session, adapter, config),
+                              RecordingAdapter)
+        config['CASSETTE_MODE'] = 'invalid'
+        with self.assertRaises(ValueError):
+            mount_cassette(session, adapter, config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -66,6 +66,18 @@ class TestApigeeClassic(unittest.TestCase):
         result = self.classic_client.list_org_objects("kvms")
         self.assertEqual(result, ["item1", "item2"])
 
+    def test_companies_fetched_per_object(self):
+        """
+        Test companies are listed by name, not as a paged bulk listing.
+        """
+        self.assertNotIn('companies', self.classic_client.requires_pagination)
+        self.assertNotIn('companies', self.classic_client.capabilities)
+        self.classic_client.client.get.return_value = ["company1"]
+        self.assertEqual(self.classic_client.list_org_objects("companies"),
+                         ["company1"])
+        self.classic_client.client.get.assert_called_once_with(
+            f"{self.baseurl}/organizations/{self.org}/companies")
+
     def test_list_org_objects_expand(self):
         """
         Test the list_org_objects_expand method.
@@ -168,21 +180,16 @@ class TestApigeeClassic(unittest.TestCase):
         """
         Test the fetch_api_revision method.
         """
-        self.classic_client.client.file_get.return_value = b"test_bundle_data"
-        self.classic_client.fetch_api_revision("apis", "test_api", "1",
-                                               "export_dir")
-        mock_open.assert_called_with("./export_dir/test_api.zip", "wb")
-        mock_open().write.assert_called_with(b"test_bundle_data")
-
-    @patch("builtins.open", new_callable=unittest.mock.mock_open)
-    def test_write_proxy_bundle(self, mock_open):
-        """
-        Test the write_proxy_bundle method.
-        """
-        self.classic_client.write_proxy_bundle("export_dir", "test_api",
-                                               b"test_data")
-        mock_open.assert_called_with("./export_dir/test_api.zip", "wb")
-        mock_open().write.assert_called_with(b"test_data")
+        self.classic_client.client.file_download.return_value = {
+            "sha256": "abc", "size": 3}
+        result = self.classic_client.fetch_api_revision(
+            "apis", "test_api", "1", "export_dir")
+        self.assertEqual(result, {"sha256": "abc", "size": 3})
+        self.classic_client.client.file_download.assert_called_with(
+            f"{self.baseurl}/organizations/{self.org}/apis/test_api/"
+            "revisions/1?format=bundle", "./export_dir/test_api.zip",
+            use_cache=True)
+        mock_open.assert_not_called()
 
     @patch.object(ApigeeClassic, 'list_api_revisions')
     @patch.object(ApigeeClassic, 'fetch_api_revision')
@@ -2,14 +2,19 @@
 """
 Tests for the core_wrappers module.
 """
+import os
+import tempfile
 import unittest
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from configparser import ConfigParser
 
+from export_store import ExportStore
 from core_wrappers import (
     pre_validation_checks,
     export_artifacts,
+    load_export_data,
     validate_artifacts,
+    validate_changed_bundles,
     visualize_artifacts,
     qualification_report,
     get_topology,
@@ -77,6 +82,27 @@ class TestCoreWrappers(unittest.TestCase):
         result = export_artifacts(self.cfg, ['all'])
         self.assertIn('proxy_dependency_map', result)
 
+    @patch('core_wrappers.sharding')
+    def test_load_export_data(self, mock_sharding):
+        """
+        Test the load_export_data function reads the export store.
+        """
+        mock_sharding.proxy_dependency_map.return_value = {}
+        backend_cfg = ConfigParser()
+        backend_cfg.read_dict({'export': {'EXPORT_DIR': 'export'}})
+        with tempfile.TemporaryDirectory() as target_dir:
+            self.cfg.set('inputs', 'TARGET_DIR', target_dir)
+            self.assertIsNone(load_export_data(self.cfg, backend_cfg))
+            store = ExportStore(os.path.join(target_dir, 'export'))
+            store.section('orgConfig', 'apps').put('app1', {'name': 'app1'})
+            store.section('envConfig', 'test', 'caches')
+            store.close()
+            result = load_export_data(self.cfg, backend_cfg)
+            self.assertEqual(dict(result['orgConfig']['apps']),
+                             {'app1': {'name': 'app1'}})
+            self.assertEqual(dict(result['envConfig']['test']['caches']), {})
+            self.assertIn('sharding_output', result)
+
     @patch('core_wrappers.parse_config')
     @patch('core_wrappers.create_dir')
     @patch('core_wrappers.get_access_token')
@@ -105,6 +131,25 @@ class TestCoreWrappers(unittest.TestCase):
         result = validate_artifacts(self.cfg, ['all'], export_data)
         self.assertIsInstance(result, dict)
 
+    def test_validate_changed_bundles(self):
+        """
+        Test unchanged bundles reuse the baseline validation.
+        """
+        validator = MagicMock()
+        validator.validate_proxy_bundles.return_value = {'apis': [
+            {'name': 'api2', 'importable': True},
+            {'name': 'api3', 'importable': True}]}
+        baseline_report = {'apis': [{'name': 'api1', 'importable': False},
+                                    {'name': 'api2', 'importable': False}]}
+        export_data = {'changes': {'apis': ['api2']}}
+        result = validate_changed_bundles(
+            validator, export_data, baseline_report,
+            ['api1', 'api2', 'api3'], 'export', 'target', 'apis')
+        validator.validate_proxy_bundles.assert_called_once_with(
+            ['api2', 'api3'], 'export', 'target', 'apis')
+        self.assertEqual([each['importable'] for each in result['apis']],
+                         [False, True, True])
+
     @patch('core_wrappers.parse_config')
     @patch('core_wrappers.nx.DiGraph')
     @patch('core_wrappers.Network')
@@ -0,0 +1,116 @@
+"""Test suite for export_journal."""
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from export_journal import ExportJournal, JOURNAL_FILE
+from exporter import ApigeeExporter
+
+
+class TestExportJournal(unittest.TestCase):
+    """Test class for ExportJournal."""
+
+    def setUp(self):
+        """Set up."""
+        self.tmp_dir = tempfile.TemporaryDirectory()  # noqa pylint: disable=R1732
+        self.directory = os.path.join(self.tmp_dir.name, 'journal')
+
+    def tearDown(self):
+        """Tear down."""
+        self.tmp_dir.cleanup()
+
+    def test_record_and_resume(self):
+        """Test completed objects are read back on resume only."""
+        journal = ExportJournal(self.directory)
+        journal.record('orgConfig/apps', 'app1', {'name': 'app1'})
+        self.assertEqual(journal.get('orgConfig/apps', 'app1'),
+                         {'name': 'app1'})
+        self.assertIsNone(journal.get('orgConfig/apps', 'app2'))
+        resumed = ExportJournal(self.directory, resume=True)
+        self.assertEqual(resumed.get('orgConfig/apps', 'app1'),
+                         {'name': 'app1'})
+        self.assertEqual(resumed.stats()['resumed'], 1)
+        restarted = ExportJournal(self.directory)
+        self.assertIsNone(restarted.get('orgConfig/apps', 'app1'))
+
+    def test_restart_drops_journal(self):
+        """Test a new export drops the journal of the previous one."""
+        journal = ExportJournal(self.directory)
+        journal.record('orgConfig/apps', 'app1', {'name': 'app1'})
+        journal.close()
+        ExportJournal(self.directory, resume=True).close()
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, JOURNAL_FILE)))
+        ExportJournal(self.directory).close()
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory, JOURNAL_FILE)))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_failures_are_fetched_again(self):
+        """Test failed objects are not completed, later lines win."""
+        journal = ExportJournal(self.directory)
+        journal.record('orgConfig/apps', 'app1', {'name': 'app1'})
+        journal.record_failure('orgConfig/apps', 'app1', ValueError('boom'))
+        journal.record_failure('orgConfig/apps', 'app2', ValueError('boom'))
+        journal.record('orgConfig/apps', 'app2', {'name': 'app2'})
+        resumed = ExportJournal(self.directory, resume=True)
+        self.assertIsNone(resumed.get('orgConfig/apps', 'app1'))
+        self.assertEqual(resumed.get('orgConfig/apps', 'app2'),
+                         {'name': 'app2'})
+
+    def test_torn_line_and_corrupted_object(self):
+        """Test torn journal lines and corrupted data are ignored."""
+        journal_path = os.path.join(self.directory, JOURNAL_FILE)
+        journal = ExportJournal(self.directory)
+        journal.record('orgConfig/apps', 'app1', {'name': 'app1'})
+        journal.close()
+        with open(journal_path, 'a', encoding='utf-8') as fl:
+            fl.write('{"type": "orgConfig/apps", "ke')
+        resumed = ExportJournal(self.directory, resume=True)
+        resumed.record('orgConfig/apps', 'app2', {'name': 'app2'})
+        resumed.close()
+        resumed = ExportJournal(self.directory, resume=True)
+        self.assertEqual(resumed.get('orgConfig/apps', 'app2'),
+                         {'name': 'app2'})
+        with open(journal_path, 'rb') as fl:
+            content = fl.read()
+        with open(journal_path, 'wb') as fl:
+            fl.write(content.replace(b'"app1"}', b'"app0"}', 1))
+        self.assertIsNone(resumed.get('orgConfig/apps', 'app1'))
+
+    @patch('exporter.ApigeeClassic')
+    def test_exporter_resumes(self, _):
+        """Test a resumed export only fetches incomplete objects."""
+        exporter = ApigeeExporter('https://api.enterprise.apigee.com/v1',
+                                  'test_org', 'token', 'oauth', True,
+                                  journal_dir=self.directory, workers=1)
+        exporter.apigee = MagicMock()
+        exporter.export_data['envConfig'] = {'test': {'targetServers': {}}}
+        exporter.apigee.list_env_objects.return_value = ['ts1', 'ts2']
+
+        def get_env_object(env, object_type, name):
+            if name == 'ts2':
+                raise ValueError('boom')
+            return {'name': name}
+        exporter.apigee.get_env_object.side_effect = get_env_object
+        exporter.export_env_objects(['targetservers'], 'export_dir')
+
+        resumed = ApigeeExporter('https://api.enterprise.apigee.com/v1',
+                                 'test_org', 'token', 'oauth', True,
+                                 journal_dir=self.directory, resume=True)
+        resumed.apigee = MagicMock()
+        resumed.export_data['envConfig'] = {'test': {'targetServers': {}}}
+        resumed.apigee.list_env_objects.return_value = ['ts1', 'ts2']
+        resumed.apigee.get_env_object.side_effect = (
+            lambda env, object_type, name: {'name': name})
+        resumed.export_env_objects(['targetservers'], 'export_dir')
+        resumed.apigee.get_env_object.assert_called_once_with(
+            'test', 'targetservers', 'ts2')
+        self.assertEqual(
+            resumed.export_data['envConfig']['test']['targetServers'],
+            {'ts1': {'name': 'ts1'}, 'ts2': {'name': 'ts2'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+"""Test suite for export_store."""
+import os
+import pickle
+import tempfile
+import unittest
+
+from export_store import (ExportData, ExportSection, ExportStore,
+                          INDEX_FILE, MANIFEST_FILE, PAGES_DIR, PageCache,
+                          STATE_FILE)
+import json_codec
+
+
+class TestExportStore(unittest.TestCase):
+    """Test class for ExportStore."""
+
+    def setUp(self):
+        """Set up."""
+        self.tmp_dir = tempfile.TemporaryDirectory()  # noqa pylint: disable=R1732
+        self.store = ExportStore(self.tmp_dir.name)
+
+    def tearDown(self):
+        """Tear down."""
+        self.tmp_dir.cleanup()
+
+    def test_section(self):
+        """Test sections write objects and read them back lazily."""
+        section = self.store.section('orgConfig', 'apps')
+        section.put('app1', {'name': 'app1'})
+        section.put('app2', {'name': 'app2'})
+        self.assertEqual(len(section), 2)
+        self.assertEqual(list(section), ['app1', 'app2'])
+        self.assertIn('app1', section)
+        self.assertEqual(section['app2'], {'name': 'app2'})
+        self.assertEqual(section.get('app3'), None)
+        self.assertEqual(list(section.scan()), [('app1', {'name': 'app1'}),
+                                                ('app2', {'name': 'app2'})])
+        self.assertEqual(os.listdir(self.tmp_dir.name), [STATE_FILE])
+
+    def test_reopen(self):
+        """Test a closed store is read back through its index."""
+        self.store.section('orgConfig', 'apps').put('app1', {'name': 'a'})
+        self.store.section('envConfig', 'test', 'targetServers').put(
+            'ts1', {'host': 'example.com'})
+        self.store.section('envConfig', 'test', 'caches')
+        self.store.close()
+        store = ExportStore(self.tmp_dir.name)
+        self.assertEqual(store.read('orgConfig')['apps']['app1'],
+                         {'name': 'a'})
+        env_config = store.read('envConfig')
+        self.assertEqual(dict(env_config['test']['targetServers']),
+                         {'ts1': {'host': 'example.com'}})
+        self.assertEqual(dict(env_config['test']['caches']), {})
+
+    def test_rebuild_index(self):
+        """Test a stale index is rebuilt, torn records are dropped."""
+        section = self.store.section('orgConfig', 'apps')
+        section.put('app1', {'name': 'old'})
+        self.store.close()
+        section.put('app1', {'name': 'new'})
+        section.put('app2', {'name': 'app2'})
+        self.store.close()
+        os.remove(os.path.join(self.tmp_dir.name, INDEX_FILE))
+        with open(os.path.join(self.tmp_dir.name, STATE_FILE), 'ab') as fl:
+            fl.write(b'["orgConfig/apps","app3",{"na')
+        store = ExportStore(self.tmp_dir.name)
+        self.assertEqual(dict(store.read('orgConfig')['apps']),
+                         {'app1': {'name': 'new'}, 'app2': {'name': 'app2'}})
+        store.section('orgConfig', 'apps').put('app3', {'name': 'app3'})
+        self.assertEqual(store.get('orgConfig/apps', 'app3'),
+                         {'name': 'app3'})
+
+    def test_compaction(self):
+        """Test replaced objects are dropped when the store is closed."""
+        section = self.store.section('orgConfig', 'apps')
+        for _ in range(3):
+            section.clear()
+            section.put('app1', {'name': 'x' * 1024 * 1024})
+        size = os.path.getsize(os.path.join(self.tmp_dir.name, STATE_FILE))
+        self.store.close()
+        self.assertLess(
+            os.path.getsize(os.path.join(self.tmp_dir.name, STATE_FILE)),
+            size / 2)
+        self.assertEqual(section['app1'], {'name': 'x' * 1024 * 1024})
+        store = ExportStore(self.tmp_dir.name)
+        self.assertEqual(list(store.read('orgConfig')['apps']), ['app1'])
+
+    def test_serializable(self):
+        """Test sections can be pickled and serialized as JSON."""
+        section = self.store.section('orgConfig', 'developers')
+        section.put('a@a.com', {'email': 'a@a.com'})
+        self.assertEqual(dict(pickle.loads(pickle.dumps(section))),
+                         {'a@a.com': {'email': 'a@a.com'}})
+        self.assertEqual(
+            json_codec.loads(json_codec.dumps({'developers': section})),
+            {'developers': {'a@a.com': {'email': 'a@a.com'}}})
+
+    def test_manifest(self):
+        """Test the manifest lists the segment file and sections."""
+        self.store.section('orgConfig', 'apps').put('app1', {'name': 'a'})
+        self.store.section('orgConfig', 'kvms')
+        self.store.close()
+        with open(os.path.join(self.tmp_dir.name, MANIFEST_FILE),
+                  encoding='utf-8') as fl:
+            manifest = json_codec.loads(fl.read())
+        self.assertEqual(
+            manifest['files'][STATE_FILE]['size'],
+            os.path.getsize(os.path.join(self.tmp_dir.name, STATE_FILE)))
+        self.assertEqual(manifest['sections']['orgConfig/apps']['objects'], 1)
+        self.assertEqual(manifest['sections']['orgConfig/kvms']['size'], 0)
+        store = ExportStore(self.tmp_dir.name)
+        self.assertEqual(store.read('orgConfig', lazy=False),
+                         {'apps': {'app1': {'name': 'a'}}, 'kvms': {}})
+
+    def test_is_stored(self):
+        """Test stored sections are recognised by store and path."""
+        section = self.store.section('orgConfig', 'apps')
+        self.assertTrue(ExportStore.is_stored(
+            section, self.tmp_dir.name, 'orgConfig', 'apps'))
+        self.assertFalse(ExportStore.is_stored(
+            section, self.tmp_dir.name, 'orgConfig', 'developers'))
+        self.assertFalse(ExportStore.is_stored(
+            section, f"{self.tmp_dir.name}/other", 'orgConfig', 'apps'))
+        self.assertFalse(ExportStore.is_stored(
+            {}, self.tmp_dir.name, 'orgConfig', 'apps'))
+        self.assertIsInstance(section, ExportSection)
+
+    def test_page_cache(self):
+        """Test sections are paged in and evicted least recently used."""
+        for key in ('apps', 'developers', 'kvms'):
+            section = self.store.section('orgConfig', key)
+            section.put('object1', {'name': 'x' * 20})
+        self.store.close()
+        size = sum(entry[1] for entry
+                   in self.store.names('orgConfig/apps').values())
+        self.store.pages = PageCache(2 * size)
+        apps = ExportSection(self.store, 'orgConfig/apps')
+        developers = ExportSection(self.store, 'orgConfig/developers')
+        self.assertIs(self.store.page('orgConfig/apps'),
+                      self.store.page('orgConfig/apps'))
+        self.assertEqual(developers['object1'], {'name': 'x' * 20})
+        self.assertEqual(list(apps.scan()),
+                         [('object1', {'name': 'x' * 20})])
+        self.store.page('orgConfig/kvms')
+        self.assertEqual(self.store.pages.size, 2 * size)
+        self.assertEqual(
+            [key for _, key in self.store.pages._pages],  # noqa pylint: disable=W0212
+            ['orgConfig/apps', 'orgConfig/kvms'])
+        apps.put('object2', {'name': 'y' * 4 * size})
+        self.assertIsNone(self.store.page('orgConfig/apps'))
+        self.assertEqual(apps['object2'], {'name': 'y' * 4 * size})
+        self.assertEqual(self.store.pages.size, size)
+
+    def test_export_data(self):
+        """Test export data pages mappings out and keeps views."""
+        self.store.section('orgConfig', 'apps').put('app1', {'name': 'a'})
+        self.store.close()
+        export_data = ExportData(self.tmp_dir.name, {
+            'orgConfig': {'apps': ExportSection(self.store,
+                                                'orgConfig/apps')},
+            'export': True,
+            'changes': {}})
+        export_data['proxy_dependency_map'] = {'proxy1': {'is_split': False}}
+        self.assertIs(self.store.pages, export_data.pages)
+        self.assertIsInstance(export_data['proxy_dependency_map'],
+                              ExportSection)
+        self.assertEqual(export_data['proxy_dependency_map'],
+                         {'proxy1': {'is_split': False}})
+        self.assertEqual(export_data['orgConfig']['apps']['app1'],
+                         {'name': 'a'})
+        self.assertEqual(export_data.get('changes', {}).get('apis'), None)
+        self.assertEqual(list(export_data), ['orgConfig', 'export', 'changes',
+                                             'proxy_dependency_map'])
+        self.assertTrue(os.path.exists(
+            os.path.join(self.tmp_dir.name, PAGES_DIR, STATE_FILE)))
+        self.assertEqual(json_codec.loads(json_codec.dumps(export_data)), {
+            'orgConfig': {'apps': {'app1': {'name': 'a'}}}, 'export': True,
+            'changes': {}, 'proxy_dependency_map': {
+                'proxy1': {'is_split': False}}})
+
+    def test_export_data_resumed(self):
+        """Test a resumed run restores the mappings of the previous one."""
+        export_data = ExportData(self.tmp_dir.name)
+        export_data['proxy_dependency_map'] = {'proxy1': {'is_split': False}}
+        export_data.close()
+        self.assertFalse(ExportData(self.tmp_dir.name).restore(
+            'proxy_dependency_map'))
+        export_data = ExportData(self.tmp_dir.name)
+        export_data['proxy_dependency_map'] = {'proxy1': {'is_split': True}}
+        export_data.close()
+        resumed = ExportData(self.tmp_dir.name, resume=True)
+        self.assertTrue(resumed.restore('proxy_dependency_map'))
+        self.assertFalse(resumed.restore('sharding_output'))
+        self.assertEqual(resumed['proxy_dependency_map'],
+                         {'proxy1': {'is_split': True}})
+        resumed['validation_report'] = {'apis': []}
+        self.assertEqual(resumed['proxy_dependency_map'],
+                         {'proxy1': {'is_split': True}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,9 +2,13 @@
 """
 Tests for the exporter module.
 """
+import os
+import tempfile
+import threading
 import unittest
-from unittest.mock import MagicMock, patch, mock_open
+from unittest.mock import MagicMock, patch
 
+from export_store import ExportSection
 from exporter import ApigeeExporter
 
 
@@ -76,10 +80,81 @@ class TestApigeeExporter(unittest.TestCase):
         mock_write_file.assert_called_with(
             'export_dir/resourceFiles/jsc/test.js', b"content")
 
+    def test_export_env_objects_fan_out(self):
+        """
+        Test per-object GETs are fanned out and stored by name.
+        """
+        self.exporter.export_data['envConfig'] = {
+            "test": {"targetServers": {}}}
+        names = [f"ts{i}" for i in range(25)]
+        self.exporter.apigee.list_env_objects.return_value = names
+        self.exporter.apigee.get_env_object.side_effect = (
+            lambda env, object_type, name: {"name": name})
+        self.exporter.export_env_objects(['targetservers'], 'export_dir')
+        target_servers = self.exporter.export_data['envConfig']['test'][
+            'targetServers']
+        self.assertEqual(list(target_servers), names)
+        self.assertEqual(target_servers['ts7'], {"name": "ts7"})
+        self.assertEqual(self.exporter.apigee.get_env_object.call_count, 25)
+
+    def test_fetch_all_reuses_executor(self):
+        """
+        Test per-object fetches share one pool until the export ends.
+        """
+        threads = set()
+
+        def fetch(item):
+            threads.add(threading.current_thread())
+            return item
+        self.exporter._fetch_all(fetch, range(20))  # noqa pylint: disable=W0212
+        executor = self.exporter._executor  # noqa pylint: disable=W0212
+        self.exporter._fetch_all(fetch, range(20))  # noqa pylint: disable=W0212
+        self.assertIs(self.exporter._executor, executor)  # noqa pylint: disable=W0212
+        self.assertLessEqual(len(threads), self.exporter.workers)
+        self.exporter.apigee.list_environments.return_value = []
+        with tempfile.TemporaryDirectory() as export_dir:
+            self.exporter.get_export_data([], export_dir)
+        self.assertIsNone(self.exporter._executor)  # noqa pylint: disable=W0212
+
+    def test_export_env_objects_isolates_failures(self):
+        """
+        Test a failing object is skipped and the others keep their order.
+        """
+        self.exporter.export_data['envConfig'] = {
+            "dev": {"targetServers": {}}, "prod": {"targetServers": {}}}
+        self.exporter.apigee.list_env_objects.side_effect = (
+            lambda env, object_type: ["ts1", "ts2", "ts3"])
+
+        def get_env_object(env, object_type, name):
+            if (env, name) == ("dev", "ts2"):
+                raise ValueError("boom")
+            return {"name": name, "env": env}
+        self.exporter.apigee.get_env_object.side_effect = get_env_object
+        self.exporter.export_env_objects(['targetservers'], 'export_dir')
+        env_config = self.exporter.export_data['envConfig']
+        self.assertEqual(list(env_config['dev']['targetServers']),
+                         ["ts1", "ts3"])
+        self.assertEqual(list(env_config['prod']['targetServers']),
+                         ["ts1", "ts2", "ts3"])
+        self.assertEqual(self.exporter.failed_objects, [
+            {'env': 'dev', 'type': 'targetservers', 'name': 'ts2',
+             'error': 'boom'}])
+
+    def test_developers_list(self):
+        """
+        Test developers are mapped from the expanded listing.
+        """
+        self.exporter.apigee.iter_org_objects_expand.return_value = iter([
+            [{"developerId": "id1", "email": "a@a.com"}]])
+        self.assertEqual(self.exporter.developers_list(),
+                         {"id1": "a@a.com"})
+        self.exporter.apigee.get_org_object.assert_not_called()
+
     def test_export_org_objects(self):
         """
         Test the export_org_objects method.
         """
+        self.exporter.apigee.capabilities = {}
         self.exporter.apigee.list_org_objects.return_value = ["dev1"]
         self.exporter.apigee.get_org_object.return_value = {
             "email": "a@a.com"}
@@ -88,6 +163,30 @@ class TestApigeeExporter(unittest.TestCase):
         self.assertIn("dev1",
                       self.exporter.export_data['orgConfig']['developers'])
 
+    def test_export_org_objects_streamed(self):
+        """
+        Test expanded org objects are streamed into the export store.
+        """
+        self.exporter.apigee.capabilities = {
+            'apps': {'id': 'appId', 'bulk': True}}
+        self.exporter.apigee.iter_org_objects_expand.return_value = iter([
+            [{'appId': 'a1'}, {'appId': 'a2'}], [{'appId': 'a3'}]])
+        with tempfile.TemporaryDirectory() as export_dir:
+            self.exporter.export_org_objects(['apps'], export_dir)
+            apps = self.exporter.export_data['orgConfig']['apps']
+            self.assertEqual(list(apps), ['a1', 'a2', 'a3'])
+            self.assertEqual(apps['a3'], {'appId': 'a3'})
+            with patch('export_store.ExportStore.put') as mock_put:
+                self.exporter.create_export_state(export_dir)
+            mock_put.assert_not_called()
+            state = self.exporter.read_export_state(
+                os.path.join(export_dir, 'orgConfig'))
+            self.assertEqual(dict(state['apps']),
+                             {'a1': {'appId': 'a1'}, 'a2': {'appId': 'a2'},
+                              'a3': {'appId': 'a3'}})
+        self.exporter.apigee.list_org_objects.assert_not_called()
+        self.exporter.apigee.list_org_objects_expand.assert_not_called()
+
     def test_export_api_metadata(self):
         """
         Test the export_api_metadata method.
@@ -107,6 +206,92 @@ class TestApigeeExporter(unittest.TestCase):
                         self.exporter.export_data['envConfig']['test']['apis']
                         )
 
+    def test_export_api_metadata_snapshot(self):
+        """
+        Test the deployment snapshot mode of export_api_metadata.
+        """
+        self.exporter.deployment_snapshot = True
+        self.exporter.export_data['envConfig'] = {"test": {}, "prod": {}}
+        self.exporter.export_data['orgConfig'] = {}
+        self.exporter.apigee.list_org_objects.return_value = ["api1", "api2"]
+        self.exporter.apigee.list_api_revisions.side_effect = (
+            lambda api_type, api: ["1", "2"] if api == "api1" else ["1"])
+        self.exporter.apigee.deployment_snapshot.return_value = {
+            "test": {"api1": ["2"]}, "prod": {}}
+        self.exporter.export_api_metadata(['apis'])
+        self.assertEqual(self.exporter.export_data['orgConfig']['apis'],
+                         {"api1": ["1", "2"], "api2": ["1"]})
+        self.assertEqual(self.exporter.export_data['envConfig'],
+                         {"test": {"apis": {"api1": ["2"]}}, "prod": {}})
+        self.exporter.apigee.deployment_snapshot.assert_called_once_with(
+            'apis', ["test", "prod"])
+        self.exporter.apigee.api_env_mapping.assert_not_called()
+
+    def test_export_api_metadata_incremental(self):
+        """
+        Test APIs are compared with the baseline by revision and date.
+        """
+        self.exporter.baseline = {
+            'orgConfig': {'apis': {'api1': ['1'], 'api2': ['1'],
+                                   'api3': ['1']}},
+            'lastModified': {'apis': {'api1': 1, 'api2': 1, 'api3': 1}}}
+        self.exporter.export_data.update({'changes': {}, 'lastModified': {}})
+        self.exporter.export_data['envConfig'] = {'test': {}}
+        self.exporter.apigee.list_apis_metadata.return_value = {
+            'api1': {'revision': ['1'], 'lastModifiedAt': 1},
+            'api2': {'revision': ['1', '2'], 'lastModifiedAt': 2},
+            'api3': {'revision': ['1'], 'lastModifiedAt': 2},
+            'api4': {'revision': ['1'], 'lastModifiedAt': 2}}
+        self.exporter.apigee.deployment_snapshot.return_value = {
+            'test': {'api1': ['1']}}
+        self.exporter.export_api_metadata(['apis'])
+        self.assertEqual(self.exporter.export_data['changes']['apis'],
+                         ['api2', 'api3', 'api4'])
+        self.assertEqual(
+            self.exporter.export_data['orgConfig']['apis']['api2'],
+            ['1', '2'])
+        self.assertEqual(self.exporter.export_data['envConfig']['test'],
+                         {'apis': {'api1': ['1']}})
+        self.exporter.apigee.list_api_revisions.assert_not_called()
+
+    def test_export_changed_bundles(self):
+        """
+        Test only changed bundles are downloaded.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.exporter.baseline_dir = os.path.join(tmp_dir, 'baseline')
+            os.makedirs(os.path.join(self.exporter.baseline_dir, 'apis'))
+            with open(os.path.join(self.exporter.baseline_dir, 'apis',
+                                   'api1.zip'), 'wb') as fl:
+                fl.write(b'bundle')
+            export_dir = os.path.join(tmp_dir, 'export')
+            os.makedirs(os.path.join(export_dir, 'apis'))
+            self.exporter.export_data['orgConfig'] = {
+                'apis': {'api1': ['1'], 'api2': ['1', '2'], 'api3': ['1']}}
+            self.exporter.export_data['changes'] = {'apis': ['api2']}
+            self.exporter.export_api_proxy_bundles(export_dir, ['apis'])
+            self.assertTrue(os.path.exists(
+                os.path.join(export_dir, 'apis', 'api1.zip')))
+        calls = sorted(call.args + (call.kwargs['refresh'],) for call in
+                       self.exporter.apigee.fetch_api_revision.call_args_list)
+        self.assertEqual(calls, [
+            ('apis', 'api2', '2', f'{export_dir}/apis', True),
+            ('apis', 'api3', '1', f'{export_dir}/apis', False)])
+
+    def test_record_changes(self):
+        """
+        Test org objects are compared by lastModifiedAt or content.
+        """
+        self.exporter.baseline = {'orgConfig': {'apps': {
+            'a1': {'lastModifiedAt': 1}, 'a2': {'lastModifiedAt': 1},
+            'a3': {'name': 'a3'}}}}
+        self.exporter.export_data['changes'] = {}
+        self.exporter._record_changes('apps', [  # noqa pylint: disable=W0212
+            ('a1', {'lastModifiedAt': 1}), ('a2', {'lastModifiedAt': 2}),
+            ('a3', {'name': 'a3'}), ('a4', {'name': 'a4'})])
+        self.assertEqual(self.exporter.export_data['changes']['apps'],
+                         ['a2', 'a4'])
+
     @patch('exporter.run_parallel')
     def test_export_api_proxy_bundles(self, mock_run_parallel):
         """
@@ -115,21 +300,86 @@ class TestApigeeExporter(unittest.TestCase):
         self.exporter.export_data['orgConfig'] = {"apis": {"api1": {}}}
         self.exporter.export_api_proxy_bundles('export_dir', ['apis'])
         mock_run_parallel.assert_called_once()
+        self.assertEqual(
+            mock_run_parallel.call_args.kwargs['executor'], 'thread')
 
-    @patch('os.path.isdir')
-    @patch('os.listdir')
-    @patch('builtins.open', new_callable=mock_open,
-           read_data='{"key": "value"}')
-    # pylint: disable=unused-argument
-    def test_read_export_state(self, mock_open_file, mock_listdir, mock_isdir):
+    def test_read_export_state(self):
         """
-        Test the read_export_state method.
+        Test the read_export_state method on per-file exports.
         """
-        mock_isdir.side_effect = [True, False]
-        mock_listdir.side_effect = [['orgConfig'], ['file.json']]
-        data = self.exporter.read_export_state('folder_path')
-        self.assertIn('orgConfig', data)
-        self.assertIn('file', data['orgConfig'])
+        with tempfile.TemporaryDirectory() as folder_path:
+            os.makedirs(os.path.join(folder_path, 'test', 'targetServers'))
+            os.makedirs(os.path.join(folder_path, 'test', 'caches'))
+            os.makedirs(os.path.join(folder_path, 'kvms'))
+            files = {('test', 'targetServers', 'ts1.json'): '{"port": 1}',
+                     ('kvms', 'kvm1.json'): '{"key": "value"}',
+                     ('kvms.json',): '{"kvm2": {}}'}
+            for path, content in files.items():
+                with open(os.path.join(folder_path, *path), 'w',
+                          encoding='utf-8') as fl:
+                    fl.write(content)
+            data = self.exporter.read_export_state(folder_path)
+        self.assertEqual(data['test'], {'targetServers': {'ts1': {'port': 1}},
+                                        'caches': {}})
+        self.assertEqual(data['kvms'], {'kvm1': {'key': 'value'}, 'kvm2': {}})
+
+    def test_read_export_state_eager(self):
+        """
+        Test packed sections are decoded upfront and verified.
+        """
+        self.exporter.export_data = {
+            'orgConfig': {'apps': {'a1': {'appId': 'a1'}}}, 'envConfig': {}}
+        with tempfile.TemporaryDirectory() as export_dir:
+            self.exporter.create_export_state(export_dir)
+            with patch('exporter.ApigeeClassic'):
+                exporter = ApigeeExporter(self.baseurl, self.org, self.token,
+                                          self.auth_type, self.ssl_verify)
+            org_config = exporter.read_export_state(
+                os.path.join(export_dir, 'orgConfig'), lazy=False)
+            self.assertEqual(org_config, {'apps': {'a1': {'appId': 'a1'}}})
+            with open(os.path.join(export_dir, 'export_state.jsonl'),
+                      'r+b') as fl:
+                content = fl.read().replace(b'"a1"}', b'"a2"}')
+                fl.seek(0)
+                fl.write(content)
+            with patch('exporter.ApigeeClassic'):
+                exporter = ApigeeExporter(self.baseurl, self.org, self.token,
+                                          self.auth_type, self.ssl_verify)
+            with self.assertRaises(ValueError):
+                exporter.read_export_state(
+                    os.path.join(export_dir, 'orgConfig'), lazy=False)
+            apps = exporter.read_export_state(
+                os.path.join(export_dir, 'orgConfig'))['apps']
+            with self.assertRaises(ValueError):
+                apps['a1']  # pylint: disable=pointless-statement
+
+    def test_export_state_round_trip(self):
+        """
+        Test the export state is packed and read back.
+        """
+        self.exporter.export_data = {
+            'orgConfig': {'kvms': {'kvm1': {'entry': []}}},
+            'envConfig': {'test': {'targetServers': {'ts1': {'port': 443}},
+                                   'caches': {}}}}
+        with tempfile.TemporaryDirectory() as export_dir:
+            self.exporter.create_export_state(export_dir)
+            self.assertEqual(sorted(os.listdir(export_dir)),
+                             ['export_state.idx', 'export_state.jsonl',
+                              'export_state.manifest.json'])
+            kvms = self.exporter.export_data['orgConfig']['kvms']
+            self.assertIsInstance(kvms, ExportSection)
+            self.assertEqual(kvms, {'kvm1': {'entry': []}})
+            with patch('exporter.ApigeeClassic'):
+                exporter = ApigeeExporter(self.baseurl, self.org, self.token,
+                                          self.auth_type, self.ssl_verify)
+            env_config = exporter.read_export_state(
+                os.path.join(export_dir, 'envConfig'))
+            self.assertEqual(env_config['test']['targetServers']['ts1'],
+                             {'port': 443})
+            self.assertEqual(len(env_config['test']['caches']), 0)
+            org_config = exporter.read_export_state(
+                os.path.join(export_dir, 'orgConfig'))
+            self.assertEqual(list(org_config['kvms']), ['kvm1'])
 
     def test_get_dependencies_data(self):
         """
@@ -143,6 +393,16 @@ class TestApigeeExporter(unittest.TestCase):
         self.assertIn('test', data['references'])
         self.assertIn('ref1', data['references']['test'])
 
+    def test_get_dependencies_data_reuses_environments(self):
+        """
+        Test get_dependencies_data reuses the exported environments.
+        """
+        self.exporter.export_data['envConfig'] = {"prod": {}}
+        self.exporter.apigee.list_env_objects.return_value = ["ref1"]
+        data = self.exporter.get_dependencies_data(['references'])
+        self.exporter.apigee.list_environments.assert_not_called()
+        self.assertIn('prod', data['references'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,67 @@
+"""Test suite for get_memo."""
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+from get_memo import GetMemo
+from rest import ApigeeError
+
+
+class TestGetMemo(unittest.TestCase):
+    """Test class for GetMemo."""
+
+    def test_coalesced(self):
+        """Test concurrent identical GETs share one request."""
+        memo = GetMemo(ttl=0, max_bytes=100)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 200, 13, {'name': 'a'}
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(memo.get, ('url', 'null'), fetch)
+            started.wait(5)
+            follower = pool.submit(memo.get, ('url', 'null'), fetch)
+            while memo.stats()['coalesced'] == 0:
+                time.sleep(0.001)
+            release.set()
+            self.assertEqual(leader.result(), follower.result())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(memo.stats()['entries'], 0)
+
+    def test_errors_not_memoized(self):
+        """Test failed GETs are retried."""
+        memo = GetMemo(ttl=60, max_bytes=100)
+        with self.assertRaises(ApigeeError):
+            memo.get(('url', 'null'), Mock(side_effect=ApigeeError(
+                500, 'error', 'failed')))
+        self.assertEqual(memo.get(('url', 'null'), lambda: (200, 3, [1])),
+                         [1])
+
+    def test_error_responses_not_memoized(self):
+        """Test error bodies returned by a GET are not memoized."""
+        memo = GetMemo(ttl=60, max_bytes=100)
+        fetch = Mock(side_effect=[(500, 9, {'error': 1}), (200, 3, [1])])
+        self.assertEqual(memo.get(('url', 'null'), fetch), {'error': 1})
+        self.assertEqual(memo.get(('url', 'null'), fetch), [1])
+        self.assertEqual(memo.get(('url', 'null'), fetch), [1])
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_size_bound(self):
+        """Test least recently used results are evicted by size."""
+        memo = GetMemo(ttl=60, max_bytes=25)
+        for key in ('a', 'b', 'a', 'c'):
+            memo.get((key, 'null'), lambda: (200, 10, 1))
+        memo.get(('d', 'null'), lambda: (200, 30, 1))
+        self.assertEqual(list(memo._entries), [('a', 'null'), ('c', 'null')])  # noqa pylint: disable=W0212
+        self.assertEqual(memo.stats()['bytes'], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Test suite for hedging."""
+import pickle
+import threading
+import unittest
+
+from hedging import LatencyTracker, start_primary
+
+
+class TestLatencyTracker(unittest.TestCase):
+    """Test class for LatencyTracker."""
+
+    def test_percentile(self):
+        """Test percentile."""
+        tracker = LatencyTracker(window=100)
+        self.assertIsNone(tracker.percentile(95, 1))
+        for i in range(1, 101):
+            tracker.record(i / 100)
+        self.assertEqual(tracker.percentile(50, 10), 0.51)
+        self.assertEqual(tracker.percentile(99, 10), 1.0)
+        self.assertIsNone(tracker.percentile(50, 101))
+
+    def test_pickle(self):
+        """Test the tracker survives pickling."""
+        tracker = LatencyTracker(window=10)
+        tracker.record(0.5)
+        tracker = pickle.loads(pickle.dumps(tracker))
+        tracker.record(0.7)
+        self.assertEqual(tracker.percentile(50, 1), 0.7)
+
+
+class TestStartPrimary(unittest.TestCase):
+    """Test class for start_primary."""
+
+    def test_runs_on_own_thread(self):
+        """Test the primary runs right away on a thread of its own."""
+        future = start_primary(lambda: threading.current_thread().name)
+        self.assertEqual(future.result(timeout=5), 'hedged-get-primary')
+
+    def test_exception(self):
+        """Test the primary exception is set on the future."""
+        def fail():
+            raise ValueError('boom')
+        with self.assertRaises(ValueError):
+            start_primary(fail).result(timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
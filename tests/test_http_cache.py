@@ -0,0 +1,171 @@
+"""Test suite for http_cache."""
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from http_cache import HttpCache, cache_url
+from rest import RestClient, load_http_config
+
+
+def _response(status_code, content=b'', headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.content = content
+    response.text = content.decode()
+    response.headers = {'Content-Type': 'application/json', **(headers or {})}
+    response.request.method = 'GET'
+    response.request.url = 'http://example.com/apis'
+    response.iter_content.return_value = [content]
+    return response
+
+
+class TestHttpCache(unittest.TestCase):
+    """Test class for HttpCache."""
+
+    def setUp(self):
+        """Set up."""
+        self.tmp_dir = tempfile.TemporaryDirectory()  # noqa pylint: disable=R1732
+
+    def tearDown(self):
+        """Tear down."""
+        self.tmp_dir.cleanup()
+
+    def test_store_and_lookup(self):
+        """Test stored responses are found with their validators."""
+        cache = HttpCache(self.tmp_dir.name)
+        url = cache_url('http://example.com/apis', {'count': 10})
+        self.assertEqual(url, 'http://example.com/apis?count=10')
+        self.assertIsNone(cache.lookup(url))
+        cache.store(_response(200, b'["a"]', {'ETag': '"v1"'}), url,
+                    body=b'["a"]')
+        entry = HttpCache(self.tmp_dir.name).lookup(url)
+        self.assertEqual(entry.validators, {'If-None-Match': '"v1"'})
+        self.assertFalse(entry.is_fresh(3600))
+        self.assertEqual(entry.to_response().json(), ['a'])
+
+    def test_ttl(self):
+        """Test responses without validators are reused for the TTL."""
+        cache = HttpCache(self.tmp_dir.name)
+        cache.store(_response(200, b'{}'), 'http://example.com/a', body=b'{}')
+        entry = cache.lookup('http://example.com/a')
+        self.assertTrue(entry.is_fresh(60))
+        entry.stored_at = time.time() - 120
+        self.assertFalse(entry.is_fresh(60))
+
+    def test_errors_not_stored(self):
+        """Test error responses are not cached."""
+        cache = HttpCache(self.tmp_dir.name)
+        cache.store(_response(404, b'{}'), 'http://example.com/a', body=b'{}')
+        self.assertIsNone(cache.lookup('http://example.com/a'))
+
+    def test_eviction(self):
+        """Test least recently used entries are evicted over the cap."""
+        cache = HttpCache(self.tmp_dir.name, max_bytes=25)
+        for index, name in enumerate('abc'):
+            cache.store(_response(200), f'http://example.com/{name}',
+                        body=b'x' * 10)
+            entry = cache.lookup(f'http://example.com/{name}')
+            os.utime(entry.body_path, (index, index))
+        self.assertIsNone(cache.lookup('http://example.com/a'))
+        self.assertIsNotNone(cache.lookup('http://example.com/c'))
+        self.assertLessEqual(cache.stats()['size_bytes'], 25)
+
+    def test_size_persisted(self):
+        """Test a reopened cache reads its size instead of walking."""
+        cache = HttpCache(self.tmp_dir.name)
+        cache.store(_response(200), 'http://example.com/a', body=b'x' * 10)
+        cache.store(_response(200), 'http://example.com/a', body=b'x' * 4)
+        with patch('http_cache.os.walk') as mock_walk:
+            reopened = HttpCache(self.tmp_dir.name)
+            self.assertEqual(reopened.stats()['size_bytes'], 4)
+        mock_walk.assert_not_called()
+        os.remove(os.path.join(self.tmp_dir.name, 'cache_size.json'))
+        self.assertEqual(HttpCache(self.tmp_dir.name).stats()['size_bytes'],
+                         4)
+
+
+class TestRestClientCache(unittest.TestCase):
+    """Test class for RestClient with the HTTP cache."""
+
+    def setUp(self):
+        """Set up."""
+        self.tmp_dir = tempfile.TemporaryDirectory()  # noqa pylint: disable=R1732
+        self.mock_session = Mock()
+        self.patcher = patch('rest.requests.Session',
+                             return_value=self.mock_session)
+        self.patcher.start()
+        self.config = load_http_config('missing.properties')
+        self.config['MEMOIZE_GETS'] = False
+
+    def tearDown(self):
+        """Tear down."""
+        self.patcher.stop()
+        self.tmp_dir.cleanup()
+
+    def _client(self):
+        return RestClient('basic', 'test', http_config=self.config,
+                          cache_dir=self.tmp_dir.name)
+
+    def test_conditional_get(self):
+        """Test cached responses are revalidated with their ETag."""
+        self.mock_session.get.side_effect = [
+            _response(200, b'{"name": "a"}', {'ETag': '"v1"'}),
+            _response(304)]
+        self.assertEqual(self._client().get('http://example.com/apis/a'),
+                         {'name': 'a'})
+        self.assertEqual(self._client().get('http://example.com/apis/a'),
+                         {'name': 'a'})
+        headers = self.mock_session.get.call_args.kwargs['headers']
+        self.assertEqual(headers['If-None-Match'], '"v1"')
+
+    def test_no_validators_refetched(self):
+        """Test responses without validators are refetched by default."""
+        self.mock_session.get.return_value = _response(200, b'["a"]')
+        self._client().get('http://example.com/apis')
+        self._client().get('http://example.com/apis')
+        self.assertEqual(self.mock_session.get.call_count, 2)
+
+    def test_ttl_without_validators(self):
+        """Test responses without validators are reused for the TTL."""
+        self.config['HTTP_CACHE_TTL'] = 3600
+        self.mock_session.get.return_value = _response(200, b'["a"]')
+        self._client().get('http://example.com/apis')
+        self.assertEqual(self._client().get('http://example.com/apis'),
+                         ['a'])
+        self.assertEqual(self.mock_session.get.call_count, 1)
+
+    def test_file_download(self):
+        """Test downloads are served from the cache."""
+        self.config['HTTP_CACHE_TTL'] = 3600
+        self.mock_session.get.return_value = _response(
+            200, b'bundle', {'Content-Type': 'application/octet-stream'})
+        with tempfile.TemporaryDirectory() as export_dir:
+            first = self._client().file_download(
+                'http://example.com/apis/a/revisions/1',
+                os.path.join(export_dir, 'first.zip'))
+            second = self._client().file_download(
+                'http://example.com/apis/a/revisions/1',
+                os.path.join(export_dir, 'second.zip'))
+            with open(os.path.join(export_dir, 'second.zip'), 'rb') as fl:
+                self.assertEqual(fl.read(), b'bundle')
+        self.assertEqual(first, second)
+        self.assertEqual(self.mock_session.get.call_count, 1)
+
+    def test_file_download_uncached(self):
+        """Test downloads kept elsewhere bypass the cache."""
+        self.config['HTTP_CACHE_TTL'] = 3600
+        self.mock_session.get.return_value = _response(
+            200, b'bundle', {'Content-Type': 'application/octet-stream'})
+        with tempfile.TemporaryDirectory() as export_dir:
+            for _ in range(2):
+                self._client().file_download(
+                    'http://example.com/apis/a/revisions/1',
+                    os.path.join(export_dir, 'bundle.zip'), use_cache=False)
+        self.assertEqual(self.mock_session.get.call_count, 2)
+        self.assertEqual(self._client().cache_stats()['size_bytes'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Test suite for http_log."""
+import logging
+import unittest
+from unittest.mock import Mock, PropertyMock, patch
+
+from base_logger import logger
+from http_log import LazyBody, log_response, redact
+from rest import load_http_config
+
+
+def _response(content, content_type='application/json', headers=None):
+    response = Mock()
+    response.status_code = 200
+    response.content = content
+    response.headers = {'Content-Type': content_type, **(headers or {})}
+    response.request.method = 'GET'
+    response.request.url = 'http://example.com/v1/organizations/org'
+    return response
+
+
+class TestRedact(unittest.TestCase):
+    """Test class for redact."""
+
+    def test_redact(self):
+        """Test tokens and secrets are masked."""
+        self.assertEqual(redact('Authorization: Bearer abc.def-123'),
+                         'Authorization: Bearer ***')
+        self.assertEqual(
+            redact('{"consumerKey": "key1", "name": "app1", "password":"p"}'),
+            '{"consumerKey": "***", "name": "app1", "password":"***"}')
+        self.assertEqual(redact('/token?access_token=xyz&count=1'),
+                         '/token?access_token=***&count=1')
+
+
+class TestLazyBody(unittest.TestCase):
+    """Test class for LazyBody."""
+
+    def test_truncated(self):
+        """Test bodies are truncated to max_bytes."""
+        body = LazyBody(_response(b'{"name": "0123456789"}'), 10)
+        self.assertEqual(str(body), '{"name": "... [12 more bytes]')
+
+    def test_binary_not_read(self):
+        """Test binary bodies are summarised without being read."""
+        response = _response(None, 'application/octet-stream',
+                             {'Content-Length': '42'})
+        content = PropertyMock()
+        type(response).content = content
+        self.assertEqual(str(LazyBody(response, 100)),
+                         '<application/octet-stream body, 42 bytes>')
+        content.assert_not_called()
+
+
+class TestLogResponse(unittest.TestCase):
+    """Test class for log_response."""
+
+    def setUp(self):
+        """Set up."""
+        self.config = load_http_config('missing.properties')
+        self.level = logger.level
+
+    def tearDown(self):
+        """Tear down."""
+        logger.setLevel(self.level)
+
+    def test_not_formatted_without_debug(self):
+        """Test nothing is formatted when DEBUG is disabled."""
+        logger.setLevel(logging.INFO)
+        with patch('http_log.LazyBody') as lazy_body:
+            log_response(_response(b'{}'), self.config)
+        lazy_body.assert_not_called()
+
+    def test_sampled(self):
+        """Test only sampled responses are logged."""
+        logger.setLevel(logging.DEBUG)
+        self.config['LOG_SAMPLE_RATE'] = 0.5
+        with patch('http_log.random.random', side_effect=[0.7, 0.2]), \
+                self.assertLogs(logger, logging.DEBUG) as logs:
+            log_response(_response(b'{"a": 1}'), self.config)
+            log_response(_response(b'{"token": "t"}'), self.config)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('{"token": "***"}', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
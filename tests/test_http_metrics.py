@@ -0,0 +1,93 @@
+"""Test suite for http_metrics."""
+import unittest
+from unittest.mock import Mock, patch
+
+import http_metrics
+from http_metrics import Histogram, MetricsRegistry, endpoint_template
+from rest import RestClient
+
+
+class TestEndpointTemplate(unittest.TestCase):
+    """Test class for endpoint_template."""
+
+    def test_identifiers_replaced(self):
+        """Test identifiers are replaced by placeholders."""
+        self.assertEqual(
+            endpoint_template('https://api.enterprise.apigee.com/v1/'
+                              'organizations/org/apis/api1/revisions'),
+            'organizations/{org}/apis/{api}/revisions')
+        self.assertEqual(
+            endpoint_template('https://apigee.googleapis.com/v1/organizations'
+                              '/p/apis/a%20b/revisions/3?format=bundle'),
+            'organizations/{org}/apis/{api}/revisions/{revision}')
+        self.assertEqual(
+            endpoint_template('https://host/v1/organizations/org/'
+                              'environments/test/resourcefiles/jsc/a.js'),
+            'organizations/{org}/environments/{env}/resourcefiles/'
+            '{type}/{name}')
+        self.assertEqual(endpoint_template('https://host/v1/servers?pod=x'),
+                         'servers')
+
+
+class TestHistogram(unittest.TestCase):
+    """Test class for Histogram."""
+
+    def test_percentiles(self):
+        """Test percentiles fall in the right buckets."""
+        histogram = Histogram()
+        self.assertIsNone(histogram.percentile(50))
+        for _ in range(90):
+            histogram.record(0.02)
+        for _ in range(10):
+            histogram.record(2.5)
+        self.assertTrue(0.01 < histogram.percentile(50) <= 0.025)
+        self.assertTrue(2.0 < histogram.percentile(95) <= 2.5)
+        self.assertEqual(histogram.percentile(100), 2.5)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test class for MetricsRegistry."""
+
+    def test_summary(self):
+        """Test requests aggregate per method and template."""
+        registry = MetricsRegistry()
+        url = 'https://host/v1/organizations/org/apis/{}'
+        registry.record('GET', url.format('a'), 200, 0.1, bytes_in=10)
+        registry.record('GET', url.format('b'), 404, 0.3, bytes_in=5)
+        registry.record('GET', url.format('c'), None, 0.2)
+        registry.record_retry('GET', url.format('a'), throttled=True)
+        summary = registry.summary()
+        endpoint = summary['endpoints']['GET organizations/{org}/apis/{api}']
+        self.assertEqual(endpoint['requests'], 3)
+        self.assertEqual(endpoint['errors'], 1)
+        self.assertEqual(endpoint['throttled'], 1)
+        self.assertEqual(endpoint['bytes_in'], 15)
+        self.assertEqual(endpoint['status_codes'], {'200': 1, '404': 1})
+        self.assertEqual(summary['totals']['requests'], 3)
+
+    @patch('rest.requests.Session')
+    def test_rest_client_recorded(self, mock_session_class):
+        """Test RestClient requests are recorded."""
+        response = Mock()
+        response.status_code = 200
+        response.text = '{}'
+        response.content = b'{}'
+        response.headers = {'Content-Type': 'application/json',
+                            'Content-Length': '2'}
+        response.request.method = 'POST'
+        response.request.url = 'https://host/v1/organizations/org/apiproducts'
+        mock_session_class.return_value.post.return_value = response
+        http_metrics.REGISTRY.reset()
+        client = RestClient('basic', 'test')
+        client.post('https://host/v1/organizations/org/apiproducts',
+                    {'name': 'p'})
+        endpoint = http_metrics.summary()['endpoints'][
+            'POST organizations/{org}/apiproducts']
+        self.assertEqual(endpoint['requests'], 1)
+        self.assertEqual(endpoint['bytes_in'], 2)
+        self.assertEqual(endpoint['bytes_out'], len('{"name": "p"}'))
+        http_metrics.REGISTRY.reset()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+"""Test suite for http_pool."""
+import unittest
+
+from http_pool import PooledHTTPAdapter, PoolStats
+
+
+class TestPoolStats(unittest.TestCase):
+    """Test class for PoolStats."""
+
+    def test_pool_stats_saturation(self):
+        """Test pool stats count saturated requests."""
+        stats = PoolStats()
+        adapter = PooledHTTPAdapter(1, 1, False, 0)
+        stats.request_started(adapter)
+        stats.request_started(adapter)
+        stats.request_finished(adapter)
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['requests'], 2)
+        self.assertEqual(snapshot['peak_in_flight'], 2)
+        self.assertEqual(snapshot['saturated'], 1)
+        self.assertEqual(snapshot['in_flight'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
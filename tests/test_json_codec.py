@@ -0,0 +1,63 @@
+"""Test suite for json_codec."""
+import json
+import math
+import unittest
+from unittest.mock import patch
+
+import json_codec
+
+DOC = {'name': 'café', 'path': '/v1/apis', 'list': [1, 2.5, None, True],
+       'nested': {'empty': {}}}
+
+
+class TestJsonCodec(unittest.TestCase):
+    """Test class for json_codec."""
+
+    def test_round_trip(self):
+        """Test documents survive every available backend."""
+        for backend in {json_codec.BACKEND, 'json'}:
+            with patch.object(json_codec, 'BACKEND', backend):
+                for indent in (None, 2):
+                    data = json_codec.dumps(DOC, indent=indent)
+                    self.assertIsInstance(data, bytes)
+                    self.assertEqual(json_codec.loads(data), DOC)
+                    self.assertEqual(json_codec.loads(data.decode()), DOC)
+
+    def test_indent_matches_stdlib(self):
+        """Test pretty printed documents are laid out like json.dumps."""
+        self.assertEqual(
+            json_codec.dumps(DOC, indent=2).decode(),
+            json.dumps(DOC, indent=2, ensure_ascii=False))
+
+    def test_iterdumps(self):
+        """Test streamed documents match dumps, chunk by chunk."""
+        for indent in (None, 2):
+            chunks = list(json_codec.iterdumps(DOC, indent=indent))
+            self.assertGreater(len(chunks), 1)
+            self.assertEqual(b''.join(chunks),
+                             json_codec.dumps(DOC, indent=indent))
+
+    def test_fallback_to_stdlib(self):
+        """Test documents the fast backends reject are still handled."""
+        big = {'value': 2 ** 70, 1: 'int key'}
+        self.assertEqual(json_codec.loads(json_codec.dumps(big)),
+                         {'value': 2 ** 70, '1': 'int key'})
+        self.assertTrue(
+            math.isnan(json_codec.loads('{"value": NaN}')['value']))
+
+    def test_non_finite_floats(self):
+        """Test non-finite floats are encoded as the backend does."""
+        encoded = json_codec.dumps({'value': math.inf})
+        if json_codec.BACKEND == 'orjson':
+            self.assertEqual(encoded, b'{"value":null}')
+        else:
+            self.assertEqual(encoded, b'{"value":Infinity}')
+
+    def test_invalid_json(self):
+        """Test invalid documents raise ValueError."""
+        with self.assertRaises(ValueError):
+            json_codec.loads(b'{"key": ')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -48,7 +48,7 @@ class TestMain(unittest.TestCase):
         mock_pre_validation_checks.return_value = True
 
         # Mock parse_json to return empty dicts initially
-        mock_parse_json.side_effect = [{}, {}]
+        mock_parse_json.side_effect = [{}, {}, {}]
 
         # Mock export_artifacts to return some data
         mock_export_artifacts.return_value = {'export': True}
@@ -69,6 +69,103 @@ class TestMain(unittest.TestCase):
         mock_visualize_artifacts.assert_called_once()
         mock_get_topology.assert_called_once()
         mock_qualification_report.assert_called_once()
+        self.assertTrue(mock_write_json.call_args.args[0].endswith(
+            'http_metrics.json'))
+        self.assertIn('endpoints', mock_write_json.call_args.args[1])
+
+    @patch('main.argparse.ArgumentParser')
+    @patch('main.parse_config')
+    @patch('main.pre_validation_checks')
+    @patch('main.load_export_data')
+    @patch('main.export_artifacts')
+    @patch('main.validate_artifacts')
+    @patch('main.visualize_artifacts')
+    @patch('main.qualification_report')
+    @patch('main.parse_json')
+    @patch('main.write_json')
+    # noqa pylint: disable=too-many-arguments, too-many-locals, unused-argument, too-many-positional-arguments
+    def test_main_resumed(self, mock_write_json, mock_parse_json,
+                          mock_qualification_report,
+                          mock_visualize_artifacts, mock_validate_artifacts,
+                          mock_export_artifacts, mock_load_export_data,
+                          mock_pre_validation_checks, mock_parse_config,
+                          mock_arg_parser):
+        """
+        Test a completed export is loaded without its export data file.
+        """
+        mock_args = MagicMock()
+        mock_args.resources = 'all'
+        mock_args.skip_target_validation = False
+        mock_arg_parser.return_value.parse_args.return_value = mock_args
+        mock_cfg = MagicMock()
+        mock_cfg.get.return_value = 'X'
+        mock_parse_config.side_effect = [mock_cfg, MagicMock()]
+        mock_pre_validation_checks.return_value = True
+        report = {'report': True}
+        mock_parse_json.side_effect = [
+            {'export': True, 'validation_report': True,
+             'failedObjects': [{'name': 'ts1'}]},
+            report]
+        mock_load_export_data.return_value = {}
+
+        main()
+
+        self.assertEqual(mock_parse_json.call_count, 2)
+        self.assertTrue(mock_parse_json.call_args_list[0].args[0].endswith(
+            'export_status.json'))
+        mock_export_artifacts.assert_not_called()
+        mock_validate_artifacts.assert_not_called()
+        export_data = mock_qualification_report.call_args.args[2]
+        self.assertEqual(export_data['validation_report'], report)
+        self.assertEqual(export_data['failedObjects'], [{'name': 'ts1'}])
+
+    @patch('main.argparse.ArgumentParser')
+    @patch('main.parse_config')
+    @patch('main.pre_validation_checks')
+    @patch('main.load_export_data')
+    @patch('main.export_artifacts')
+    @patch('main.validate_artifacts')
+    @patch('main.visualize_artifacts')
+    @patch('main.qualification_report')
+    @patch('main.parse_json')
+    @patch('main.write_json')
+    # noqa pylint: disable=too-many-arguments, too-many-locals, unused-argument, too-many-positional-arguments
+    def test_main_resumed_legacy(self, mock_write_json, mock_parse_json,
+                                 mock_qualification_report,
+                                 mock_visualize_artifacts,
+                                 mock_validate_artifacts,
+                                 mock_export_artifacts, mock_load_export_data,
+                                 mock_pre_validation_checks,
+                                 mock_parse_config, mock_arg_parser):
+        """
+        Test an export data file without a status file is resumed.
+        """
+        mock_args = MagicMock()
+        mock_args.resources = 'all'
+        mock_args.skip_target_validation = False
+        mock_arg_parser.return_value.parse_args.return_value = mock_args
+        mock_cfg = MagicMock()
+        mock_cfg.get.return_value = 'X'
+        mock_parse_config.side_effect = [mock_cfg, MagicMock()]
+        mock_pre_validation_checks.return_value = True
+        report = {'report': True}
+        legacy_export_data = {'export': True, 'validation_report': report,
+                              'failedObjects': [{'name': 'ts1'}]}
+        mock_parse_json.side_effect = [{}, report, legacy_export_data]
+
+        main()
+
+        self.assertEqual(mock_parse_json.call_count, 3)
+        mock_load_export_data.assert_not_called()
+        mock_export_artifacts.assert_not_called()
+        mock_validate_artifacts.assert_not_called()
+        status_file, export_status = mock_write_json.call_args_list[0].args
+        self.assertTrue(status_file.endswith('export_status.json'))
+        self.assertEqual(export_status, {
+            'export': True, 'validation_report': True,
+            'failedObjects': [{'name': 'ts1'}]})
+        export_data = mock_qualification_report.call_args.args[2]
+        self.assertIs(export_data, legacy_export_data)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,205 @@
+"""Test suite for mock_server."""
+import os
+import json
+import tempfile
+import threading
+import unittest
+import zipfile
+from unittest.mock import patch
+
+from classic import ApigeeClassic
+from exporter import ApigeeExporter
+from nextgen import ApigeeNewGen
+from mock_server import MockApigee, MockOrg, make_server, page
+
+
+class MockServerTestCase(unittest.TestCase):
+    """Starts a mock server for the tests of a class."""
+
+    flavor = 'edge'
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up class."""
+        cls.org = MockOrg('mock-org', cls.flavor, envs=2, proxies=25,
+                          developers=12, apps=30, products=5)
+        cls.server = make_server(MockApigee(cls.org), port=0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever,
+                                      daemon=True)
+        cls.thread.start()
+        cls.baseurl = f"http://127.0.0.1:{cls.server.server_port}/v1"
+
+    @classmethod
+    def tearDownClass(cls):
+        """Tear down class."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+
+class TestMockEdge(MockServerTestCase):
+    """Test class for the edge flavor."""
+
+    def setUp(self):
+        """Set up."""
+        self.classic = ApigeeClassic(self.baseurl, 'mock-org', 'token',
+                                     'basic', ssl_verify=False)
+
+    @patch.dict(os.environ, {'PAGE_SIZE': '10'})
+    def test_paginated_listing(self):
+        """Test startKey pagination returns every object once."""
+        apis = self.classic.list_org_objects('apis')
+        self.assertEqual(apis, self.org.objects['apis'])
+        apps = self.classic.list_org_objects_expand('apps')
+        self.assertEqual(sorted(apps), self.org.objects['apps'])
+        self.assertIn('credentials', apps['app-000000'])
+
+    def test_env_objects(self):
+        """Test environment objects and deployments."""
+        self.assertEqual(self.classic.list_environments(), ['env-0', 'env-1'])
+        targetservers = self.classic.list_env_objects('env-0',
+                                                      'targetservers')
+        self.assertEqual(
+            self.classic.get_env_object('env-0', 'targetservers',
+                                        targetservers[0])['port'], 443)
+        self.assertEqual(len(self.classic.list_apis_env('env-1')), 25)
+        deployments = self.classic.api_env_mapping('apis', 'proxy-00003')
+        self.assertEqual(len(deployments['environment']), 2)
+
+    def test_deployment_snapshot(self):
+        """Test the snapshot matches the per API deployments."""
+        snapshot = self.classic.deployment_snapshot(
+            'apis', ['env-0', 'env-1'])
+        self.assertEqual(sorted(snapshot['env-1']), self.org.objects['apis'])
+        mapping = self.classic.api_env_mapping('apis', 'proxy-00003')
+        for env in mapping['environment']:
+            self.assertEqual(snapshot[env['name']]['proxy-00003'],
+                             [rev['name'] for rev in env['revision']])
+
+    def test_list_apis_metadata(self):
+        """Test the API listing holds the revisions of each API."""
+        metadata = self.classic.list_apis_metadata('apis')
+        self.assertEqual(sorted(metadata), self.org.objects['apis'])
+        self.assertEqual(metadata['proxy-00003']['revision'],
+                         self.classic.list_api_revisions('apis',
+                                                         'proxy-00003'))
+        self.assertIsNotNone(metadata['proxy-00003']['lastModifiedAt'])
+
+    def test_bundle_download(self):
+        """Test the bundle of a revision is a valid zip."""
+        with tempfile.TemporaryDirectory(dir='.') as tmp_dir:
+            tmp_dir = os.path.relpath(tmp_dir)
+            self.classic.fetch_proxy(('apis', 'proxy-00001', tmp_dir))
+            with zipfile.ZipFile(f"{tmp_dir}/proxy-00001.zip") as bundle:
+                self.assertIn('apiproxy/proxies/default.xml',
+                              bundle.namelist())
+
+    def test_export_pipeline(self):
+        """Test a full export of the mock organization."""
+        with tempfile.TemporaryDirectory(dir='.') as tmp_dir:
+            export_dir = os.path.relpath(tmp_dir)
+            os.makedirs(os.path.join(export_dir, 'apis'))
+            os.makedirs(os.path.join(export_dir, 'sharedflows'))
+            exporter = ApigeeExporter(self.baseurl, 'mock-org', 'token',
+                                      'basic', False, workers=4)
+            export_data = exporter.get_export_data(['all'], export_dir)
+            org_config = export_data['orgConfig']
+            self.assertEqual(sorted(org_config['apps']),
+                             self.org.objects['apps'])
+            self.assertEqual(sorted(org_config['resourcefiles']),
+                             [resourcefile['name'] for resourcefile
+                              in self.org.resourcefiles])
+            self.assertEqual(sorted(org_config['apis']),
+                             self.org.objects['apis'])
+            self.assertEqual(
+                len(export_data['envConfig']['env-0']['targetServers']), 5)
+            self.assertEqual(export_data['failedObjects'], [])
+            self.assertTrue(os.path.exists(
+                os.path.join(export_dir, 'apis', 'proxy-00001.zip')))
+
+    def test_pod_components(self):
+        """Test pod components of OPDK topology."""
+        components = self.classic.view_pod_component_details('gateway')
+        self.assertEqual({component['pod'] for component in components},
+                         {'gateway'})
+
+
+class TestMockX(MockServerTestCase):
+    """Test class for the x flavor."""
+
+    flavor = 'x'
+
+    def setUp(self):
+        """Set up."""
+        self.nextgen = ApigeeNewGen(self.baseurl, 'mock-org', 'token', 'x',
+                                    False)
+
+    def test_paginated_listing(self):
+        """Test pageToken pagination and expanded listings."""
+        apps = self.nextgen.list_org_objects('apps')
+        self.assertEqual(apps, self.org.objects['apps'])
+        self.assertEqual(self.nextgen.list_org_objects('apis'),
+                         self.org.objects['apis'])
+        products = self.nextgen.list_org_objects_expand('apiproducts')
+        self.assertEqual(sorted(products), self.org.objects['apiproducts'])
+
+    def test_deployment_snapshot(self):
+        """Test the snapshot matches the per API deployments."""
+        snapshot = self.nextgen.deployment_snapshot(
+            'apis', ['env-0', 'env-1'])
+        self.assertEqual(sorted(snapshot['env-0']), self.org.objects['apis'])
+        mapping = self.nextgen.api_env_mapping('apis', 'proxy-00003')
+        for env in mapping['environment']:
+            self.assertEqual(snapshot[env['name']]['proxy-00003'],
+                             [rev['name'] for rev in env['revision']])
+
+    def test_list_apis_metadata(self):
+        """Test the API listing holds the revisions of each API."""
+        metadata = self.nextgen.list_apis_metadata('sharedflows')
+        self.assertEqual(sorted(metadata), self.org.objects['sharedflows'])
+        self.assertEqual(metadata['flow-00001']['revision'],
+                         self.nextgen.list_api_revisions('sharedflows',
+                                                         'flow-00001'))
+
+    def test_validate_bundle(self):
+        """Test bundle validation uploads."""
+        with tempfile.TemporaryDirectory(dir='.') as tmp_dir:
+            tmp_dir = os.path.relpath(tmp_dir)
+            self.nextgen.fetch_proxy(('apis', 'proxy-00002', tmp_dir))
+            result = self.nextgen.create_api(
+                'apis', 'proxy-00002', f"{tmp_dir}/proxy-00002.zip",
+                'validate')
+        self.assertEqual(result['name'], 'proxy-00002')
+
+
+class TestMockApigee(unittest.TestCase):
+    """Test class for fault injection."""
+
+    def test_throttling(self):
+        """Test throttled requests carry a Retry-After."""
+        apigee = MockApigee(MockOrg(), throttle_rate=1.0, retry_after=3)
+        status_code, headers, _ = apigee.handle(
+            'GET', '/v1/organizations/mock-org', {})
+        self.assertEqual(status_code, 429)
+        self.assertEqual(headers['Retry-After'], '3')
+
+    def test_errors(self):
+        """Test injected and unknown endpoint errors."""
+        apigee = MockApigee(MockOrg(flavor='x'), error_rate=1.0)
+        status_code, _, body = apigee.handle(
+            'GET', '/v1/organizations/mock-org', {})
+        self.assertEqual(status_code, 500)
+        self.assertEqual(json.loads(body)['error']['code'], 500)
+        apigee.error_rate = 0
+        status_code, _, _ = apigee.handle('GET', '/v1/unknown', {})
+        self.assertEqual(status_code, 404)
+
+    def test_page(self):
+        """Test pages start at the start key."""
+        names = ['a', 'b', 'c', 'd']
+        self.assertEqual(page(names, count=2), ['a', 'b'])
+        self.assertEqual(page(names, 'b', 2), ['b', 'c'])
+        self.assertEqual(page(names, 'd', 2), ['d'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -151,11 +151,13 @@ class TestApigeeNewGen(unittest.TestCase):
     @patch("builtins.open", new_callable=mock_open, read_data=b"data")
     def test_fetch_api_revision(self, mock_file):
         """Test fetch api revision."""
-        self.nextgen_client.client.file_get.return_value = b"bundle_data"
         self.nextgen_client.fetch_api_revision("apis", "test_api", "1",
                                                "export_dir")
-        mock_file.assert_called_with("./export_dir/test_api.zip", "wb")
-        mock_file().write.assert_called_with(b"bundle_data")
+        self.nextgen_client.client.file_download.assert_called_once()
+        self.assertEqual(
+            self.nextgen_client.client.file_download.call_args.args[1],
+            "./export_dir/test_api.zip")
+        mock_file.assert_not_called()
 
     @patch("builtins.open", new_callable=mock_open, read_data=b"data")
     def test_create_api(self, _):
@@ -72,6 +72,8 @@ class TestQualificationReport(unittest.TestCase):
         self.validation_report = create_mapping(
             ["Type", "Name", "Importable", "Reason", "Imported"])
         self.org_resourcefiles = create_mapping(["Org", "Resource File"])
+        self.failed_objects = create_mapping(
+            ["Org", "Env", "Resource", "Name", "Error"])
         self.topology_installation_mapping = {
             "headers": ["Datacenter", "Pod", "Type", "IP Address", "Hostname",
                         "Version"],
@@ -758,6 +760,37 @@ class TestQualificationReport(unittest.TestCase):
         mock_sheet.write.assert_any_call(1, 0, 'test_org')
         mock_sheet.write.assert_any_call(1, 1, 'rf1')
 
+    @patch('qualification_report.failed_objects')
+    def test_report_failed_objects(self, mock_mapping):
+        """
+        Test the report_failed_objects method.
+        """
+        mock_mapping.__getitem__.side_effect = (
+            self.failed_objects.__getitem__)
+        self.export_data['failedObjects'] = [
+            {'env': 'test', 'type': 'keystores', 'name': 'ks1',
+             'error': 'HTTP 500'},
+            {'env': 'prod', 'type': 'caches', 'name': None,
+             'error': 'timed out'}]
+        report = QualificationReport(
+            'test.xlsx',
+            self.export_data,
+            self.topology_mapping,
+            self.cfg,
+            self.backend_cfg,
+            self.org_name
+        )
+        mock_sheet = Mock()
+        self.mock_workbook.add_worksheet.return_value = mock_sheet
+        report.report_failed_objects()
+        self.mock_workbook.add_worksheet.assert_called_once_with(
+            name='Failed Objects')
+        mock_sheet.write.assert_any_call(1, 0, 'test_org')
+        mock_sheet.write.assert_any_call(1, 3, 'ks1')
+        mock_sheet.write.assert_any_call(1, 4, 'HTTP 500')
+        mock_sheet.write.assert_any_call(2, 2, 'caches')
+        mock_sheet.write.assert_any_call(2, 3, '')
+
     @patch('qualification_report.topology_installation_mapping')
     def test_report_network_topology(self, mock_mapping):
         """
@@ -0,0 +1,105 @@
+"""Test suite for ratelimit."""
+import time
+import unittest
+from unittest.mock import patch
+
+import ratelimit
+from ratelimit import HostLimiter, get_limiter, parse_retry_after
+from rest import load_http_config
+
+
+class TestHostLimiter(unittest.TestCase):
+    """Test class for HostLimiter."""
+
+    def test_token_bucket(self):
+        """Test the token bucket paces requests after the burst."""
+        limiter = HostLimiter(rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+            limiter.release()
+        self.assertGreaterEqual(time.monotonic() - start, 0.03)
+
+    def test_aimd(self):
+        """Test concurrency halves on throttling and grows back."""
+        limiter = HostLimiter(adaptive=True, initial_concurrency=8,
+                              min_concurrency=2, max_concurrency=9)
+        limiter.acquire()
+        limiter.release(throttled=True)
+        self.assertEqual(limiter.concurrency, 4)
+        limiter.acquire()
+        limiter.release(throttled=True)
+        limiter.acquire()
+        limiter.release(throttled=True)
+        self.assertEqual(limiter.concurrency, 2)
+        for _ in range(10):
+            limiter.acquire()
+            limiter.release()
+        self.assertGreater(limiter.concurrency, 2)
+
+    def test_concurrency_limit(self):
+        """Test acquire waits while the concurrency limit is reached."""
+        limiter = HostLimiter(adaptive=True, initial_concurrency=1)
+        limiter.acquire()
+        # pylint: disable=W0212
+        self.assertGreater(limiter._try_acquire(time.time()), 0)
+        limiter.release()
+        self.assertEqual(limiter._try_acquire(time.time()), 0)
+
+    def test_pause(self):
+        """Test pause blocks acquire."""
+        limiter = HostLimiter(rate=1000)
+        limiter.pause(0.05)
+        start = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+
+class TestRegistry(unittest.TestCase):
+    """Test class for the limiter registry."""
+
+    def setUp(self):
+        """Set up."""
+        self.config = load_http_config('missing.properties')
+        self.patcher = patch.dict(ratelimit._limiters, clear=True)  # noqa pylint: disable=W0212
+        self.patcher.start()
+
+    def tearDown(self):
+        """Tear down."""
+        self.patcher.stop()
+
+    def test_disabled(self):
+        """Test no limiter is used by default."""
+        self.assertIsNone(get_limiter('https://example.com/v1', self.config))
+
+    def test_limiter_per_host(self):
+        """Test limiters are shared per host."""
+        self.config['RATE_LIMIT_PER_SEC'] = 10
+        limiter = get_limiter('https://example.com/v1/a', self.config)
+        self.assertIs(get_limiter('https://example.com/v1/b', self.config),
+                      limiter)
+        self.assertIsNot(get_limiter('https://other.com/v1', self.config),
+                         limiter)
+        self.assertEqual(len(ratelimit._limiters), 2)  # noqa pylint: disable=W0212
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    """Test class for parse_retry_after."""
+
+    def test_seconds(self):
+        """Test delay in seconds."""
+        self.assertEqual(parse_retry_after('3'), 3.0)
+
+    def test_http_date(self):
+        """Test HTTP date."""
+        self.assertEqual(
+            parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+    def test_invalid(self):
+        """Test invalid values."""
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,17 @@
 """Test suite for rest."""
+import hashlib
 import json
+import os
+import pickle
 import sys
+import tempfile
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
-from rest import (ApigeeError, EmptyResponse, JsonResponse, PlainResponse,  # noqa
-                  RawResponse, RestClient)
+from http_pool import PooledHTTPAdapter
+from rest import (ApigeeError, EmptyResponse, JsonResponse,  # noqa
+                  PlainResponse, RawResponse, RestClient, load_http_config)
 sys.path.insert(0, '..')
 
 
@@ -39,6 +46,32 @@ class TestRestClient(unittest.TestCase):
         with self.assertRaises(ValueError):
             RestClient(auth_type='invalid', token='test_token')
 
+    def test_worker_session_reused(self):
+        """Test init_worker registers one session per worker."""
+        client = RestClient(auth_type='basic', token='test')
+        worker_session = Mock()
+        self.mock_session_class.return_value = worker_session
+        with ThreadPoolExecutor(max_workers=1,
+                                initializer=client.init_worker) as pool:
+            sessions = list(pool.map(lambda _: client.session, range(3)))
+        self.assertEqual(sessions, [worker_session] * 3)
+        self.assertIs(client.session, self.mock_session)
+
+    def test_pickled_client_uses_worker_session(self):
+        """Test an unpickled client picks up the worker session."""
+        client = RestClient(auth_type='basic', token='test')
+        worker_session = Mock()
+        self.mock_session_class.return_value = worker_session
+
+        def unpickle_session(data):
+            return pickle.loads(data).session
+
+        data = pickle.dumps(client)
+        with ThreadPoolExecutor(max_workers=1,
+                                initializer=client.init_worker) as pool:
+            session = pool.submit(unpickle_session, data).result()
+        self.assertIs(session, worker_session)
+
     def _prepare_mock_response(self, status_code, content,
                                content_type='application/json'):
         mock_response = Mock()
@@ -65,7 +98,7 @@ class TestRestClient(unittest.TestCase):
         self.assertEqual(response, {'key': 'value'})
         self.mock_session.get.assert_called_once_with(
             'http://example.com', params=None,
-            headers={'Authorization': 'Basic test'}
+            headers={'Authorization': 'Basic test'}, timeout=(10, 60)
         )
 
     def test_post_success(self):
@@ -80,7 +113,7 @@ class TestRestClient(unittest.TestCase):
         self.assertEqual(response, {'status': 'created'})
         self.mock_session.post.assert_called_once_with(
             'http://example.com', data='{"name": "test"}',
-            headers={'Authorization': 'Basic test'}
+            headers={'Authorization': 'Basic test'}, timeout=(10, 60)
         )
 
     def test_file_get_success(self):
@@ -94,6 +127,141 @@ class TestRestClient(unittest.TestCase):
 
         self.assertEqual(response, b'file_content')
         self.mock_session.get.assert_called_once()
+        self.assertEqual(self.mock_session.get.call_args.kwargs['timeout'],
+                         (10, 300))
+
+    def test_file_download_success(self):
+        """Test file download streams chunks to disk."""
+        mock_response = self._prepare_mock_response(
+            200, b'', 'application/octet-stream')
+        mock_response.iter_content.return_value = [b'file_', b'content']
+        self.mock_session.get.return_value = mock_response
+
+        client = RestClient(auth_type='basic', token='test')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'bundle.zip')
+            result = client.file_download('http://example.com/file',
+                                          file_path)
+            with open(file_path, 'rb') as fl:
+                self.assertEqual(fl.read(), b'file_content')
+            self.assertEqual(os.listdir(tmp_dir), ['bundle.zip'])
+
+        self.assertEqual(result, {
+            'sha256': hashlib.sha256(b'file_content').hexdigest(),
+            'size': 12})
+        self.assertTrue(self.mock_session.get.call_args.kwargs['stream'])
+        self.assertEqual(
+            self.mock_session.get.call_args.kwargs['headers']
+            ['Accept-Encoding'], 'identity')
+        mock_response.close.assert_called_once()
+
+    def test_file_download_failure(self):
+        """Test file download error leaves no file behind."""
+        mock_response = self._prepare_mock_response(
+            404, {'code': 'NotFound', 'message': 'missing'})
+        self.mock_session.get.return_value = mock_response
+
+        client = RestClient(auth_type='basic', token='test')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(ApigeeError) as context:
+                client.file_download('http://example.com/file',
+                                     os.path.join(tmp_dir, 'bundle.zip'))
+            self.assertEqual(os.listdir(tmp_dir), [])
+        self.assertEqual(context.exception.status_code, 404)
+        self.assertIsNone(context.exception.retry_after)
+
+    def test_file_download_unparsable_error(self):
+        """Test error bodies that are not JSON still raise ApigeeError."""
+        mock_response = self._prepare_mock_response(
+            502, 'Bad Gateway', 'application/json')
+        mock_response.text = 'Bad Gateway'
+        mock_response.content = b'Bad Gateway'
+        self.mock_session.get.return_value = mock_response
+        client = RestClient(auth_type='basic', token='test')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(ApigeeError) as context:
+                client.file_download('http://example.com/file',
+                                     os.path.join(tmp_dir, 'bundle.zip'))
+        self.assertEqual(context.exception.status_code, 502)
+        self.assertEqual(context.exception.error_code, 'internal.unknown')
+
+    def test_file_download_throttled(self):
+        """Test throttled downloads carry the Retry-After delay."""
+        mock_response = self._prepare_mock_response(
+            429, {'code': 'TooManyRequests', 'message': 'slow down'})
+        mock_response.headers['Retry-After'] = '7'
+        self.mock_session.get.return_value = mock_response
+        config = load_http_config('missing.properties')
+        config['THROTTLE_RETRIES'] = 0
+        client = RestClient('basic', 'test', http_config=config)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(ApigeeError) as context:
+                client.file_download('http://example.com/file',
+                                     os.path.join(tmp_dir, 'bundle.zip'))
+        self.assertEqual(context.exception.retry_after, 7.0)
+
+    def test_file_download_interrupted(self):
+        """Test an interrupted download removes the partial file."""
+        mock_response = self._prepare_mock_response(
+            200, b'', 'application/octet-stream')
+
+        def chunks(chunk_size):  # pylint: disable=W0613
+            yield b'partial'
+            raise IOError('connection reset')
+        mock_response.iter_content.side_effect = chunks
+        self.mock_session.get.return_value = mock_response
+
+        client = RestClient(auth_type='basic', token='test')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertRaises(IOError):
+                client.file_download('http://example.com/file',
+                                     os.path.join(tmp_dir, 'bundle.zip'))
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+    def test_method_timeouts(self):
+        """Test per method timeout overrides."""
+        config = load_http_config('missing.properties')
+        config.update({'CONNECT_TIMEOUT': 5, 'READ_TIMEOUT': 30,
+                       'PUT_READ_TIMEOUT': 120, 'DELETE_CONNECT_TIMEOUT': 0})
+        client = RestClient('basic', 'test', http_config=config)
+        self.assertEqual(client._timeout('GET'), (5, 30))  # noqa pylint: disable=W0212
+        self.assertEqual(client._timeout('PUT'), (5, 120))  # noqa pylint: disable=W0212
+        self.assertEqual(client._timeout('DELETE'), (None, 30))  # noqa pylint: disable=W0212
+
+    def test_hedged_get(self):
+        """Test a slow GET is hedged with a duplicate request."""
+        config = load_http_config('missing.properties')
+        config.update({'HEDGE_GETS': True, 'HEDGE_MIN_SAMPLES': 1,
+                       'HEDGE_MIN_DELAY': 0.01})
+        slow_response = self._prepare_mock_response(200, {'from': 'slow'})
+        fast_response = self._prepare_mock_response(200, {'from': 'hedge'})
+        release = threading.Event()
+
+        def session_get(*_, **__):
+            if self.mock_session.get.call_count == 1:
+                release.wait(5)
+                return slow_response
+            return fast_response
+
+        self.mock_session.get.side_effect = session_get
+        client = RestClient('basic', 'test', http_config=config)
+        client._latency.record(0.01)  # noqa pylint: disable=W0212
+        try:
+            self.assertEqual(client.get('http://example.com'),
+                             {'from': 'hedge'})
+        finally:
+            release.set()
+        self.assertEqual(self.mock_session.get.call_count, 2)
+
+    def test_hedged_get_without_samples(self):
+        """Test GETs are not hedged until latencies are known."""
+        config = load_http_config('missing.properties')
+        config['HEDGE_GETS'] = True
+        self.mock_session.get.return_value = self._prepare_mock_response(
+            200, {'key': 'value'})
+        client = RestClient('basic', 'test', http_config=config)
+        self.assertEqual(client.get('http://example.com'), {'key': 'value'})
+        self.assertEqual(self.mock_session.get.call_count, 1)
 
     def test_file_post_success(self):
         """Test file post success."""
@@ -111,6 +279,41 @@ class TestRestClient(unittest.TestCase):
         self.assertEqual(response, {'status': 'uploaded'})
         self.mock_session.post.assert_called_once()
 
+    @patch('rest.time.sleep')
+    def test_throttled_get_retried(self, mock_sleep):
+        """Test 429 responses are retried after Retry-After."""
+        throttled = self._prepare_mock_response(429, {'error': 'quota'})
+        throttled.headers['Retry-After'] = '2'
+        self.mock_session.get.side_effect = [
+            throttled, self._prepare_mock_response(200, {'key': 'value'})]
+
+        client = RestClient(auth_type='basic', token='test')
+        self.assertEqual(client.get('http://example.com'), {'key': 'value'})
+        mock_sleep.assert_called_once_with(2.0)
+
+    @patch('rest.time.sleep')
+    def test_throttled_retries_exhausted(self, mock_sleep):
+        """Test throttled responses are returned after the last retry."""
+        self.mock_session.get.return_value = self._prepare_mock_response(
+            503, 'Service Unavailable', 'text/plain')
+        config = load_http_config('missing.properties')
+        config['THROTTLE_RETRIES'] = 2
+        client = RestClient('basic', 'test', http_config=config)
+        self.assertEqual(client.get('http://example.com'),
+                         'Service Unavailable')
+        self.assertEqual(self.mock_session.get.call_count, 3)
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list],
+                         [1.0, 2.0])
+
+    @patch('rest.ratelimit.get_limiter')
+    def test_failed_request_is_congestion(self, mock_get_limiter):
+        """Test a failed request shrinks the adaptive concurrency."""
+        self.mock_session.get.side_effect = ConnectionError('reset')
+        client = RestClient(auth_type='basic', token='test')
+        with self.assertRaises(ConnectionError):
+            client.get('http://example.com')
+        mock_get_limiter.return_value.release.assert_called_once_with(True)
+
     def test_403_forbidden(self):
         """Test 403 forbidden."""
         mock_response = self._prepare_mock_response(403, 'Forbidden')
@@ -138,6 +341,108 @@ class TestRestClient(unittest.TestCase):
             self.assertEqual(cm.exception.message, 'An error occurred')
 
 
+class TestGetMemo(unittest.TestCase):
+    """Test class for GET coalescing and memoization."""
+
+    def setUp(self):
+        """Set up."""
+        self.mock_session = Mock()
+        self.patcher = patch('rest.requests.Session',
+                             return_value=self.mock_session)
+        self.patcher.start()
+        response = Mock()
+        response.status_code = 200
+        response.text = '{"names": ["a"]}'
+        response.content = response.text.encode()
+        response.headers = {'Content-Type': 'application/json'}
+        response.request.method = 'GET'
+        response.request.url = 'http://example.com/apis'
+        self.mock_session.get.return_value = response
+        self.mock_session.delete.return_value = response
+
+    def tearDown(self):
+        """Tear down."""
+        self.patcher.stop()
+
+    def test_memoized_copies(self):
+        """Test GETs are memoized and callers get their own copy."""
+        client = RestClient('basic', 'test')
+        first = client.get('http://example.com/apis', params={'count': 1})
+        first['names'].append('modified')
+        second = client.get('http://example.com/apis', params={'count': 1})
+        self.assertEqual(second, {'names': ['a']})
+        self.assertEqual(self.mock_session.get.call_count, 1)
+        client.get('http://example.com/apis', params={'count': 2})
+        self.assertEqual(self.mock_session.get.call_count, 2)
+        self.assertEqual(client.memo_stats()['hits'], 1)
+
+    def test_error_responses_not_memoized(self):
+        """Test error bodies returned by a GET are not memoized."""
+        response = self.mock_session.get.return_value
+        response.status_code = 404
+        response.text = '{"error": "not found"}'
+        response.content = response.text.encode()
+        client = RestClient('basic', 'test')
+        client.get('http://example.com/apis/missing')
+        client.get('http://example.com/apis/missing')
+        self.assertEqual(self.mock_session.get.call_count, 2)
+        self.assertEqual(client.memo_stats()['entries'], 0)
+
+    def test_invalidated_by_changes(self):
+        """Test non GET requests drop the affected results."""
+        client = RestClient('basic', 'test')
+        client.get('http://example.com/apis')
+        client.get('http://example.com/apis/a')
+        client.get('http://example.com/developers')
+        client.delete('http://example.com/apis/a')
+        client.get('http://example.com/apis')
+        client.get('http://example.com/apis/a')
+        client.get('http://example.com/developers')
+        self.assertEqual(self.mock_session.get.call_count, 5)
+
+    def test_disabled(self):
+        """Test memoization can be disabled."""
+        config = load_http_config('missing.properties')
+        config['MEMOIZE_GETS'] = False
+        client = RestClient('basic', 'test', http_config=config)
+        client.get('http://example.com/apis')
+        client.get('http://example.com/apis')
+        self.assertEqual(self.mock_session.get.call_count, 2)
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test class for connection pool configuration."""
+
+    def test_load_http_config(self):
+        """Test load http config."""
+        with tempfile.TemporaryDirectory() as tmp:
+            config_file = os.path.join(tmp, 'backend.properties')
+            with open(config_file, 'w', encoding='utf-8') as f:
+                f.write("[http]\nPOOL_MAXSIZE=50\nPOOL_BLOCK=true\n")
+            config = load_http_config(config_file)
+        self.assertEqual(config['POOL_MAXSIZE'], 50)
+        self.assertTrue(config['POOL_BLOCK'])
+        self.assertEqual(config['POOL_CONNECTIONS'], 10)
+
+    def test_load_http_config_missing_file(self):
+        """Test load http config falls back to defaults."""
+        config = load_http_config('missing.properties')
+        self.assertEqual(config['POOL_MAXSIZE'], 20)
+        self.assertTrue(config['KEEP_ALIVE'])
+
+    def test_session_adapter(self):
+        """Test sessions mount a tuned adapter."""
+        config = load_http_config('missing.properties')
+        config.update({'POOL_MAXSIZE': 32, 'KEEP_ALIVE': False,
+                       'CONNECT_RETRIES': 5})
+        client = RestClient('basic', 'test', http_config=config)
+        adapter = client.session.get_adapter('https://example.com')
+        self.assertIsInstance(adapter, PooledHTTPAdapter)
+        self.assertEqual(adapter.pool_maxsize, 32)
+        self.assertEqual(adapter.max_retries.connect, 5)
+        self.assertEqual(client.session.headers['Connection'], 'close')
+
+
 class TestResponseClasses(unittest.TestCase):
     """Test class for ResponseClasses."""
 
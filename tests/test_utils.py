@@ -1,11 +1,15 @@
 """Test suite for utils."""
+import concurrent.futures
 import json
 import os
 import shutil
+import stat
+import threading
 import unittest
 import zipfile
 from configparser import ConfigParser
 from unittest.mock import MagicMock, mock_open, patch
+import json_codec
 import utils
 
 
@@ -119,6 +123,57 @@ class TestUtils(unittest.TestCase):
         with open(file_path, "r", encoding='utf-8') as f:
             self.assertEqual(json.load(f), data)
 
+    def test_write_json_streams_sections(self):
+        """Test streamed documents match the in memory layout."""
+        file_path = os.path.join(self.test_dir, "export_data.json")
+        data = {"orgConfig": {"apps": {"app1": {"name": "app1"}},
+                              "kvms": {}},
+                "envConfig": {"test": {"targetServers": ["ts1"]}},
+                "export": True}
+        for compact in (False, True):
+            self.assertTrue(utils.write_json(file_path, data,
+                                             compact=compact))
+            with open(file_path, "rb") as f:
+                self.assertEqual(
+                    f.read(),
+                    json_codec.dumps(data, indent=None if compact else 2))
+        self.assertEqual(os.listdir(self.test_dir), ["export_data.json"])
+
+    def test_write_json_gzip(self):
+        """Test compressed documents are read back transparently."""
+        file_path = os.path.join(self.test_dir, "export_data.json")
+        data = {"key": ["value"]}
+        utils.write_json(file_path, data, compression="gzip")
+        with open(f"{file_path}.gz", "rb") as f:
+            self.assertEqual(f.read(2), utils.GZIP_MAGIC)
+        self.assertFalse(os.path.exists(file_path))
+        self.assertEqual(utils.parse_json(file_path), data)
+        with self.assertRaises(ValueError):
+            utils.write_json(file_path, data, compression="lz4")
+        os.utime(f"{file_path}.gz", (0, 0))
+        utils.write_json(file_path, {"key": ["plain"]})
+        self.assertEqual(utils.parse_json(file_path), {"key": ["plain"]})
+
+    def test_write_json_is_atomic(self):
+        """Test failed writes leave the previous file in place."""
+        file_path = os.path.join(self.test_dir, "export_data.json")
+        utils.write_json(file_path, {"key": "value"})
+        with self.assertRaises(TypeError):
+            utils.write_json(file_path, {"key": "value", "bad": object()})
+        self.assertEqual(utils.parse_json(file_path), {"key": "value"})
+        self.assertEqual(os.listdir(self.test_dir), ["export_data.json"])
+        self.assertFalse(utils.write_json(
+            os.path.join(self.test_dir, "missing", "test.json"), {}))
+
+    def test_write_json_mode(self):
+        """Test written files get the mode of the umask."""
+        file_path = os.path.join(self.test_dir, "export_data.json")
+        utils.write_json(file_path, {"key": "value"})
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(stat.S_IMODE(os.stat(file_path).st_mode),
+                         0o666 & ~umask)
+
     def test_read_file(self):
         """Test read file."""
         file_path = os.path.join(self.test_dir, "test.txt")
@@ -316,6 +371,124 @@ class TestUtils(unittest.TestCase):
             self.assertIn('test_dir/file1.txt', zipf.namelist())
             self.assertIn('test_dir/sub/file2.txt', zipf.namelist())
 
+    @patch('utils.sleep')
+    def test_retry(self, mock_sleep):
+        """Test retry backs off and honours retry_after."""
+        error = ValueError("throttled")
+        error.retry_after = 7
+        func = MagicMock(side_effect=[ValueError("boom"), error, "ok"],
+                         __name__="func")
+        self.assertEqual(utils.retry(delay=2)(func)(), "ok")
+        self.assertEqual([c.args[0] for c in mock_sleep.call_args_list],
+                         [2, 7])
+
+    def test_paginate(self):
+        """Test paginate drops repeated cursors and prefetches pages."""
+        pages = {None: ['a', 'b'], 'b': ['b', 'c', 'd'], 'd': ['d']}
+        fetched = []
+        prefetched = threading.Event()
+
+        def fetch(start_key):
+            fetched.append(start_key)
+            if start_key is not None:
+                prefetched.set()
+            return list(pages[start_key])
+
+        result = []
+        for page in utils.paginate(fetch, lambda name: name):
+            # The next page is requested while this one is processed
+            self.assertTrue(prefetched.wait(5))
+            prefetched.clear()
+            result.append(page)
+        self.assertEqual(result, [['a', 'b'], ['c', 'd']])
+        self.assertEqual(fetched, [None, 'b', 'd'])
+
+    def test_paginate_stuck_cursor(self):
+        """Test paginate stops when the cursor does not advance."""
+        fetch = MagicMock(return_value=['a'])
+        result = list(utils.paginate(fetch, lambda name: name,
+                                     prefetch=False))
+        self.assertEqual(result, [['a']])
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_fan_out(self):
+        """Test fan_out keeps the item order and bounds concurrency."""
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def func(item):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            threading.Event().wait(0.01)
+            with lock:
+                running[0] -= 1
+            return item * 2
+
+        result = utils.fan_out(func, range(20), workers=4)
+        self.assertEqual(result, [(i, i * 2) for i in range(20)])
+        self.assertLessEqual(running[1], 4)
+        with self.assertRaises(ZeroDivisionError):
+            utils.fan_out(lambda item: 1 / item, [1, 0, 2], workers=2)
+        result = utils.fan_out(lambda item: 1 / item, [1, 0, 2],
+                               workers=2, return_exceptions=True)
+        self.assertEqual(result[0], (1, 1.0))
+        self.assertIsInstance(result[1][1], ZeroDivisionError)
+        self.assertEqual(result[2], (2, 0.5))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            result = utils.fan_out(func, range(5), workers=2, executor=pool)
+        self.assertEqual(result, [(i, i * 2) for i in range(5)])
+
+    def test_run_parallel_thread(self):
+        """Test run parallel with the thread executor."""
+        result = utils.run_parallel(lambda x: x * 2, [1, 2, 3],
+                                    executor='thread')
+        self.assertEqual(sorted(result), [2, 4, 6])
+
+    def test_run_parallel_asyncio(self):
+        """Test run parallel with the asyncio executor."""
+        async def double(x):
+            return x * 2
+
+        self.assertEqual(
+            sorted(utils.run_parallel(double, [1, 2], executor='asyncio')),
+            [2, 4])
+        self.assertEqual(
+            sorted(utils.run_parallel(lambda x: x + 1, [1, 2],
+                                      executor='asyncio')),
+            [2, 3])
+
+    def test_run_parallel_retries(self):
+        """Test run parallel retries failed tasks."""
+        calls = []
+
+        def flaky(x):
+            calls.append(x)
+            if len(calls) == 1:
+                raise ValueError("boom")
+            return x
+
+        for executor in ('thread', 'asyncio'):
+            calls.clear()
+            result = utils.run_parallel(flaky, [1], executor=executor,
+                                        retry_delay=0)
+            self.assertEqual(result, [1])
+            self.assertEqual(len(calls), 2)
+
+    def test_run_parallel_exhausted_retries(self):
+        """Test run parallel marks tasks failing every retry."""
+        def fail(_):
+            raise ValueError("boom")
+
+        result = utils.run_parallel(fail, [1], executor='thread',
+                                    max_retries=1, retry_delay=0)
+        self.assertEqual(result, ["Exception"])
+
+    def test_run_parallel_invalid_executor(self):
+        """Test run parallel with an unknown executor."""
+        with self.assertRaises(ValueError):
+            utils.run_parallel(abs, [1], executor='invalid')
+
     @patch('utils.copy_folder')
     @patch('utils.get_proxy_entrypoint')
     @patch('utils.parse_proxy_root')
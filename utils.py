@@ -26,17 +26,33 @@ and handling parallel execution.
 import os
 import sys
 import csv
+import gzip
 import json
 import shutil
 import hashlib
+import asyncio
+import tempfile
+import contextlib
 import configparser
 import concurrent.futures
 from time import sleep
 import zipfile
 import requests  # pylint: disable=E0401
 import xmltodict  # pylint: disable=E0401
+import json_codec
+from atomic_file import FILE_MODE
 from base_logger import logger, EXEC_INFO
 
+try:
+    import zstandard  # pylint: disable=E0401
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# File name suffixes of the JSON file compressions
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
 
 def parse_config(config_file):
     """Parses a configuration file.
@@ -186,9 +202,57 @@ def print_json(data):
     logger.info(json.dumps(data, indent=2))
 
 
+def _decompress(data):
+    """Decompresses gzip or zstd data, detected by magic number."""
+    if data[:2] == GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError('zstd compressed JSON requires '
+                             'the zstandard package')
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def _compressor(fl, compression):
+    """Wraps a binary file object to compress what is written to it."""
+    if not compression:
+        return contextlib.nullcontext(fl)
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=fl, mode='wb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError('zstd compression requires '
+                             'the zstandard package')
+        return zstandard.ZstdCompressor().stream_writer(fl, closefd=False)
+    raise ValueError(f'Unsupported compression "{compression}"')
+
+
+def _compressed_path(file, compression):
+    """Returns the path a JSON file is written to when compressed."""
+    if not compression:
+        return file
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f'Unsupported compression "{compression}"')
+    return f'{file}{COMPRESSION_SUFFIXES[compression]}'
+
+
+def _written_path(file):
+    """Returns the newest of a JSON file and its compressed variants."""
+    paths = [path for path in
+             [file, *(f'{file}{suffix}'
+                      for suffix in COMPRESSION_SUFFIXES.values())]
+             if os.path.exists(path)]
+    return max(paths, key=os.path.getmtime) if paths else file
+
+
 def parse_json(file):
     """Parses JSON data from a file.
 
+    Files written with gzip or zstd compression, named
+    with a `.gz` or `.zst` suffix by `write_json`, are
+    found and decompressed transparently.
+
     Args:
         file: Path to file
 
@@ -196,32 +260,54 @@ def parse_json(file):
         Parsed JSON data
     """
     try:
-        with open(file) as fl:  # noqa pylint: disable=W1514
-            doc = json.loads(fl.read())
+        with open(_written_path(file), 'rb') as fl:
+            doc = json_codec.loads(_decompress(fl.read()))
         return doc
     except FileNotFoundError:
         logger.warning(f"File \"{file}\" not found", exc_info=EXEC_INFO)  # noqa pylint: disable=W1203
     return {}
 
 
-def write_json(file, data):
+def write_json(file, data, compact=False, compression=None):
     """Writes JSON data to a file.
 
+    The document is streamed section by section to a temporary
+    file next to `file`, which is then renamed over it, so readers
+    never see a partially written file.
+
     Args:
         file: The file path to write to.
         data: The JSON data to write.
+        compact (bool, optional): Write without indentation.
+        compression (str, optional): Compress the file with
+            `gzip` or `zstd`, adding a `.gz` or `.zst` suffix
+            to its name.
 
     Returns:
         True if successful, False \
         otherwise.
+
+    Raises:
+        ValueError: If the compression is not supported.
     """
+    file = _compressed_path(file, compression)
+    logger.info(f"Writing JSON to File {file}")  # noqa pylint: disable=W1203
     try:
-        logger.info(f"Writing JSON to File {file}")  # noqa pylint: disable=W1203
-        with open(file, 'w') as fl:  # noqa pylint: disable=W1514
-            fl.write(json.dumps(data, indent=2))
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(file) or '.',
+            prefix=f'.{os.path.basename(file)}.', suffix='.part')
     except FileNotFoundError:
         logger.error(f"File \"{file}\" not found", exc_info=EXEC_INFO)  # noqa pylint: disable=W1203
         return False
+    try:
+        os.chmod(temp_path, FILE_MODE)
+        with open(fd, 'wb') as raw:
+            with _compressor(raw, compression) as fl:
+                json_codec.dump(data, fl, indent=None if compact else 2)
+        os.replace(temp_path, file)
+    except BaseException:
+        os.remove(temp_path)
+        raise
     return True
 
 
@@ -357,10 +443,15 @@ def write_csv_report(file_name, header, rows):
             writer.writerow(each_row)
 
 
-def retry(retries=3, delay=1, backoff=2):  # noqa pylint: disable=W0613
+def retry(retries=3, delay=1, backoff=2):
     """Retry decorator with exponential \
     backoff.
 
+    Exceptions carrying a `retry_after` \
+    attribute (e.g. a throttled \
+    `rest.ApigeeError`) wait for that \
+    delay instead of the backoff.
+
     Args:
         retries: Number of retries
         delay: Initial delay
@@ -371,22 +462,111 @@ def retry(retries=3, delay=1, backoff=2):  # noqa pylint: disable=W0613
     """
     def decorator(func):   # noqa
         def wrapper(*args, **kwargs): # noqa pylint: disable=R1710
-            delay = 1
+            wait = delay
             for attempt in range(retries + 1):
                 try:
                     return func(*args, **kwargs)
                 except Exception as e: # noqa pylint: disable=W1203,W0718
                     if attempt == retries:
                         raise e
-                    logger.info(f"Retrying {func.__name__} in {delay} seconds... (Attempt {attempt + 1})")   # noqa pylint: disable=C0301,W1203
-                    sleep(delay)
-                    delay *= backoff   # noqa
+                    retry_after = getattr(e, 'retry_after', None)
+                    sleep_for = wait if retry_after is None else retry_after
+                    logger.info(f"Retrying {func.__name__} in {sleep_for} seconds... (Attempt {attempt + 1})")   # noqa pylint: disable=C0301,W1203
+                    sleep(sleep_for)
+                    wait *= backoff
         return wrapper
     return decorator
 
 
-def run_parallel(func, args, workers=10,
-                 max_retries=3, retry_delay=1):
+def paginate(fetch, cursor, prefetch=True):
+    """Yields the pages of a cursor paginated listing.
+
+    The request of the next page is started as soon as the
+    cursor is known, so it runs while the caller processes the
+    current page. Listings resuming at the cursor repeat it as
+    first item of the next page, which is dropped.
+
+    Args:
+        fetch: Returns the page starting at a cursor, or the
+            first page for None. Pages are lists.
+        cursor: Returns the cursor of an item.
+        prefetch: Whether to fetch the next page in the
+            background.
+
+    Yields:
+        list: The pages, without repeated items.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        page = fetch(None)
+        start_key = None
+        while page:
+            if start_key is not None and cursor(page[0]) == start_key:
+                page = page[1:]
+            if not page:
+                return
+            next_key = cursor(page[-1])
+            if next_key == start_key:
+                return
+            start_key = next_key
+            next_page = pool.submit(fetch, start_key) if prefetch else None
+            yield page
+            page = (next_page.result() if next_page is not None
+                    else fetch(start_key))
+
+
+def fan_out(func, items, workers=10, initializer=None, initargs=(),  # noqa pylint: disable=R0913,R0917
+            return_exceptions=False, executor=None):
+    """Calls a function for each item on a bounded thread pool.
+
+    Used to issue the per-object GETs of resource types without
+    a bulk endpoint concurrently. Exceptions are raised to the
+    caller, as a serial loop would, unless `return_exceptions`
+    is set.
+
+    Args:
+        func: Function called with each item.
+        items: The items.
+        workers: Maximum number of concurrent calls.
+        initializer: Callable run once in each thread, e.g.
+            `RestClient.init_worker`.
+        initargs: Arguments for the initializer.
+        return_exceptions: Return the exception raised for an
+            item as its result instead of raising it.
+        executor: A long-lived thread pool to submit the calls
+            to instead of starting one per call; `workers` and
+            the initializer are then those of the pool.
+
+    Returns:
+        list: (item, result) tuples, in the order of `items`.
+    """
+    def call(item):
+        try:
+            return func(item)
+        except Exception as exc:  # noqa pylint: disable=W0718
+            if not return_exceptions:
+                raise
+            return exc
+
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [(item, call(item)) for item in items]
+    if executor is not None:
+        return list(zip(items, executor.map(call, items)))
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(workers, len(items)), initializer=initializer,
+            initargs=initargs) as pool:
+        return list(zip(items, pool.map(call, items)))
+
+
+PARALLEL_EXECUTORS = {
+    'process': concurrent.futures.ProcessPoolExecutor,
+    'thread': concurrent.futures.ThreadPoolExecutor,
+}
+
+
+def run_parallel(func, args, workers=10,  # noqa pylint: disable=R0913,R0917
+                 max_retries=3, retry_delay=1, executor='process',
+                 initializer=None, initargs=()):
     """Runs a function in parallel with \
     multiple arguments.
 
@@ -396,36 +576,144 @@ def run_parallel(func, args, workers=10,
         workers: Number of workers.
         max_retries: Max retry attempts.
         retry_delay: Retry delay.
+        executor: Executor backend - 'process' for \
+        CPU-bound work (e.g. XML parsing), 'thread' \
+        for I/O-bound work (e.g. bundle downloads) \
+        or 'asyncio' for coroutine functions.
+        initializer: Callable run once in each \
+        worker before its first task, e.g. \
+        `RestClient.init_worker`.
+        initargs: Arguments for the initializer.
 
     Returns:
         List of results.
     """
-    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:  # noqa
-        # Initial futures (future: (arg, retry_count))
-        future_to_arg_retry = {executor.submit(func, arg): (arg, 0) for arg in args}  # noqa
-
-        data = []
-        while future_to_arg_retry:
-            done, _ = concurrent.futures.wait(future_to_arg_retry, return_when=concurrent.futures.FIRST_COMPLETED)   # noqa pylint: disable=C0301
-            for future in done:
-                arg, retry_count = future_to_arg_retry.pop(future)
+    if executor == 'asyncio':
+        return asyncio.run(_run_parallel_async(
+            func, args, workers, max_retries, retry_delay,
+            initializer, initargs))
+    if executor not in PARALLEL_EXECUTORS:
+        raise ValueError(
+            f'Unknown executor {executor}, allowed executors are '
+            f'{", ".join([*PARALLEL_EXECUTORS, "asyncio"])}')
+    pool_class = PARALLEL_EXECUTORS[executor]
+    with pool_class(max_workers=workers, initializer=initializer,
+                    initargs=initargs) as pool:
+        return _run_in_pool(pool, func, args, max_retries, retry_delay)
+
+
+def _run_in_pool(pool, func, args, max_retries, retry_delay):
+    """Submits tasks to a pool, retrying \
+    failed ones, and collects their results.
+
+    Args:
+        pool: The thread or process pool.
+        func: Function to execute.
+        args: Arguments for the function.
+        max_retries: Max retry attempts.
+        retry_delay: Retry delay.
+
+    Returns:
+        List of results, in completion order.
+    """
+    # Initial futures (future: (arg, retry_count))
+    future_to_arg_retry = {pool.submit(func, arg): (arg, 0) for arg in args}  # noqa
+
+    data = []
+    while future_to_arg_retry:
+        done, _ = concurrent.futures.wait(future_to_arg_retry, return_when=concurrent.futures.FIRST_COMPLETED)   # noqa pylint: disable=C0301
+        for future in done:
+            arg, retry_count = future_to_arg_retry.pop(future)
+            try:
+                data.append(future.result())
+            except Exception as exc:   # noqa pylint: disable=W1203,W0718
+                if _should_retry(arg, exc, retry_count, max_retries,
+                                 retry_delay):
+                    sleep(retry_delay)
+                    future_to_arg_retry[pool.submit(func, arg)] = (arg, retry_count + 1)   # noqa pylint: disable=C0301
+                else:
+                    data.append("Exception")
+    return data
+
+
+def _should_retry(arg, exc, retry_count, max_retries, retry_delay):  # noqa pylint: disable=R0913,R0917
+    """Logs a failed parallel task and decides \
+    whether it should be retried.
+
+    Args:
+        arg: Argument of the failed task.
+        exc: Exception raised by the task.
+        retry_count: Retries done so far.
+        max_retries: Max retry attempts.
+        retry_delay: Retry delay.
+
+    Returns:
+        True if the task should be retried.
+    """
+    if retry_count < max_retries:
+        logger.warning(  # noqa pylint: disable=W1203
+            f"Task with arg {arg} failed ({retry_count + 1}/{max_retries} retries), retrying in {retry_delay} seconds...",   # noqa pylint: disable=C0301,W1203
+            exc_info=True,
+        )
+        return True
+    logger.error(  # noqa pylint: disable=W1203
+        f"Task with arg {arg} failed with {exc} after {max_retries} retries.",   # noqa pylint: disable=C0301
+        exc_info=True
+    )
+    return False
+
+
+async def _run_parallel_async(func, args, workers,  # noqa pylint: disable=R0913,R0917
+                              max_retries, retry_delay,
+                              initializer=None, initargs=()):
+    """Runs a function concurrently on an \
+    asyncio event loop.
+
+    Coroutine functions are awaited directly, \
+    plain functions are run on a thread pool \
+    sized to the number of workers.
+
+    Args:
+        func: Function or coroutine function.
+        args: Arguments for the function.
+        workers: Max concurrent tasks.
+        max_retries: Max retry attempts.
+        retry_delay: Retry delay.
+        initializer: Initializer for the thread \
+        pool workers.
+        initargs: Arguments for the initializer.
+
+    Returns:
+        List of results.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(workers)
+    data = []
+
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, initializer=initializer,
+            initargs=initargs) as pool:
+        async def run_one(arg):
+            retry_count = 0
+            while True:
                 try:
-                    data.append(future.result())
+                    async with semaphore:
+                        if asyncio.iscoroutinefunction(func):
+                            result = await func(arg)
+                        else:
+                            result = await loop.run_in_executor(
+                                pool, func, arg)
+                    data.append(result)
+                    return
                 except Exception as exc:   # noqa pylint: disable=W1203,W0718
-                    if retry_count < max_retries:
-                        retry_count += 1
-                        logger.warning(  # noqa pylint: disable=W1203
-                            f"Task with arg {arg} failed ({retry_count}/{max_retries} retries), retrying in {retry_delay} seconds...",   # noqa pylint: disable=C0301,W1203
-                            exc_info=True,
-                        )
-                        sleep(retry_delay)
-                        future_to_arg_retry[executor.submit(func, arg)] = (arg, retry_count)   # noqa pylint: disable=C0301
-                    else:
+                    if not _should_retry(arg, exc, retry_count, max_retries,
+                                         retry_delay):
                         data.append("Exception")
-                        logger.error(  # noqa pylint: disable=W1203
-                            f"Task with arg {arg} failed with {exc} after {max_retries} retries.",   # noqa pylint: disable=C0301
-                            exc_info=True
-                        )
+                        return
+                    retry_count += 1
+                    await asyncio.sleep(retry_delay)
+
+        await asyncio.gather(*(run_one(arg) for arg in args))
     return data
 
 